@@ -1,15 +1,440 @@
 """Console script for dwiprep."""
+import json
 import sys
+from pathlib import Path
+
 import click
 
+from dwiprep import __version__
+
+#: Nipype plugins' arguments set by resource limits
+RESOURCE_ARGS = {"nprocs": "n_procs", "mem_gb": "memory_gb"}
+
+#: Output spaces of the anatomical workflow, unless set otherwise
+DEFAULT_SPACES = "MNI152NLin2009cAsym"
+
+
+def parse_json_option(ctx, param, value) -> dict:
+    """
+    Parses a JSON option, given either as a string or as a path to a file.
+
+    Parameters
+    ----------
+    value : str
+        The option's value (i.e, '{"acquisition": "AP"}')
+
+    Returns
+    -------
+    dict
+        The parsed value, empty if not given
+    """
+    if not value:
+        return {}
+    try:
+        if Path(value).is_file():
+            return json.loads(Path(value).read_text())
+        return json.loads(value)
+    except (OSError, ValueError) as e:
+        raise click.BadParameter(f"expected JSON or a JSON file ({e}).")
+
+
+def parse_spaces(value: str):
+    """
+    Parses output spaces into the *SpatialReferences* expected by
+    *smriprep* (i.e, ``spaces.get_spaces``).
+
+    Parameters
+    ----------
+    value : str
+        Space-separated spaces, with optional specs
+        (i.e, "MNI152NLin2009cAsym:res-2 T1w")
+
+    Returns
+    -------
+    SpatialReferences
+        The parsed spaces
+    """
+    from niworkflows.utils.spaces import Reference, SpatialReferences
+
+    references = []
+    for spec in value.split():
+        references += Reference.from_string(spec)
+    return SpatialReferences(references)
+
+
+def parse_spaces_option(ctx, param, value):
+    """
+    Parses the ``--output-spaces`` option (see *parse_spaces*).
+
+    Parameters
+    ----------
+    value : str
+        The option's value (i.e, "MNI152NLin2009cAsym:res-2 T1w")
+
+    Returns
+    -------
+    SpatialReferences
+        The parsed spaces, or None if not given
+    """
+    if not value:
+        return None
+    try:
+        return parse_spaces(value)
+    except (TypeError, ValueError) as e:
+        raise click.BadParameter(f"expected spaces (i.e, T1w) ({e}).")
+
+
+def parse_smriprep_kwargs(ctx, param, value) -> dict:
+    """
+    Parses *smriprep*'s keyword arguments (see *parse_json_option*),
+    converting those that JSON cannot hold: "spaces" (a string of
+    space-separated spaces, or a list of them) and the "anat_derivatives"
+    directory.
+
+    Parameters
+    ----------
+    value : str
+        The option's value (i.e, '{"spaces": "T1w", "freesurfer": false}')
+
+    Returns
+    -------
+    dict
+        The parsed keyword arguments
+    """
+    kwargs = parse_json_option(ctx, param, value)
+    spaces = kwargs.get("spaces")
+    if isinstance(spaces, (list, str)):
+        spaces = spaces if isinstance(spaces, str) else " ".join(spaces)
+        kwargs["spaces"] = parse_spaces_option(ctx, param, spaces)
+    if kwargs.get("anat_derivatives"):
+        kwargs["anat_derivatives"] = Path(kwargs["anat_derivatives"])
+    return kwargs
+
+
+def parse_shard(ctx, param, value) -> tuple:
+    """
+    Parses a shard selection ("INDEX/COUNT", 1-based).
+
+    Parameters
+    ----------
+    value : str
+        The option's value (i.e, "2/4")
+
+    Returns
+    -------
+    tuple
+        The shard's (index, count), or None if not given
+    """
+    if not value:
+        return None
+    try:
+        index, count = [int(part) for part in value.split("/")]
+    except ValueError:
+        raise click.BadParameter("expected INDEX/COUNT (i.e, 2/4).")
+    if not 1 <= index <= count:
+        raise click.BadParameter("expected 1 <= INDEX <= COUNT.")
+    return index, count
+
+
+def select_shard(participant_labels: list, shard: tuple = None) -> list:
+    """
+    Selects a shard of (sorted) participants, so that COUNT jobs with
+    indices 1 to COUNT process each participant exactly once.
+
+    Parameters
+    ----------
+    participant_labels : list
+        All participants' labels
+    shard : tuple, optional
+        The shard's (index, count), by default all participants
+
+    Returns
+    -------
+    list
+        The shard's participants' labels
+    """
+    participant_labels = sorted(participant_labels)
+    if shard is None:
+        return participant_labels
+    index, count = shard
+    return participant_labels[index - 1 :: count]
+
+
+def format_plan(runs: list) -> str:
+    """
+    A table of the resolved DWI runs.
+
+    Parameters
+    ----------
+    runs : list
+        Runs' dictionaries (see *DmriPrepManager.plan*)
+
+    Returns
+    -------
+    str
+        A line per run
+    """
+    lines = []
+    for run in runs:
+        status = "completed" if run["completed"] else "pending"
+        session = run["session"] or "-"
+        lines.append(
+            f"sub-{run['subject']}\t{session}\t{status}\t{run['dwi']}"
+        )
+    pending = sum(not run["completed"] for run in runs)
+    lines.append(f"{len(runs)} runs, {pending} pending.")
+    return "\n".join(lines)
+
+
+def format_estimates(rows: list) -> str:
+    """
+    Tables of estimated runtimes (CPU hours, as if nodes ran serially) and
+    peak memory: by node, by run, by subject and for the whole cohort.
+
+    Parameters
+    ----------
+    rows : list
+        Nodes' estimates (see *DmriPrepManager.estimate*)
+
+    Returns
+    -------
+    str
+        The tables
+    """
+    from dwiprep.utils.estimation import summarize_estimates
+
+    for row in rows:
+        row["name"] = row["node"].split(".")[-1]
+        row["subject_run"] = f"sub-{row['subject']}\t{row['run']}"
+    lines = []
+    for title, key in (
+        ("node", "name"),
+        ("run", "subject_run"),
+        ("subject", "subject"),
+        ("cohort", None),
+    ):
+        summary = summarize_estimates(rows, key)
+        lines.append(f"# by {title}: nodes, CPU hours, peak memory (GB)")
+        for group, totals in sorted(
+            summary.items(), key=lambda item: -item[1]["seconds"]
+        ):
+            group = f"sub-{group}" if key == "subject" else group
+            lines.append(
+                f"{group}\t{totals['nodes']}\t"
+                f"{totals['seconds'] / 3600:.2f}\t{totals['mem_gb']:.1f}"
+            )
+    return "\n".join(lines)
+
+
+@click.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@click.version_option(__version__)
+@click.argument("bids_dir", type=click.Path(exists=True, file_okay=False))
+@click.argument("output_dir", type=click.Path(file_okay=False))
+@click.argument("analysis_level", type=click.Choice(["participant"]))
+@click.option(
+    "-p",
+    "--participant-label",
+    multiple=True,
+    help="Participant to process (without 'sub-'), repeatable. "
+    "All participants by default.",
+)
+@click.option(
+    "--dwi-identifier",
+    callback=parse_json_option,
+    help="BIDS entities identifying DWI runs (JSON or JSON file).",
+)
+@click.option(
+    "--fmap-identifier",
+    callback=parse_json_option,
+    help="BIDS entities identifying fieldmaps (JSON or JSON file).",
+)
+@click.option(
+    "--t1w-identifier",
+    callback=parse_json_option,
+    help="BIDS entities identifying T1w images (JSON or JSON file).",
+)
+@click.option(
+    "--t2w-identifier",
+    callback=parse_json_option,
+    help="BIDS entities identifying T2w images (JSON or JSON file).",
+)
+@click.option(
+    "--smriprep-kwargs",
+    callback=parse_smriprep_kwargs,
+    help="Keyword arguments of smriprep's anatomical workflow (JSON).",
+)
+@click.option(
+    "--output-spaces",
+    callback=parse_spaces_option,
+    help="Space-separated output spaces of the anatomical workflow "
+    f"(i.e, 'MNI152NLin2009cAsym:res-2 T1w'). Defaults to {DEFAULT_SPACES}.",
+)
+@click.option(
+    "--anat-derivatives",
+    type=click.Path(exists=True, file_okay=False),
+    help="Precomputed anatomical derivatives (i.e, of sMRIPrep) to reuse.",
+)
+@click.option(
+    "--dmriprep-kwargs",
+    callback=parse_json_option,
+    help="Keyword arguments of the DWI workflows (JSON).",
+)
+@click.option(
+    "--fs-subjects-dir",
+    type=click.Path(file_okay=False),
+    help="FreeSurfer's subjects directory (defaults to $SUBJECTS_DIR).",
+)
+@click.option(
+    "-w",
+    "--work-dir",
+    type=click.Path(file_okay=False),
+    help="Working (cache) directory, reused by later runs. "
+    "Defaults to 'work' next to OUTPUT_DIR.",
+)
+@click.option(
+    "--skip-bids-validation", is_flag=True, help="Skip BIDS validation."
+)
+@click.option(
+    "--no-reuse-anat",
+    is_flag=True,
+    help="Rerun anatomical processing even if its derivatives exist.",
+)
+@click.option(
+    "--plugin",
+    default="MultiProc",
+    show_default=True,
+    help="Nipype execution plugin (i.e, Linear, MultiProc, SLURM).",
+)
+@click.option(
+    "--nprocs", type=click.IntRange(min=1), help="Maximal number of processes."
+)
+@click.option(
+    "--mem-gb", type=click.FloatRange(min=0), help="Maximal memory (GB)."
+)
+@click.option(
+    "--shard",
+    callback=parse_shard,
+    help="Process a single shard of the (sorted) participants, as "
+    "INDEX/COUNT (i.e, 2/4).",
+)
+@click.option(
+    "--resume",
+    "--skip-completed",
+    "skip_completed",
+    is_flag=True,
+    help="Skip participants whose DWI runs were all processed.",
+)
+@click.option(
+    "--plan-only",
+    is_flag=True,
+    help="Print the resolved DWI runs and exit without processing.",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Build all workflows, print their estimated runtime and memory "
+    "and exit without processing.",
+)
+@click.option(
+    "--calibration",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Calibration table of nodes' costs (by default the package's).",
+)
+@click.option(
+    "--record-calibration",
+    type=click.Path(dir_okay=False),
+    help="After processing, fit a calibration table to the participants' "
+    "profiled nodes and write it to this path.",
+)
+def main(
+    bids_dir,
+    output_dir,
+    analysis_level,
+    participant_label,
+    dwi_identifier,
+    fmap_identifier,
+    t1w_identifier,
+    t2w_identifier,
+    smriprep_kwargs,
+    output_spaces,
+    anat_derivatives,
+    dmriprep_kwargs,
+    fs_subjects_dir,
+    work_dir,
+    skip_bids_validation,
+    no_reuse_anat,
+    plugin,
+    nprocs,
+    mem_gb,
+    shard,
+    skip_completed,
+    plan_only,
+    dry_run,
+    calibration,
+    record_calibration,
+):
+    """
+    Preprocesses the diffusion MRI of BIDS_DIR into OUTPUT_DIR.
+    """
+    # heavy imports only once arguments are valid
+    from dwiprep.dwiprep import DmriPrepManager
+
+    if output_spaces is not None:
+        smriprep_kwargs["spaces"] = output_spaces
+    elif smriprep_kwargs.get("spaces") is None:
+        smriprep_kwargs["spaces"] = parse_spaces(DEFAULT_SPACES)
+    if anat_derivatives is not None:
+        smriprep_kwargs["anat_derivatives"] = Path(anat_derivatives)
+    Path(output_dir).mkdir(exist_ok=True, parents=True)
+    manager = DmriPrepManager(
+        bids_dir,
+        str(Path(output_dir).absolute()),
+        dwi_identifier=dwi_identifier,
+        fmap_identifier=fmap_identifier,
+        t1w_identifier=t1w_identifier,
+        t2w_identifier=t2w_identifier,
+        smriprep_kwargs=smriprep_kwargs,
+        dmriprep_kwargs=dmriprep_kwargs,
+        participant_label=list(participant_label) or None,
+        bids_validate=not skip_bids_validation,
+        fs_subjects_dir=fs_subjects_dir,
+        work_dir=work_dir,
+        reuse_anat_derivatives=not no_reuse_anat,
+    )
+    participant_labels = select_shard(
+        manager.validate_participant_labels(), shard
+    )
+    if plan_only:
+        click.echo(format_plan(manager.plan(participant_labels)))
+        return 0
+    if calibration or dry_run or record_calibration:
+        from dwiprep.utils.estimation import load_calibration
+
+        calibration = load_calibration(calibration)
+    if dry_run:
+        rows = manager.estimate(participant_labels, calibration)
+        click.echo(format_estimates(rows))
+        return 0
+    if record_calibration:
+        from nipype import config
 
-@click.command()
-def main(args=None):
-    """Console script for dwiprep."""
-    click.echo(
-        "Replace this message by putting your code into " "dwiprep.cli.main"
+        # profile nodes' memory as well as their runtime
+        config.enable_resource_monitor()
+    plugin_args = {
+        RESOURCE_ARGS[key]: value
+        for key, value in dict(nprocs=nprocs, mem_gb=mem_gb).items()
+        if value is not None
+    }
+    manager.run(
+        participant_labels,
+        plugin=plugin,
+        plugin_args=plugin_args or None,
+        skip_completed=skip_completed,
     )
-    click.echo("See click documentation at https://click.palletsprojects.com/")
+    if record_calibration:
+        manager.record_calibration(
+            record_calibration, participant_labels, calibration
+        )
     return 0
 
 
@@ -8,9 +8,16 @@ from bids import BIDSLayout
 from smriprep.workflows.anatomical import init_anat_preproc_wf
 
 from dwiprep.utils.bids_query.bids_query import BidsQuery
+from dwiprep.utils.derivatives import collect_anat_derivatives
+from dwiprep.utils.manifest import index_subject, match_manifest
+from dwiprep.utils.output_index import OutputIndex
 from dwiprep.workflows import dmri
 from dwiprep.workflows.dmri import dmriprep
 from dwiprep.workflows.dmri.dmriprep import DmriPrep
+from dwiprep.workflows.coreg.pipelines import init_anat_prep_wf
+from dwiprep.workflows.coreg.pipelines.std_transform.configurations import (
+    STD_TEMPLATE,
+)
 from dwiprep.workflows.dmri.utils.utils import OUTPUTS
 
 
@@ -31,6 +38,22 @@ class DmriPrepManager:
     #: Expected outputs.
     OUTPUTS = OUTPUTS
 
+    #: Fields of *smriprep*'s anatomical workflow's outputnode
+    ANAT_OUTPUT_FIELDS = [
+        "t1w_preproc",
+        "t1w_mask",
+        "t1w_dseg",
+        "t1w_aseg",
+        "t1w_aparc",
+        "t1w_tpms",
+        "template",
+        "anat2std_xfm",
+        "std2anat_xfm",
+        "subjects_dir",
+        "t1w2fsnative_xfm",
+        "fsnative2t1w_xfm",
+    ]
+
     def __init__(
         self,
         bids_dir: Union[BIDSLayout, Path, str],
@@ -40,10 +63,12 @@ class DmriPrepManager:
         t1w_identifier: dict = {},
         t2w_identifier: dict = {},
         smriprep_kwargs: dict = {},
+        dmriprep_kwargs: dict = {},
         participant_label: Union[str, list] = None,
         bids_validate: bool = True,
         fs_subjects_dir: str = None,
         work_dir: str = None,
+        reuse_anat_derivatives: bool = True,
     ) -> None:
         """[summary]"""
         self.bids_query = self.init_bids_query(
@@ -56,11 +81,13 @@ class DmriPrepManager:
             bids_validate,
         )
         self.smriprep_kwargs = smriprep_kwargs
+        self.dmriprep_kwargs = dmriprep_kwargs
         self.destination = destination
         self.fs_subjects_dir = fs_subjects_dir or os.environ.get(
             "SUBJECTS_DIR"
         )
         self.work_dir = self.validate_work_dir(destination, work_dir)
+        self.reuse_anat_derivatives = reuse_anat_derivatives
 
     def init_bids_query(
         self,
@@ -121,22 +148,94 @@ class DmriPrepManager:
             else str(Path(destination).parent / "work")
         )
 
+    def collect_anat_derivatives(self, participant_label: str):
+        """
+        Detects a participant's complete anatomical derivatives under
+        *self.destination* (and FreeSurfer's reconstruction under
+        *self.fs_subjects_dir*, if *smriprep* is to run FreeSurfer).
+
+        Parameters
+        ----------
+        participant_label : str
+            Participant's label
+
+        Returns
+        -------
+        Union[dict, None]
+            Derivatives by *smriprep*'s outputnode field, or None if any
+            of them is missing
+        """
+        spaces = self.smriprep_kwargs.get("spaces")
+        templates = (
+            spaces.get_spaces(nonstandard=False, dim=(3,))
+            if spaces
+            else [STD_TEMPLATE]
+        )
+        return collect_anat_derivatives(
+            self.output_index.get_files(participant_label),
+            self.destination,
+            participant_label,
+            templates,
+            self.OUTPUT_NAME,
+            self.fs_subjects_dir,
+            bool(self.smriprep_kwargs.get("freesurfer")),
+        )
+
+    def init_existing_anatomical_wf(self, anat_derivatives: dict):
+        """
+        Initiates a stand-in for *smriprep*'s anatomical workflow, whose
+        outputnode holds existing derivatives (so it connects to the
+        diffusion workflows exactly as *smriprep*'s does).
+
+        Parameters
+        ----------
+        anat_derivatives : dict
+            Derivatives by outputnode field (see *collect_anat_derivatives*)
+
+        Returns
+        -------
+        pe.Workflow
+            A workflow named as *smriprep*'s, with a single outputnode
+        """
+        from nipype.interfaces import utility as niu
+
+        outputnode = pe.Node(
+            niu.IdentityInterface(fields=self.ANAT_OUTPUT_FIELDS),
+            name="outputnode",
+        )
+        for field, value in anat_derivatives.items():
+            if field in self.ANAT_OUTPUT_FIELDS:
+                setattr(outputnode.inputs, field, value)
+        anat_preproc_wf = pe.Workflow(name="anat_preproc_wf")
+        anat_preproc_wf.add_nodes([outputnode])
+        return anat_preproc_wf
+
     def init_anatomical_wf(self, participant_label: str):
+        if self.reuse_anat_derivatives and not self.smriprep_kwargs.get(
+            "anat_derivatives"
+        ):
+            existing_derivatives = self.collect_anat_derivatives(
+                participant_label
+            )
+            if existing_derivatives is not None:
+                return self.init_existing_anatomical_wf(existing_derivatives)
         subj_data = self.bids_query.collect_data(participant_label)
         t1w = [f.get("nifti") for f in subj_data.get("T1w")]
         t2w = [f.get("nifti") for f in subj_data.get("T2w")]
 
-        anat_derivatives = self.smriprep_kwargs.get("anat_derivatives")
-        spaces = self.smriprep_kwargs.get("spaces")
+        # the derivatives' directory is collected, not passed to smriprep
+        smriprep_kwargs = dict(self.smriprep_kwargs)
+        anat_derivatives = smriprep_kwargs.pop("anat_derivatives", None)
+        spaces = smriprep_kwargs.get("spaces")
         if anat_derivatives:
             from smriprep.utils.bids import collect_derivatives
 
             std_spaces = spaces.get_spaces(nonstandard=False, dim=(3,))
             anat_derivatives = collect_derivatives(
-                anat_derivatives.absolute(),
+                Path(anat_derivatives).absolute(),
                 participant_label,
                 std_spaces,
-                self.smriprep_kwargs.get("run_reconall"),
+                smriprep_kwargs.get("freesurfer"),
             )
 
         anat_preproc_wf = init_anat_preproc_wf(
@@ -144,7 +243,7 @@ class DmriPrepManager:
             existing_derivatives=anat_derivatives,
             output_dir=str(self.destination),
             t1w=t1w,
-            **self.smriprep_kwargs,
+            **smriprep_kwargs,
         )
         anat_preproc_wf.get_node("inputnode").inputs.subject_id = (
             "sub-" + participant_label
@@ -165,6 +264,41 @@ class DmriPrepManager:
                 ).interface.out_path_base = "dmriprep"
         return anat_preproc_wf
 
+    def init_anat_prep_wf(
+        self, subject_workflow: pe.Workflow, anat_preproc_wf: pe.Workflow
+    ) -> pe.Workflow:
+        """
+        Initiates the subject-level anatomical preparation (T1w brain and
+        WM mask), shared by all of the subject's DWI runs.
+
+        Parameters
+        ----------
+        subject_workflow : pe.Workflow
+            Subject's workflow
+        anat_preproc_wf : pe.Workflow
+            *smriprep*'s anatomical preprocessing workflow
+
+        Returns
+        -------
+        pe.Workflow
+            Anatomical preparation workflow, connected to *anat_preproc_wf*
+        """
+        anat_prep_wf = init_anat_prep_wf()
+        subject_workflow.connect(
+            [
+                (
+                    anat_preproc_wf,
+                    anat_prep_wf,
+                    [
+                        ("outputnode.t1w_preproc", "inputnode.t1w_preproc"),
+                        ("outputnode.t1w_mask", "inputnode.t1w_mask"),
+                        ("outputnode.t1w_dseg", "inputnode.t1w_dseg"),
+                    ],
+                ),
+            ]
+        )
+        return anat_prep_wf
+
     def init_subject_wf(self, participant_label: str):
         name = f"single_subject_{participant_label}_wf"
         workflow = pe.Workflow(name=name)
@@ -177,19 +311,29 @@ class DmriPrepManager:
             participant_label,
             self.destination,
             self.work_dir,
+            self.dmriprep_kwargs,
+            # FreeSurfer's parcellations are validated when building
+            freesurfer=bool(self.smriprep_kwargs.get("freesurfer")),
         )
-        dmri_wfs = dmriprep.init_workflow_per_dwi()
-
-        return dmri_wfs
+        return dmriprep.init_workflow_per_dwi()
 
     def connect_anatomical_and_diffusion(
         self,
         subject_workflow: pe.Workflow,
         dwi_preproc_wf: pe.Workflow,
         anat_preproc_wf: pe.Workflow,
+        anat_prep_wf: pe.Workflow,
     ):
         subject_workflow.connect(
             [
+                (
+                    anat_prep_wf,
+                    dwi_preproc_wf,
+                    [
+                        ("outputnode.t1w_brain", "inputnode.t1w_brain"),
+                        ("outputnode.wm_mask", "inputnode.t1w_wm_mask"),
+                    ],
+                ),
                 (
                     anat_preproc_wf,
                     dwi_preproc_wf,
@@ -218,39 +362,331 @@ class DmriPrepManager:
             ]
         )
 
-    def run(self):
-        for subject in self.participant_labels:
-            wf, name = self.init_subject_wf(subject)
-            wf_base_dir = f"{self.work_dir}/{name}"
-            wf.base_dir = wf_base_dir
-            # wf.base_dir = self.work_dir
-            anatomical_wf = self.init_anatomical_wf(subject)
-            # anatomical_wf.base_dir = wf_base_dir
-            sessions = self.bids_query.get_sessions(subject)
-            sessions_wfs = []
-            sessions_data = (
-                [
-                    self.bids_query.collect_data(subject, session)
-                    for session in sessions
-                ]
-                if sessions
-                else [self.bids_query.collect_data(subject)]
+    def validate_participant_labels(
+        self, participant_labels: Iterable[str] = None
+    ) -> list:
+        """
+        Lists participants to process.
+
+        Parameters
+        ----------
+        participant_labels : Iterable[str], optional
+            Participants' labels, by default *self.participant_labels*
+
+        Returns
+        -------
+        list
+            Participants' labels
+        """
+        if participant_labels is None:
+            participant_labels = self.participant_labels
+        if isinstance(participant_labels, str):
+            return [participant_labels]
+        return list(participant_labels)
+
+    def collect_sessions_data(self, participant_label: str) -> list:
+        """
+        Collects the data of each of a participant's sessions.
+
+        Parameters
+        ----------
+        participant_label : str
+            Participant's label
+
+        Returns
+        -------
+        list
+            Sessions' data (a single item for datasets without sessions)
+        """
+        sessions = self.bids_query.get_sessions(participant_label)
+        if sessions:
+            return [
+                self.bids_query.collect_data(participant_label, session)
+                for session in sessions
+            ]
+        return [self.bids_query.collect_data(participant_label)]
+
+    def build_subject_wf(self, participant_label: str) -> pe.Workflow:
+        """
+        Builds a participant's workflow (anatomical processing, shared by
+        all of the participant's DWI runs), without running it.
+
+        Parameters
+        ----------
+        participant_label : str
+            Participant's label
+
+        Returns
+        -------
+        pe.Workflow
+            The participant's workflow
+        """
+        wf, name = self.init_subject_wf(participant_label)
+        wf.base_dir = f"{self.work_dir}/{name}"
+        anatomical_wf = self.init_anatomical_wf(participant_label)
+        anat_prep_wf = self.init_anat_prep_wf(wf, anatomical_wf)
+        sessions_wfs, fieldmap_connections = [], []
+        for session_data in self.collect_sessions_data(participant_label):
+            dmri_wfs, connections = self.preprocess_session(
+                session_data,
+                participant_label,
             )
-            for session_data in sessions_data:
-                # wf, name = self.init_subject_wf(subject)
-                # wf.base_dir = self.work_dir
-                # anatomical_wf = self.init_anatomical_wf(subject)
-                sessions_wfs += self.preprocess_session(
-                    session_data,
-                    subject,
-                )
-            for dmriprep_wf in sessions_wfs:
-                # dmriprep_wf.base_dir = wf_base_dir
-                self.connect_anatomical_and_diffusion(
-                    wf, dmriprep_wf, anatomical_wf
-                )
+            sessions_wfs += dmri_wfs
+            fieldmap_connections += connections
+        for dmriprep_wf in sessions_wfs:
+            self.connect_anatomical_and_diffusion(
+                wf, dmriprep_wf, anatomical_wf, anat_prep_wf
+            )
+        # fieldmaps shared by several runs are prepared once
+        wf.connect(fieldmap_connections)
+        return wf
+
+    def is_run_completed(self, participant_label: str, dwi_file: str):
+        """
+        Whether a DWI run's final (coregistered) series was already stored.
+
+        Parameters
+        ----------
+        participant_label : str
+            Participant's label
+        dwi_file : str
+            The run's DWI NIfTI file
+
+        Returns
+        -------
+        bool
+            Whether the run's derivative exists
+        """
+        prefix = Path(dwi_file).name.split(".")[0].rpartition("_dwi")[0]
+        return any(
+            Path(f).name.startswith(f"{prefix}_")
+            for f in self.output_index.find(
+                "coreg_preproc_dwi_nii", participant_label
+            )
+        )
+
+    def plan(self, participant_labels: Iterable[str] = None) -> list:
+        """
+        Resolves the DWI runs to be processed, without building workflows.
+
+        Parameters
+        ----------
+        participant_labels : Iterable[str], optional
+            Participants to plan, by default *self.participant_labels*
+
+        Returns
+        -------
+        list
+            A dictionary per run, with its "subject", "session", "dwi" file
+            and whether it is "completed"
+        """
+        participant_labels = self.validate_participant_labels(
+            participant_labels
+        )
+        runs = []
+        for subject in participant_labels:
+            for session_data in self.collect_sessions_data(subject):
+                for dwi_data in session_data.get("dwi") or []:
+                    dwi_file = dwi_data.get("nifti")
+                    sessions = [
+                        part
+                        for part in Path(dwi_file).name.split("_")
+                        if part.startswith("ses-")
+                    ]
+                    runs.append(
+                        dict(
+                            subject=subject,
+                            session=sessions[0] if sessions else None,
+                            dwi=str(dwi_file),
+                            completed=self.is_run_completed(
+                                subject, dwi_file
+                            ),
+                        )
+                    )
+        return runs
+
+    def is_completed(self, participant_label: str) -> bool:
+        """
+        Whether all of a participant's DWI runs were already processed.
+
+        Parameters
+        ----------
+        participant_label : str
+            Participant's label
+
+        Returns
+        -------
+        bool
+            Whether the participant has runs, all of them completed
+        """
+        runs = self.plan([participant_label])
+        return bool(runs) and all(run["completed"] for run in runs)
+
+    def run(
+        self,
+        participant_labels: Iterable[str] = None,
+        plugin: str = None,
+        plugin_args: dict = None,
+        skip_completed: bool = False,
+    ):
+        """
+        Builds and runs participants' workflows, one participant at a time.
+
+        Parameters
+        ----------
+        participant_labels : Iterable[str], optional
+            Participants to process, by default *self.participant_labels*
+        plugin : str, optional
+            Nipype's execution plugin (i.e, "MultiProc"), by default
+            nipype's default (serial execution)
+        plugin_args : dict, optional
+            The plugin's arguments (i.e, ``n_procs`` and ``memory_gb``)
+        skip_completed : bool, optional
+            Whether to skip participants whose runs were all processed,
+            by default False
+        """
+        participant_labels = self.validate_participant_labels(
+            participant_labels
+        )
+        for subject in participant_labels:
+            if skip_completed and self.is_completed(subject):
+                continue
+            wf = self.build_subject_wf(subject)
             wf.write_graph(graph2use="colored")
-            wf.run()
+            try:
+                wf.run(plugin=plugin, plugin_args=plugin_args)
+            finally:
+                # smriprep's sinks do not record their outputs, and a failed
+                # run may leave some of them behind
+                index_subject(self.destination, subject)
+                self.output_index.invalidate(subject)
+
+    def get_run_sizes(self, participant_label: str) -> tuple:
+        """
+        Sizes (voxels times volumes) of a participant's runs, by the names
+        of their top-level workflows, for cost estimation.
+
+        Parameters
+        ----------
+        participant_label : str
+            Participant's label
+
+        Returns
+        -------
+        tuple
+            Sizes of the DWI runs' and anatomical workflows, and the size
+            of other (shared) workflows: the largest DWI run's
+        """
+        from dwiprep.utils.estimation import image_mvox
+        from dwiprep.workflows.dmri.base import _get_wf_name
+
+        sizes = {
+            _get_wf_name(run["dwi"]): image_mvox(run["dwi"])
+            for run in self.plan([participant_label])
+        }
+        t1w = self.bids_query.collect_data(participant_label).get("T1w")
+        if t1w:
+            t1w_mvox = image_mvox(t1w[0].get("nifti"))
+            sizes.update(anat_preproc_wf=t1w_mvox, anat_prep_wf=t1w_mvox)
+        dwi_sizes = [
+            mvox for name, mvox in sizes.items() if not name.startswith("anat")
+        ]
+        return sizes, max(dwi_sizes, default=0.0)
+
+    def estimate(
+        self,
+        participant_labels: Iterable[str] = None,
+        calibration: dict = None,
+    ) -> list:
+        """
+        Builds participants' workflows (without running them) and estimates
+        each of their nodes' runtime and memory.
+
+        Parameters
+        ----------
+        participant_labels : Iterable[str], optional
+            Participants to estimate, by default *self.participant_labels*
+        calibration : dict, optional
+            Calibration table, by default the package's (see
+            *dwiprep.utils.estimation*)
+
+        Returns
+        -------
+        list
+            A row per node (see *estimate_nodes*), with its "subject"
+        """
+        from dwiprep.utils.estimation import estimate_nodes, load_calibration
+
+        calibration = calibration or load_calibration()
+        rows = []
+        for subject in self.validate_participant_labels(participant_labels):
+            wf = self.build_subject_wf(subject)
+            sizes, default_mvox = self.get_run_sizes(subject)
+            for row in estimate_nodes(
+                wf.list_node_names(), sizes, default_mvox, calibration
+            ):
+                row["subject"] = subject
+                rows.append(row)
+        return rows
+
+    def record_calibration(
+        self,
+        out_file: Union[Path, str],
+        participant_labels: Iterable[str] = None,
+        calibration: dict = None,
+    ) -> dict:
+        """
+        Fits a calibration table to the profiles (runtime and, if nipype's
+        resource monitor was enabled, memory) of participants' processed
+        workflows in *self.work_dir*.
+
+        Parameters
+        ----------
+        out_file : Union[Path, str]
+            Path to write the fitted table to
+        participant_labels : Iterable[str], optional
+            Profiled participants, by default *self.participant_labels*
+        calibration : dict, optional
+            Table to update, by default the package's
+
+        Returns
+        -------
+        dict
+            The fitted table
+        """
+        import json
+
+        from dwiprep.utils.estimation import calibrate, collect_profiles
+
+        profiles = []
+        for subject in self.validate_participant_labels(participant_labels):
+            _, name = self.init_subject_wf(subject)
+            sizes, default_mvox = self.get_run_sizes(subject)
+            profiles += collect_profiles(
+                Path(self.work_dir) / name / name, sizes, default_mvox
+            )
+        calibration = calibrate(profiles, calibration)
+        Path(out_file).write_text(json.dumps(calibration, indent=4))
+        return calibration
+
+    @property
+    def output_index(self) -> OutputIndex:
+        """
+        Cached index of the outputs under *self.destination*.
+
+        Returns
+        -------
+        OutputIndex
+            Locates *self.OUTPUTS* without walking the tree for each lookup
+        """
+        if getattr(self, "_output_index", None) is None:
+            self._output_index = OutputIndex(
+                self.destination,
+                self.OUTPUTS,
+                self.SMRIPREP_OUTPUT_PATTERN,
+                self.FS_OUTPUT_PATTERN,
+            )
+        return self._output_index
 
     def generate_fs_outputs(
         self, main_dir: str, subject_id: str, output_id: str
@@ -273,7 +709,11 @@ class DmriPrepManager:
         pattern = self.FS_OUTPUT_PATTERN.format(
             main_dir=main_dir, subject_id=subject_id, output_id=output_id
         )
-        return Path(self.destination).absolute().rglob(pattern)
+        return match_manifest(
+            self.output_index.get_files(subject_id),
+            pattern,
+            self.output_index.destination,
+        )
 
     def generate_smriprep_outputs(
         self,
@@ -311,8 +751,11 @@ class DmriPrepManager:
             session_id=session_id,
             output_id=output_id,
         )
-
-        return Path(self.destination).absolute().rglob(pattern)
+        return match_manifest(
+            self.output_index.get_files(subject_id),
+            pattern,
+            self.output_index.destination,
+        )
 
     def find_output(
         self, partial_output: str, subject_id: str, session_id: str
@@ -330,25 +773,7 @@ class DmriPrepManager:
         session_id : str
             Session string ID
         """
-        main_dir, sub_dir, output_id = self.OUTPUTS.get(partial_output)
-        if main_dir == "freesurfer":
-            outputs = list(
-                self.generate_fs_outputs(main_dir, subject_id, output_id)
-            )
-        elif main_dir == "dmriprep":
-            outputs = list(
-                self.generate_smriprep_outputs(
-                    main_dir, sub_dir, subject_id, session_id, output_id
-                )
-            )
-        # if len(outputs) == 1:
-        #     return str(outputs[0])
-        # elif len(outputs) > 1:
-        if ("native" in partial_output) and (
-            "transform" not in partial_output
-        ):
-            return [str(f) for f in outputs if ("MNI" not in f.name)]
-        return [str(f) for f in outputs]
+        return self.output_index.find(partial_output, subject_id, session_id)
 
     def generate_output_dict(self) -> dict:
         """
@@ -365,18 +790,88 @@ class DmriPrepManager:
             subject_ids if isinstance(subject_ids, list) else [subject_ids]
         )
         for subject_id in subject_ids:
-            output_dict[subject_id] = {}
-            # session_pattern = self.SESSION_PATTERN.format(
-            #     subject_id=subject_id
-            # )
-            for key in self.OUTPUTS:
-                output_dict[subject_id][key] = self.find_output(
-                    key, subject_id, "*"
-                )
+            output_dict[subject_id] = self.output_index.get_outputs(
+                subject_id
+            )
         if len(output_dict) == 1:
             return output_dict.get(subject_id)
         return output_dict
 
+    def export_cohort(
+        self,
+        path: Union[Path, str],
+        space: str = "std",
+        metrics: Iterable[str] = None,
+    ) -> Path:
+        """
+        Packs the participants' tensor metrics into a cohort store (see
+        *dwiprep.utils.cohort*), appending to it if it exists.
+
+        Parameters
+        ----------
+        path : Union[Path, str]
+            Path to the store (``.h5``)
+        space : str, optional
+            "native", "coreg" or "std", by default "std" (requires
+            ``std_space_output`` in *dmriprep_kwargs*)
+        metrics : Iterable[str], optional
+            Metrics to export, by default all
+
+        Returns
+        -------
+        Path
+            Path to the store
+
+        Raises
+        ------
+        FileNotFoundError
+            If no participant has tensor metrics in *space*
+        """
+        from dwiprep.utils.cohort import export_cohort
+
+        subject_ids = self.participant_labels
+        subject_ids = (
+            subject_ids if isinstance(subject_ids, list) else [subject_ids]
+        )
+        return export_cohort(
+            path, self.output_index, subject_ids, space, metrics
+        )
+
+    def aggregate_parcellation_stats(
+        self, out_file: Union[Path, str] = None
+    ):
+        """
+        Concatenates the participants' region-wise statistics (see
+        *dwiprep.utils.parcellation*) into a single table.
+
+        Parameters
+        ----------
+        out_file : Union[Path, str], optional
+            Path to also write the table to (TSV), by default None
+
+        Returns
+        -------
+        pd.DataFrame
+            A row per subject, session, run, region and metric
+        """
+        from dwiprep.utils.parcellation import aggregate_statistics
+
+        subject_ids = self.participant_labels
+        subject_ids = (
+            subject_ids if isinstance(subject_ids, list) else [subject_ids]
+        )
+        table = aggregate_statistics(
+            {
+                subject_id: self.output_index.find(
+                    "coreg_parcellation_stats", subject_id
+                )
+                for subject_id in subject_ids
+            }
+        )
+        if out_file is not None:
+            table.to_csv(out_file, sep="\t", index=False, na_rep="n/a")
+        return table
+
     @property
     def participant_labels(self) -> list:
         """
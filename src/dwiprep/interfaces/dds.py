@@ -1,12 +1,13 @@
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from json import dumps, loads
 from pathlib import Path
+from typing import Tuple
 from pkg_resources import resource_filename as _pkgres
 import re
 import nibabel as nb
 import numpy as np
 
-from nipype.interfaces.base import SimpleInterface, traits
 from nipype.interfaces.base import (
     traits,
     isdefined,
@@ -31,6 +32,21 @@ from niworkflows.utils.images import (
 )
 from templateflow.api import templates as _get_template_list
 
+from dwiprep.utils.files import (
+    COPY_MODES,
+    fingerprint,
+    place_file,
+    read_record,
+    same_fingerprint,
+    write_record,
+)
+from dwiprep.utils.images import (
+    compress,
+    patch_nifti_header,
+    write_coerced_nifti,
+)
+from dwiprep.utils.manifest import append_manifest
+
 regz = re.compile(r"\.gz$")
 
 _pybids_spec = loads(
@@ -58,6 +74,446 @@ DEFAULT_DTYPES = defaultdict(
 )
 
 
+def build_derivative_paths(
+    in_file: list,
+    source_file: list,
+    entities: dict,
+    dismiss_entities: list = None,
+    compress: list = None,
+) -> tuple:
+    """
+    Resolves the BIDS-Derivatives paths (relative to the output folder) of
+    *in_file*, given the entities of their *source_file*.
+
+    Parameters
+    ----------
+    in_file : list
+        Files to be saved
+    source_file : list
+        Source file(s) to extract entities from (only common entities are
+        propagated)
+    entities : dict
+        Entities overriding those of the source file(s)
+    dismiss_entities : list, optional
+        Entities that will not be propagated from the source file(s)
+    compress : list, optional
+        Whether each file should be compressed (True), uncompressed (False)
+        or left unmodified (None, default)
+
+    Returns
+    -------
+    tuple
+        Relative destination paths (one per *in_file*) and the entities
+        they were built from
+    """
+    from bids.layout import parse_file_entities
+    from bids.layout.writing import build_path
+    from bids.utils import listify
+
+    in_entities = [
+        parse_file_entities(str(relative_to_root(source)))
+        for source in listify(source_file)
+    ]
+    out_entities = {
+        k: v
+        for k, v in in_entities[0].items()
+        if all(ent.get(k) == v for ent in in_entities[1:])
+    }
+    for drop_entity in listify(dismiss_entities or []):
+        out_entities.pop(drop_entity, None)
+
+    # Override extension with that of the input file(s)
+    out_entities["extension"] = [
+        # _splitext does not accept .surf.gii (for instance)
+        "".join(Path(orig_file).suffixes).lstrip(".")
+        for orig_file in in_file
+    ]
+
+    compress = listify(compress) or [None]
+    if len(compress) == 1:
+        compress = compress * len(in_file)
+    for i, ext in enumerate(out_entities["extension"]):
+        if compress[i] is not None:
+            ext = regz.sub("", ext)
+            out_entities["extension"][i] = f"{ext}.gz" if compress[i] else ext
+
+    # Override entities with those set as inputs
+    out_entities.update(entities)
+
+    # Clean up native resolution with space
+    if out_entities.get("resolution") == "native" and out_entities.get(
+        "space"
+    ):
+        out_entities.pop("resolution", None)
+
+    if len(set(out_entities["extension"])) == 1:
+        out_entities["extension"] = out_entities["extension"][0]
+
+    # Insert custom (non-BIDS) entities from allowed_entities.
+    custom_entities = set(out_entities.keys()) - set(BIDS_DERIV_ENTITIES)
+    patterns = BIDS_DERIV_PATTERNS
+    if custom_entities:
+        # Example: f"{key}-{{{key}}}" -> "task-{task}"
+        custom_pat = "_".join(
+            f"{key}-{{{key}}}" for key in sorted(custom_entities)
+        )
+        patterns = [
+            pat.replace("_{suffix", "_".join(("", custom_pat, "{suffix")))
+            for pat in patterns
+        ]
+
+    dest_files = build_path(out_entities, path_patterns=patterns)
+    if not dest_files:
+        raise ValueError(f"Could not build path with entities {out_entities}.")
+
+    # Make sure the interpolated values is embedded in a list, and check
+    dest_files = listify(dest_files)
+    if len(in_file) != len(dest_files):
+        raise ValueError(
+            f"Input files ({len(in_file)}) not matched "
+            f"by interpolated patterns ({len(dest_files)})."
+        )
+    return dest_files, out_entities
+
+
+def write_derivative(
+    orig_file: str,
+    out_file: Path,
+    check_hdr: bool = True,
+    data_dtype: str = None,
+    suffix: str = None,
+    space: str = None,
+    source_file: str = None,
+    copy_mode: str = "reflink",
+    chunk_mb: int = 64,
+) -> bool:
+    """
+    Writes a single derivative, fixing NIfTI headers and coercing data types
+    where needed (data are coerced slab by slab, bounding memory use to
+    *chunk_mb*). Otherwise, files that keep their compression are
+    reflinked, hardlinked or copied (starting at *copy_mode*), and others
+    are (de)compressed into place. Header-only fixes are patched into the
+    placed file without rewriting its voxel data.
+
+    Parameters
+    ----------
+    orig_file : str
+        File to be saved
+    out_file : Path
+        Destination path
+    check_hdr : bool, optional
+        Whether to fix headers of NIfTI outputs, by default True
+    data_dtype : str, optional
+        NumPy datatype to coerce NIfTI data to, or "source" to match
+        *source_file*'s datatype
+    suffix : str, optional
+        Output's BIDS suffix (time units are set for "bold")
+    space : str, optional
+        Output's space (sets the qform/sform codes)
+    source_file : str, optional
+        Source file, for ``data_dtype="source"``
+    copy_mode : str, optional
+        Cheapest placement of unmodified files: "reflink", "hardlink" or
+        "copy", by default "reflink"
+    chunk_mb : int, optional
+        Size of the slabs streamed when coercing data types, by default 64
+
+    Returns
+    -------
+    bool
+        Whether the derivative's header was fixed
+    """
+    out_file = Path(out_file)
+    out_file.parent.mkdir(exist_ok=True, parents=True)
+    fixed_hdr = False
+
+    # Set header iff changes need to be made. If it is still None when
+    # it's time to write, just copy.
+    new_header, coerce_dtype = None, False
+
+    is_nifti = out_file.name.endswith(
+        (".nii", ".nii.gz")
+    ) and not out_file.name.endswith((".dtseries.nii", ".dtseries.nii.gz"))
+    if is_nifti and any((check_hdr, data_dtype)):
+        nii = nb.load(orig_file)
+        if check_hdr:
+            new_header = fix_derivative_header(nii, suffix, space)
+            fixed_hdr = new_header is not None
+        data_dtype = resolve_data_dtype(nii, data_dtype, source_file)
+        if data_dtype is not None:
+            LOGGER.warning(
+                f"Changing {out_file} dtype from {nii.get_data_dtype()} "
+                f"to {data_dtype}"
+            )
+            # data are coerced slab by slab when written;
+            # set header to match
+            coerce_dtype = True
+            if new_header is None:
+                new_header = nii.header.copy()
+            new_header.set_data_dtype(data_dtype)
+        del nii
+
+    place_derivative(
+        orig_file,
+        out_file,
+        new_header,
+        coerce_dtype=coerce_dtype,
+        is_nifti=is_nifti,
+        copy_mode=copy_mode,
+        chunk_mb=chunk_mb,
+    )
+    return fixed_hdr
+
+
+def fix_derivative_header(
+    nii: nb.Nifti1Image, suffix: str = None, space: str = None
+) -> nb.Nifti1Header:
+    """
+    Fixes a derivative's units and qform/sform codes.
+
+    Parameters
+    ----------
+    nii : nb.Nifti1Image
+        The derivative's image
+    suffix : str, optional
+        Output's BIDS suffix (time units are set for "bold")
+    space : str, optional
+        Output's space (sets the qform/sform codes)
+
+    Returns
+    -------
+    nb.Nifti1Header
+        A fixed copy of the image's header, or None if it needs no fixing
+    """
+    hdr = nii.header
+    curr_units = tuple(
+        [None if u == "unknown" else u for u in hdr.get_xyzt_units()]
+    )
+    curr_codes = (
+        int(hdr["qform_code"]),
+        int(hdr["sform_code"]),
+    )
+
+    # Default to mm, use sec if data type is bold
+    units = (
+        curr_units[0] or "mm",
+        "sec" if suffix == "bold" else None,
+    )
+    xcodes = (1, 1)  # Derivative in its original scanner space
+    if space:
+        xcodes = (4, 4) if space in STANDARD_SPACES else (2, 2)
+
+    if curr_codes == xcodes and curr_units == units:
+        return None
+    new_header = hdr.copy()
+    new_header.set_qform(nii.affine, xcodes[0])
+    new_header.set_sform(nii.affine, xcodes[1])
+    new_header.set_xyzt_units(*units)
+    return new_header
+
+
+def resolve_data_dtype(
+    nii: nb.Nifti1Image, data_dtype: str = None, source_file: str = None
+) -> np.dtype:
+    """
+    Resolves the datatype a derivative's data should be coerced to.
+
+    Parameters
+    ----------
+    nii : nb.Nifti1Image
+        The derivative's image
+    data_dtype : str, optional
+        NumPy datatype, or "source" to match *source_file*'s datatype
+    source_file : str, optional
+        Source file, for ``data_dtype="source"``
+
+    Returns
+    -------
+    np.dtype
+        The datatype, or None if the data keep their own
+    """
+    if data_dtype == "source":  # match source dtype
+        try:
+            data_dtype = nb.load(source_file).get_data_dtype()
+        except Exception:
+            LOGGER.warning(f"Could not get data type of file {source_file}")
+            data_dtype = None
+    if not data_dtype:
+        return None
+    data_dtype = np.dtype(data_dtype)
+    return None if nii.get_data_dtype() == data_dtype else data_dtype
+
+
+def place_derivative(
+    orig_file: str,
+    out_file: Path,
+    new_header: nb.Nifti1Header = None,
+    coerce_dtype: bool = False,
+    is_nifti: bool = True,
+    copy_mode: str = "reflink",
+    chunk_mb: int = 64,
+):
+    """
+    Writes a derivative with its (optionally) fixed header: header-only
+    fixes are patched into a placed copy, unmodified files are placed (see
+    *place_file*) or (de)compressed into place, and others are rewritten.
+
+    Parameters
+    ----------
+    orig_file : str
+        File to be saved
+    out_file : Path
+        Destination path
+    new_header : nb.Nifti1Header, optional
+        Fixed header, by default None (the file is kept as is)
+    coerce_dtype : bool, optional
+        Whether *new_header*'s datatype differs from the data's, by default
+        False
+    is_nifti : bool, optional
+        Whether the derivative is a NIfTI image, by default True
+    copy_mode : str, optional
+        Cheapest placement of unmodified files, by default "reflink"
+    chunk_mb : int, optional
+        Size of the slabs streamed when coercing data types, by default 64
+    """
+    out_gz = out_file.name.endswith(".gz")
+    same_compression = str(orig_file).endswith(".gz") == out_gz
+    if new_header is not None and not coerce_dtype and same_compression:
+        # only the header changes: patch a placed copy rather than
+        # re-reading (and re-compressing) the voxel data
+        method = place_file(orig_file, out_file, copy_mode, writable=True)
+        if patch_nifti_header(out_file, new_header):
+            LOGGER.debug(f"Stored {out_file} ({method}, patched header)")
+            return
+        out_file.unlink()
+
+    if new_header is None:
+        if same_compression:
+            method = place_file(orig_file, out_file, copy_mode)
+            LOGGER.debug(f"Stored {out_file} ({method})")
+        elif is_nifti and out_gz:
+            # header and data as separate gzip members (cheap to patch)
+            compress(orig_file, out_file)
+        else:
+            _copy_any(orig_file, str(out_file))
+    elif coerce_dtype:
+        write_coerced_nifti(orig_file, out_file, new_header, chunk_mb)
+    else:
+        orig_img = nb.load(orig_file)
+        set_consumables(new_header, orig_img.dataobj)
+        unsafe_write_nifti_header_and_data(
+            fname=out_file,
+            header=new_header,
+            data=orig_img.dataobj.get_unscaled(),
+        )
+        del orig_img
+
+
+#: Statuses reported by sinks for each of their outputs
+WRITE_STATUSES = ["wrote", "fixed_hdr", "skipped"]
+
+
+def store_derivative(
+    orig_file: str,
+    out_file: Path,
+    skip_unchanged: bool = True,
+    fast_hash: bool = False,
+    **kwargs,
+) -> Tuple[str, bool]:
+    """
+    Writes a single derivative (see *write_derivative*), unless the record
+    of its last write shows that neither its source, the write options nor
+    the target itself have changed since.
+
+    Parameters
+    ----------
+    orig_file : str
+        File to be saved
+    out_file : Path
+        Destination path
+    skip_unchanged : bool, optional
+        Whether to skip unchanged derivatives, by default True
+    fast_hash : bool, optional
+        Whether to fingerprint sources by a hash of their ends (rather than
+        their modification time), by default False
+    **kwargs
+        Passed to *write_derivative*
+
+    Returns
+    -------
+    Tuple[str, bool]
+        The write's status (one of ``WRITE_STATUSES``) and whether the
+        derivative's header was fixed (by this or the recorded write)
+    """
+    out_file = Path(out_file)
+    options = {
+        key: str(value) if value is not None else None
+        for key, value in kwargs.items()
+        if key not in ("copy_mode", "chunk_mb")
+    }
+    source = fingerprint(orig_file, fast_hash)
+    record = read_record(out_file) if skip_unchanged else None
+    if (
+        record
+        and out_file.exists()
+        and record.get("options") == options
+        and same_fingerprint(record.get("source"), source)
+        and same_fingerprint(record.get("target"), fingerprint(out_file))
+    ):
+        LOGGER.debug(f"Skipped unchanged {out_file}")
+        return "skipped", bool(record.get("fixed_hdr"))
+    fixed_hdr = write_derivative(orig_file, out_file, **kwargs)
+    write_record(
+        out_file, dict(source=source, options=options, fixed_hdr=fixed_hdr)
+    )
+    return ("fixed_hdr" if fixed_hdr else "wrote"), fixed_hdr
+
+
+def write_sidecar(out_file: Path, metadata: dict) -> str:
+    """
+    Writes a derivative's metadata to its JSON sidecar.
+
+    Parameters
+    ----------
+    out_file : Path
+        Derivative's path
+    metadata : dict
+        Metadata to store
+
+    Returns
+    -------
+    str
+        Path to the sidecar
+    """
+    out_file = Path(out_file)
+    # 1.3.x hack
+    # For dtseries, we have been generating weird non-BIDS JSON files.
+    # We can safely keep producing them to avoid breaking derivatives, but
+    # only the existing keys should keep going into them.
+    if out_file.name.endswith(".dtseries.nii"):
+        legacy_metadata = {}
+        for key in (
+            "grayordinates",
+            "space",
+            "surface",
+            "surface_density",
+            "volume",
+        ):
+            if key in metadata:
+                legacy_metadata[key] = metadata.pop(key)
+        if legacy_metadata:
+            sidecar = out_file.parent / f"{_splitext(str(out_file))[0]}.json"
+            sidecar.write_text(
+                dumps(legacy_metadata, sort_keys=True, indent=2)
+            )
+    # The future: the extension is the first . and everything after
+    sidecar = out_file.parent / f"{out_file.name.split('.', 1)[0]}.json"
+    content = dumps(metadata, sort_keys=True, indent=2)
+    if not sidecar.exists() or sidecar.read_text() != content:
+        sidecar.write_text(content)
+    return str(sidecar)
+
+
 class _DerivativesDataSinkInputSpec(
     DynamicTraitedSpec, BaseInterfaceInputSpec
 ):
@@ -77,11 +533,29 @@ class _DerivativesDataSinkInputSpec(
         desc="NumPy datatype to coerce NIfTI data to, or `source` to"
         "match the input file dtype"
     )
+    copy_mode = traits.Enum(
+        *COPY_MODES,
+        usedefault=True,
+        desc="cheapest placement of files that need no changes (falling "
+        "back to hardlinks, then copies)",
+    )
     dismiss_entities = InputMultiObject(
         traits.Either(None, Str),
         usedefault=True,
         desc="a list entities that will not be propagated from the source file",
     )
+    skip_unchanged = traits.Bool(
+        True,
+        usedefault=True,
+        desc="skip outputs whose source, options and target are unchanged "
+        "since their recorded write",
+    )
+    fast_hash = traits.Bool(
+        False,
+        usedefault=True,
+        desc="fingerprint sources by a hash of their ends, rather than "
+        "their modification time",
+    )
     in_file = InputMultiObject(
         File(exists=True), mandatory=True, desc="the object to be saved"
     )
@@ -108,6 +582,11 @@ class _DerivativesDataSinkOutputSpec(TraitedSpec):
     fixed_hdr = traits.List(
         traits.Bool, desc="whether derivative header was fixed"
     )
+    status = traits.List(
+        traits.Enum(*WRITE_STATUSES),
+        desc="whether each output was written, skipped (unchanged) or "
+        "written with a fixed header",
+    )
 
 
 class DerivativesDataSink(SimpleInterface):
@@ -304,8 +783,6 @@ space-MNI152NLin6Asym_desc-preproc_bold.json'
             setattr(self.inputs, k, inputs[k])
 
     def _run_interface(self, runtime):
-        from bids.layout import parse_file_entities
-        from bids.layout.writing import build_path
         from bids.utils import listify
 
         # Ready the output folder
@@ -326,183 +803,48 @@ space-MNI152NLin6Asym_desc-preproc_bold.json'
             meta.update(self._metadata)
             self._metadata = meta
 
-        # Initialize entities with those from the source file.
-        in_entities = [
-            parse_file_entities(str(relative_to_root(source_file)))
-            for source_file in self.inputs.source_file
-        ]
-        out_entities = {
-            k: v
-            for k, v in in_entities[0].items()
-            if all(ent.get(k) == v for ent in in_entities[1:])
-        }
-        for drop_entity in listify(self.inputs.dismiss_entities or []):
-            out_entities.pop(drop_entity, None)
-
-        # Override extension with that of the input file(s)
-        out_entities["extension"] = [
-            # _splitext does not accept .surf.gii (for instance)
-            "".join(Path(orig_file).suffixes).lstrip(".")
-            for orig_file in in_file
-        ]
-
-        compress = listify(self.inputs.compress) or [None]
-        if len(compress) == 1:
-            compress = compress * len(in_file)
-        for i, ext in enumerate(out_entities["extension"]):
-            if compress[i] is not None:
-                ext = regz.sub("", ext)
-                out_entities["extension"][i] = (
-                    f"{ext}.gz" if compress[i] else ext
-                )
-
-        # Override entities with those set as inputs
+        # Entities set as inputs
+        entities = {}
         for key in self._allowed_entities:
             value = getattr(self.inputs, key)
             if value is not None and isdefined(value):
-                out_entities[key] = value
-
-        # Clean up native resolution with space
-        if out_entities.get("resolution") == "native" and out_entities.get(
-            "space"
-        ):
-            out_entities.pop("resolution", None)
-
-        if len(set(out_entities["extension"])) == 1:
-            out_entities["extension"] = out_entities["extension"][0]
-
-        # Insert custom (non-BIDS) entities from allowed_entities.
-        custom_entities = set(out_entities.keys()) - set(BIDS_DERIV_ENTITIES)
-        patterns = BIDS_DERIV_PATTERNS
-        if custom_entities:
-            # Example: f"{key}-{{{key}}}" -> "task-{task}"
-            custom_pat = "_".join(
-                f"{key}-{{{key}}}" for key in sorted(custom_entities)
-            )
-            patterns = [
-                pat.replace("_{suffix", "_".join(("", custom_pat, "{suffix")))
-                for pat in patterns
-            ]
+                entities[key] = value
+        dest_files, out_entities = build_derivative_paths(
+            in_file,
+            self.inputs.source_file,
+            entities,
+            self.inputs.dismiss_entities,
+            self.inputs.compress,
+        )
 
         # Prepare SimpleInterface outputs object
         self._results["out_file"] = []
         self._results["compression"] = []
         self._results["fixed_hdr"] = [False] * len(in_file)
+        self._results["status"] = [None] * len(in_file)
 
-        dest_files = build_path(out_entities, path_patterns=patterns)
-        if not dest_files:
-            raise ValueError(
-                f"Could not build path with entities {out_entities}."
-            )
-
-        # Make sure the interpolated values is embedded in a list, and check
-        dest_files = listify(dest_files)
-        if len(in_file) != len(dest_files):
-            raise ValueError(
-                f"Input files ({len(in_file)}) not matched "
-                f"by interpolated patterns ({len(dest_files)})."
-            )
-
+        data_dtype = (
+            self.inputs.data_dtype or DEFAULT_DTYPES[self.inputs.suffix]
+        )
         for i, (orig_file, dest_file) in enumerate(zip(in_file, dest_files)):
             out_file = out_path / dest_file
-            out_file.parent.mkdir(exist_ok=True, parents=True)
             self._results["out_file"].append(str(out_file))
             self._results["compression"].append(str(dest_file).endswith(".gz"))
-
-            # Set data and header iff changes need to be made. If these are
-            # still None when it's time to write, just copy.
-            new_data, new_header = None, None
-
-            is_nifti = out_file.name.endswith(
-                (".nii", ".nii.gz")
-            ) and not out_file.name.endswith(
-                (".dtseries.nii", ".dtseries.nii.gz")
+            (
+                self._results["status"][i],
+                self._results["fixed_hdr"][i],
+            ) = store_derivative(
+                orig_file,
+                out_file,
+                skip_unchanged=self.inputs.skip_unchanged,
+                fast_hash=self.inputs.fast_hash,
+                check_hdr=self.inputs.check_hdr,
+                data_dtype=data_dtype,
+                suffix=out_entities["suffix"],
+                space=self.inputs.space,
+                source_file=self.inputs.source_file[0],
+                copy_mode=self.inputs.copy_mode,
             )
-            data_dtype = (
-                self.inputs.data_dtype or DEFAULT_DTYPES[self.inputs.suffix]
-            )
-            if is_nifti and any((self.inputs.check_hdr, data_dtype)):
-                nii = nb.load(orig_file)
-
-                if self.inputs.check_hdr:
-                    hdr = nii.header
-                    curr_units = tuple(
-                        [
-                            None if u == "unknown" else u
-                            for u in hdr.get_xyzt_units()
-                        ]
-                    )
-                    curr_codes = (
-                        int(hdr["qform_code"]),
-                        int(hdr["sform_code"]),
-                    )
-
-                    # Default to mm, use sec if data type is bold
-                    units = (
-                        curr_units[0] or "mm",
-                        "sec" if out_entities["suffix"] == "bold" else None,
-                    )
-                    xcodes = (1, 1)  # Derivative in its original scanner space
-                    if self.inputs.space:
-                        xcodes = (
-                            (4, 4)
-                            if self.inputs.space in STANDARD_SPACES
-                            else (2, 2)
-                        )
-
-                    if curr_codes != xcodes or curr_units != units:
-                        self._results["fixed_hdr"][i] = True
-                        new_header = hdr.copy()
-                        new_header.set_qform(nii.affine, xcodes[0])
-                        new_header.set_sform(nii.affine, xcodes[1])
-                        new_header.set_xyzt_units(*units)
-
-                if data_dtype == "source":  # match source dtype
-                    try:
-                        data_dtype = nb.load(
-                            self.inputs.source_file[0]
-                        ).get_data_dtype()
-                    except Exception:
-                        LOGGER.warning(
-                            f"Could not get data type of file {self.inputs.source_file[0]}"
-                        )
-                        data_dtype = None
-
-                if data_dtype:
-                    data_dtype = np.dtype(data_dtype)
-                    orig_dtype = nii.get_data_dtype()
-                    if orig_dtype != data_dtype:
-                        LOGGER.warning(
-                            f"Changing {out_file} dtype from {orig_dtype} to {data_dtype}"
-                        )
-                        # coerce dataobj to new data dtype
-                        if np.issubdtype(data_dtype, np.integer):
-                            new_data = np.rint(nii.dataobj).astype(data_dtype)
-                        else:
-                            new_data = np.asanyarray(
-                                nii.dataobj, dtype=data_dtype
-                            )
-                        # and set header to match
-                        if new_header is None:
-                            new_header = nii.header.copy()
-                        new_header.set_data_dtype(data_dtype)
-                del nii
-
-            if new_data is new_header is None:
-                _copy_any(orig_file, str(out_file))
-            else:
-                orig_img = nb.load(orig_file)
-                if new_data is None:
-                    set_consumables(new_header, orig_img.dataobj)
-                    new_data = orig_img.dataobj.get_unscaled()
-                else:
-                    # Without this, we would be writing nans
-                    # This is our punishment for hacking around nibabel defaults
-                    new_header.set_slope_inter(slope=1.0, inter=0.0)
-                unsafe_write_nifti_header_and_data(
-                    fname=out_file, header=new_header, data=new_data
-                )
-                del orig_img
 
         if len(self._results["out_file"]) == 1:
             meta_fields = self.inputs.copyable_trait_names()
@@ -514,36 +856,173 @@ space-MNI152NLin6Asym_desc-preproc_bold.json'
                 }
             )
             if self._metadata:
-                out_file = Path(self._results["out_file"][0])
-                # 1.3.x hack
-                # For dtseries, we have been generating weird non-BIDS JSON files.
-                # We can safely keep producing them to avoid breaking derivatives, but
-                # only the existing keys should keep going into them.
-                if out_file.name.endswith(".dtseries.nii"):
-                    legacy_metadata = {}
-                    for key in (
-                        "grayordinates",
-                        "space",
-                        "surface",
-                        "surface_density",
-                        "volume",
-                    ):
-                        if key in self._metadata:
-                            legacy_metadata[key] = self._metadata.pop(key)
-                    if legacy_metadata:
-                        sidecar = (
-                            out_file.parent
-                            / f"{_splitext(str(out_file))[0]}.json"
-                        )
-                        sidecar.write_text(
-                            dumps(legacy_metadata, sort_keys=True, indent=2)
-                        )
-                # The future: the extension is the first . and everything after
-                sidecar = (
-                    out_file.parent / f"{out_file.name.split('.', 1)[0]}.json"
-                )
-                sidecar.write_text(
-                    dumps(self._metadata, sort_keys=True, indent=2)
+                self._results["out_meta"] = write_sidecar(
+                    self._results["out_file"][0], self._metadata
                 )
-                self._results["out_meta"] = str(sidecar)
+        if isdefined(self.inputs.base_directory):
+            append_manifest(
+                base_directory,
+                self._results["out_file"]
+                + listify(self._results.get("out_meta", [])),
+            )
+        return runtime
+
+
+#: Sink options (i.e, of DerivativesDataSink) that are not entities
+SINK_OPTIONS = frozenset(
+    {"compress", "copy_mode", "data_dtype", "dismiss_entities"}
+)
+
+
+class _BatchDerivativesDataSinkInputSpec(
+    DynamicTraitedSpec, BaseInterfaceInputSpec
+):
+    base_directory = traits.Directory(
+        desc="Path to the base directory for storing data."
+    )
+    check_hdr = traits.Bool(
+        True, usedefault=True, desc="fix headers of NIfTI outputs"
+    )
+    source_file = InputMultiObject(
+        File(exists=False),
+        mandatory=True,
+        desc="the source file(s) to extract entities from",
+    )
+    num_threads = traits.Int(
+        4, usedefault=True, desc="number of derivatives written concurrently"
+    )
+    skip_unchanged = traits.Bool(
+        True,
+        usedefault=True,
+        desc="skip outputs whose source, options and target are unchanged "
+        "since their recorded write",
+    )
+    fast_hash = traits.Bool(
+        False,
+        usedefault=True,
+        desc="fingerprint sources by a hash of their ends, rather than "
+        "their modification time",
+    )
+
+
+class _BatchDerivativesDataSinkOutputSpec(TraitedSpec):
+    out_file = OutputMultiObject(File(exists=True, desc="written file path"))
+    fixed_hdr = traits.List(
+        traits.Bool, desc="whether derivative header was fixed"
+    )
+    status = traits.List(
+        traits.Enum(*WRITE_STATUSES),
+        desc="whether each output was written, skipped (unchanged) or "
+        "written with a fixed header",
+    )
+
+
+class BatchDerivativesDataSink(SimpleInterface):
+    """
+    Store all derivatives of a run at once.
+
+    Each key of *outputs* becomes an input of the interface and its value
+    holds the entities and options of a DerivativesDataSink (i.e,
+    ``dict(desc="preproc", suffix="dwi", compress=None)``). Entity values
+    may be callables, evaluated on each input file (i.e, to infer a
+    metric's ``desc`` from its name). Lists of files are stored one by one,
+    as a DerivativesDataSink MapNode would, and undefined inputs are
+    skipped. All paths are resolved first and the files are then written
+    concurrently, so a run's derivatives are stored by a single job. A
+    ``copy_mode`` option sets the cheapest placement ("reflink",
+    "hardlink" or "copy") of each output's unmodified files. Outputs whose
+    source, options and target match the record of their last write are
+    skipped (see *store_derivative*), and all outputs are recorded in their
+    subject's manifest (see *dwiprep.utils.manifest*).
+    """
+
+    input_spec = _BatchDerivativesDataSinkInputSpec
+    output_spec = _BatchDerivativesDataSinkOutputSpec
+    out_path_base = "niworkflows"
+    _always_run = True
+
+    def __init__(self, outputs: dict, out_path_base=None, **inputs):
+        """Initialize the SimpleInterface and add an input per output."""
+        self.sinks = outputs
+        if out_path_base:
+            self.out_path_base = out_path_base
+        super().__init__(**inputs)
+        add_traits(self.inputs, list(outputs))
+
+    def _resolve(self, in_file: str, sink: dict) -> dict:
+        entities, metadata = {}, {}
+        for key, value in sink.items():
+            if key in SINK_OPTIONS:
+                continue
+            if key not in BIDS_DERIV_ENTITIES:
+                metadata[key] = value
+            elif value is not None:
+                entities[key] = value(in_file) if callable(value) else value
+        dest_files, out_entities = build_derivative_paths(
+            [in_file],
+            self.inputs.source_file,
+            entities,
+            sink.get("dismiss_entities"),
+            sink.get("compress"),
+        )
+        return dict(
+            orig_file=in_file,
+            dest_file=dest_files[0],
+            data_dtype=sink.get("data_dtype")
+            or DEFAULT_DTYPES[out_entities.get("suffix")],
+            suffix=out_entities.get("suffix"),
+            space=out_entities.get("space"),
+            copy_mode=sink.get("copy_mode", "reflink"),
+            metadata=metadata,
+        )
+
+    def _run_interface(self, runtime):
+        from bids.utils import listify
+
+        # Ready the output folder
+        base_directory = runtime.cwd
+        if isdefined(self.inputs.base_directory):
+            base_directory = self.inputs.base_directory
+        out_path = Path(base_directory).absolute() / self.out_path_base
+        out_path.mkdir(exist_ok=True, parents=True)
+
+        # Resolve all paths in a single pass
+        jobs = []
+        for name, sink in self.sinks.items():
+            in_files = getattr(self.inputs, name)
+            if in_files is None or not isdefined(in_files):
+                continue
+            jobs += [self._resolve(f, sink) for f in listify(in_files)]
+        out_files = [str(out_path / job["dest_file"]) for job in jobs]
+        duplicates = {f for f in out_files if out_files.count(f) > 1}
+        if duplicates:
+            raise ValueError(
+                f"Several derivatives share a path: {sorted(duplicates)}."
+            )
+
+        def write(job, out_file):
+            status = store_derivative(
+                job["orig_file"],
+                out_file,
+                skip_unchanged=self.inputs.skip_unchanged,
+                fast_hash=self.inputs.fast_hash,
+                check_hdr=self.inputs.check_hdr,
+                data_dtype=job["data_dtype"],
+                suffix=job["suffix"],
+                space=job["space"],
+                source_file=self.inputs.source_file[0],
+                copy_mode=job["copy_mode"],
+            )
+            if job["metadata"]:
+                return status, write_sidecar(out_file, dict(job["metadata"]))
+            return status, None
+
+        with ThreadPoolExecutor(max(1, self.inputs.num_threads)) as executor:
+            results = list(executor.map(write, jobs, out_files))
+        sidecars = [sidecar for _, sidecar in results if sidecar]
+        self._results["out_file"] = out_files
+        self._results["status"] = [status for (status, _), _ in results]
+        self._results["fixed_hdr"] = [fixed for (_, fixed), _ in results]
+        if isdefined(self.inputs.base_directory):
+            append_manifest(base_directory, out_files + sidecars)
         return runtime
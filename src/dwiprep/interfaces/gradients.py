@@ -0,0 +1,135 @@
+"""
+Gradient-table-based selection of DWI volumes.
+"""
+from pathlib import Path
+
+import nibabel as nb
+import numpy as np
+from nipype.interfaces.base import (
+    BaseInterfaceInputSpec,
+    File,
+    SimpleInterface,
+    TraitedSpec,
+    isdefined,
+    traits,
+)
+
+from dwiprep.utils.gradients import load_gradient_table
+from dwiprep.utils.images import allocate_nifti
+
+
+def _selection_kwargs(inputs) -> dict:
+    return dict(
+        max_bvalue=inputs.max_bvalue if isdefined(inputs.max_bvalue) else None,
+        min_bvalue=inputs.min_bvalue if isdefined(inputs.min_bvalue) else None,
+        include_b0=inputs.include_b0,
+    )
+
+
+class _SelectVolumesInputSpec(BaseInterfaceInputSpec):
+    in_bval = File(exists=True, mandatory=True, desc="FSL-formatted bval")
+    in_bvec = File(exists=True, mandatory=True, desc="FSL-formatted bvec")
+    b0_only = traits.Bool(
+        False, usedefault=True, desc="select only b=0 volumes"
+    )
+    max_bvalue = traits.Float(desc="upper (inclusive) shell b-value")
+    min_bvalue = traits.Float(desc="lower (inclusive) non-zero shell b-value")
+    include_b0 = traits.Bool(
+        True, usedefault=True, desc="whether to include b=0 volumes"
+    )
+
+
+class _SelectVolumesOutputSpec(TraitedSpec):
+    indices = traits.List(traits.Int, desc="selected volumes' indices")
+    coord = traits.Str(
+        desc="comma-separated indices (i.e, for mrtrix3's -coord 3)"
+    )
+    shells = traits.List(traits.Float, desc="selected shells' b-values")
+    n_volumes = traits.Int(desc="number of selected volumes")
+
+
+class SelectVolumes(SimpleInterface):
+    """
+    Selects DWI volumes by shells, using the cached gradient table service.
+    """
+
+    input_spec = _SelectVolumesInputSpec
+    output_spec = _SelectVolumesOutputSpec
+
+    def _run_interface(self, runtime):
+        table = load_gradient_table(self.inputs.in_bval, self.inputs.in_bvec)
+        if self.inputs.b0_only:
+            indices = table.b0_indices
+        else:
+            indices = table.select(**_selection_kwargs(self.inputs))
+        self._results["indices"] = [int(i) for i in indices]
+        self._results["coord"] = table.to_coord(indices)
+        self._results["shells"] = sorted(
+            {float(b) for b in table.shell_labels[indices]}
+        )
+        self._results["n_volumes"] = len(indices)
+        return runtime
+
+
+class _ExtractShellsInputSpec(BaseInterfaceInputSpec):
+    in_file = File(exists=True, mandatory=True, desc="DWI series (NIfTI)")
+    in_bval = File(exists=True, mandatory=True, desc="FSL-formatted bval")
+    in_bvec = File(exists=True, mandatory=True, desc="FSL-formatted bvec")
+    max_bvalue = traits.Float(desc="upper (inclusive) shell b-value")
+    min_bvalue = traits.Float(desc="lower (inclusive) non-zero shell b-value")
+    include_b0 = traits.Bool(
+        True, usedefault=True, desc="whether to include b=0 volumes"
+    )
+
+
+class _ExtractShellsOutputSpec(TraitedSpec):
+    out_file = File(exists=True, desc="selected volumes (uncompressed NIfTI)")
+    out_bval = File(exists=True, desc="selected volumes' bval")
+    out_bvec = File(exists=True, desc="selected volumes' bvec")
+    indices = traits.List(traits.Int, desc="selected volumes' indices")
+
+
+class ExtractShells(SimpleInterface):
+    """
+    Extracts a subset of shells from a DWI series.
+
+    Only the selected volumes are read, one at a time, from the input's
+    data proxy (memory-mapped when uncompressed), and written into a
+    preallocated, memory-mapped output image.
+    """
+
+    input_spec = _ExtractShellsInputSpec
+    output_spec = _ExtractShellsOutputSpec
+
+    def _run_interface(self, runtime):
+        table = load_gradient_table(self.inputs.in_bval, self.inputs.in_bvec)
+        indices = table.select(**_selection_kwargs(self.inputs))
+        if not len(indices):
+            raise ValueError(
+                f"No volumes of {self.inputs.in_file} match the requested "
+                f"shells (available shells: {table.shells.tolist()})."
+            )
+        img = nb.load(self.inputs.in_file, mmap=True)
+        slope, inter = img.header.get_slope_inter()
+        scaled = slope not in (None, 1) or inter not in (None, 0)
+        out_file = Path(runtime.cwd) / "dwi_shells.nii"
+        out_data = allocate_nifti(
+            out_file,
+            img.header,
+            img.shape[:3] + (len(indices),),
+            np.float32 if scaled else img.get_data_dtype(),
+        )
+        for out_index, index in enumerate(indices):
+            out_data[..., out_index] = img.dataobj[..., int(index)]
+        out_data.flush()
+        del out_data
+
+        out_bval = Path(runtime.cwd) / "dwi_shells.bval"
+        out_bvec = Path(runtime.cwd) / "dwi_shells.bvec"
+        np.savetxt(out_bval, table.bvals[None, indices], fmt="%g")
+        np.savetxt(out_bvec, table.bvecs[:, indices], fmt="%.6f")
+        self._results["out_file"] = str(out_file)
+        self._results["out_bval"] = str(out_bval)
+        self._results["out_bvec"] = str(out_bvec)
+        self._results["indices"] = [int(i) for i in indices]
+        return runtime
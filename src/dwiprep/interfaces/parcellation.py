@@ -0,0 +1,127 @@
+"""
+Region-wise statistics of (coregistered) metrics over a parcellation.
+"""
+from pathlib import Path
+
+import nibabel as nb
+import numpy as np
+from nipype import logging
+from nipype.interfaces.base import (
+    BaseInterfaceInputSpec,
+    File,
+    InputMultiObject,
+    SimpleInterface,
+    TraitedSpec,
+    isdefined,
+    traits,
+)
+
+from dwiprep.utils.parcellation import (
+    STATISTICS,
+    STATS_COLUMNS,
+    index_labels,
+    region_statistics,
+)
+
+LOGGER = logging.getLogger("nipype.interface")
+
+
+def infer_metric_name(in_file: str) -> str:
+    """
+    A metric's name, from its file's (i.e, ``fa_resampled.nii``) name.
+
+    Parameters
+    ----------
+    in_file : str
+        A metric's image
+
+    Returns
+    -------
+    str
+        The metric's name (i.e, "fa")
+    """
+    return Path(in_file).name.split(".")[0].split("_")[0].lower()
+
+
+class _ParcellationStatsInputSpec(BaseInterfaceInputSpec):
+    in_files = InputMultiObject(
+        File(exists=True),
+        mandatory=True,
+        desc="metrics sharing the parcellation's grid",
+    )
+    parcellation = File(
+        exists=True, mandatory=True, desc="label (parcellation) image"
+    )
+    parcellation_name = traits.Str(
+        "dseg",
+        usedefault=True,
+        desc="parcellation's name (i.e, the output's desc entity)",
+    )
+    metric_names = traits.List(
+        traits.Str, desc="metrics' names (inferred from file names)"
+    )
+    exclude_labels = traits.List(
+        traits.Int, [0], usedefault=True, desc="labels to ignore"
+    )
+
+
+class _ParcellationStatsOutputSpec(TraitedSpec):
+    out_file = File(exists=True, desc="region-wise statistics (TSV)")
+
+
+class ParcellationStats(SimpleInterface):
+    """
+    Computes the number of voxels, mean, median and standard deviation of
+    each metric within each region of a parcellation.
+
+    The parcellation is read (and its voxels mapped to regions) once, and
+    the statistics of all regions of a metric are computed at once with
+    ``np.bincount``. Metrics with several components (i.e, eigenvectors)
+    are skipped. The output is a tidy TSV with a row per region and metric.
+    """
+
+    input_spec = _ParcellationStatsInputSpec
+    output_spec = _ParcellationStatsOutputSpec
+
+    def _run_interface(self, runtime):
+        parcellation = nb.load(self.inputs.parcellation)
+        regions, inverse, mask = index_labels(
+            parcellation.dataobj, self.inputs.exclude_labels
+        )
+        metric_names = (
+            self.inputs.metric_names
+            if isdefined(self.inputs.metric_names)
+            else [infer_metric_name(f) for f in self.inputs.in_files]
+        )
+        rows = []
+        for in_file, metric in zip(self.inputs.in_files, metric_names):
+            img = nb.load(in_file)
+            if img.shape != parcellation.shape:
+                if img.shape[:3] == parcellation.shape[:3]:
+                    LOGGER.info(f"Skipping multi-component metric {metric}")
+                    continue
+                raise ValueError(
+                    f"{in_file} ({img.shape}) does not share the grid of "
+                    f"{self.inputs.parcellation} ({parcellation.shape})."
+                )
+            values = np.asanyarray(img.dataobj).ravel(order="F")[mask]
+            stats = region_statistics(values, inverse, len(regions))
+            for i, label in enumerate(regions):
+                rows.append(
+                    [str(label), metric]
+                    + [_format(stats[key][i]) for key in STATISTICS]
+                )
+
+        out_file = Path(runtime.cwd) / (
+            f"{self.inputs.parcellation_name}_stats.tsv"
+        )
+        lines = ["\t".join(STATS_COLUMNS)] + ["\t".join(r) for r in rows]
+        out_file.write_text("\n".join(lines) + "\n")
+        self._results["out_file"] = str(out_file)
+        return runtime
+
+
+def _format(value) -> str:
+    if np.issubdtype(type(value), np.integer):
+        return str(int(value))
+    return "n/a" if np.isnan(value) else f"{value:.6g}"
@@ -0,0 +1,365 @@
+"""
+Resampling of images into a reference grid through a FLIRT affine.
+"""
+from pathlib import Path
+
+import nibabel as nb
+import numpy as np
+from nipype.interfaces.base import (
+    BaseInterfaceInputSpec,
+    File,
+    InputMultiObject,
+    OutputMultiObject,
+    SimpleInterface,
+    TraitedSpec,
+    traits,
+)
+
+from dwiprep.utils.files import place_file
+from dwiprep.utils.images import (
+    allocate_nifti,
+    compress,
+    decompress,
+    patch_nifti_header,
+)
+from dwiprep.utils.resampling import (
+    fsl_to_itk,
+    fsl_to_voxel_mapping,
+    grid_chunks,
+    interpolate,
+    rotate_bvecs,
+    trilinear_weights,
+    write_itk_affine,
+)
+
+#: Bytes held per reference voxel while computing its interpolation
+#: indices and weights: the (8,) int64 indices and float32 weights
+#: themselves (96) and *trilinear_weights*' float64 coordinates and
+#: per-corner temporaries (184)
+WEIGHTS_BYTES_PER_VOXEL = 8 * (8 + 4) + 184
+
+
+def value_bytes(dtype: np.dtype) -> int:
+    """
+    Bytes held per interpolated (reference voxel, volume) value: the
+    accumulated values, a corner's gathered neighbours and their weighted
+    product (see *interpolate*).
+
+    Parameters
+    ----------
+    dtype : np.dtype
+        Data type of the (unscaled) input
+
+    Returns
+    -------
+    int
+        Bytes per value
+    """
+    return 4 + 2 * max(4, np.dtype(dtype).itemsize)
+
+
+class _ResampleMetricsInputSpec(BaseInterfaceInputSpec):
+    in_files = InputMultiObject(
+        File(exists=True),
+        mandatory=True,
+        desc="images sharing the same grid (3D or 4D)",
+    )
+    in_matrix_file = File(
+        exists=True,
+        mandatory=True,
+        desc="FSL-formatted affine mapping *in_files* to *reference*",
+    )
+    reference = File(
+        exists=True, mandatory=True, desc="image defining the target grid"
+    )
+    chunk_size = traits.Int(
+        500000,
+        usedefault=True,
+        desc="maximal number of reference voxels interpolated at once",
+    )
+
+
+class _ResampleMetricsOutputSpec(TraitedSpec):
+    out_files = OutputMultiObject(
+        File(exists=True), desc="resampled images, ordered as *in_files*"
+    )
+
+
+class ResampleMetrics(SimpleInterface):
+    """
+    Resamples several images that share a grid (i.e, tensor-derived metrics)
+    with trilinear interpolation, in a single process.
+
+    The reference coordinate grid and interpolation weights are computed once
+    per chunk of reference voxels and applied to all volumes of all images,
+    stacked into a single (voxels, volumes) array. Outputs are uncompressed
+    NIfTI files named after their inputs (i.e, ``fa_resampled.nii``).
+    """
+
+    input_spec = _ResampleMetricsInputSpec
+    output_spec = _ResampleMetricsOutputSpec
+
+    def _run_interface(self, runtime):
+        reference = nb.load(self.inputs.reference)
+        reference_shape = reference.shape[:3]
+        images = [nb.load(in_file) for in_file in self.inputs.in_files]
+        moving = images[0]
+        moving_shape = moving.shape[:3]
+        n_voxels = int(np.prod(moving_shape))
+        data = np.concatenate(
+            [
+                np.asanyarray(img.dataobj, dtype=np.float32).reshape(
+                    n_voxels, -1, order="F"
+                )
+                for img in images
+            ],
+            axis=1,
+        )
+        mapping = fsl_to_voxel_mapping(
+            np.loadtxt(self.inputs.in_matrix_file), moving, reference
+        )
+
+        header = reference.header.copy()
+        header.set_qform(reference.affine)
+        header.set_sform(reference.affine)
+        outputs, volumes = [], []
+        first = 0
+        for in_file, img in zip(self.inputs.in_files, images):
+            extra = img.shape[3:]
+            stem = Path(in_file).name.split(".")[0]
+            out_file = str(Path(runtime.cwd) / f"{stem}_resampled.nii")
+            out_data = allocate_nifti(
+                out_file, header, reference_shape + extra
+            )
+            n_volumes = int(np.prod(extra))
+            # a (voxels, volumes) view of the memory-mapped output
+            outputs.append(out_data.reshape(-1, n_volumes, order="F"))
+            volumes.append(slice(first, first + n_volumes))
+            first += n_volumes
+            self._results.setdefault("out_files", []).append(out_file)
+
+        for chunk in grid_chunks(reference_shape, self.inputs.chunk_size):
+            indices, weights = trilinear_weights(
+                mapping, reference_shape, moving_shape, chunk
+            )
+            values = interpolate(data, indices, weights)
+            for out_data, volume in zip(outputs, volumes):
+                out_data[chunk] = values[:, volume]
+        for out_data in outputs:
+            out_data.flush()
+        return runtime
+
+
+class _ResampleDWIInputSpec(BaseInterfaceInputSpec):
+    in_file = File(exists=True, mandatory=True, desc="DWI series (NIfTI)")
+    in_bvec = File(exists=True, mandatory=True, desc="FSL-formatted bvec")
+    in_bval = File(exists=True, mandatory=True, desc="FSL-formatted bval")
+    in_matrix_file = File(
+        exists=True,
+        mandatory=True,
+        desc="FSL-formatted affine mapping *in_file* to *reference*",
+    )
+    reference = File(
+        exists=True, mandatory=True, desc="image defining the target space"
+    )
+    regrid = traits.Bool(
+        False,
+        usedefault=True,
+        desc="resample into *reference*'s grid, rather than keep the "
+        "series' own grid and only move its affine into *reference*'s space",
+    )
+    max_memory_mb = traits.Float(
+        1024.0,
+        usedefault=True,
+        desc="memory budget for interpolation weights and resampled chunks",
+    )
+
+
+class _ResampleDWIOutputSpec(TraitedSpec):
+    out_file = File(exists=True, desc="resampled DWI series (NIfTI)")
+    out_bvec = File(exists=True, desc="bvec of *out_file*'s grid")
+    out_bval = File(exists=True, desc="bval (unchanged)")
+    out_rotated_bvec = File(
+        exists=True,
+        desc="bvec rotated by the transform (i.e, for the series regridded "
+        "into *reference*'s or a later space)",
+    )
+
+
+class ResampleDWI(SimpleInterface):
+    """
+    Moves a DWI series into a reference's space through a FLIRT affine.
+
+    By default the series keeps its own grid: only its header's affine is
+    moved (as a header-only *mrtransform* would), and its b-vectors, which
+    are defined in the grid's axes, are kept as well. Rotated b-vectors are
+    written alongside, for later resampling of the native series.
+
+    With ``regrid`` the series is resampled into the reference's grid in
+    bounded-size chunks: the input is memory-mapped (gzipped inputs are
+    first streamed into an uncompressed copy), the output is preallocated
+    as a memory-mapped NIfTI and ``max_memory_mb`` bounds all of the arrays
+    allocated per chunk (interpolation weights, gathered neighbours and
+    resampled values), so peak memory does not grow with the number of
+    volumes. b-vectors are then rotated by the rotation component of the
+    transform.
+
+    Either way the output is a compressed ``dwi_resampled.nii.gz``.
+    """
+
+    input_spec = _ResampleDWIInputSpec
+    output_spec = _ResampleDWIOutputSpec
+
+    def _run_interface(self, runtime):
+        reference = nb.load(self.inputs.reference)
+        matrix = np.loadtxt(self.inputs.in_matrix_file)
+        bvecs = np.loadtxt(self.inputs.in_bvec, ndmin=2)
+        rotated_bvecs = rotate_bvecs(bvecs, matrix)
+        out_file = Path(runtime.cwd) / "dwi_resampled.nii.gz"
+        if self.inputs.regrid:
+            in_file = decompress(self.inputs.in_file, runtime.cwd)
+            uncompressed = Path(runtime.cwd) / "dwi_resampled.nii"
+            self._regrid(in_file, reference, matrix, uncompressed)
+            if in_file != Path(self.inputs.in_file):
+                in_file.unlink()
+            compress(uncompressed, out_file)
+            uncompressed.unlink()
+            bvecs = rotated_bvecs
+        else:
+            self._move(reference, matrix, out_file)
+
+        bvec_file = Path(runtime.cwd) / "dwi_resampled.bvec"
+        np.savetxt(bvec_file, bvecs, fmt="%.6f")
+        rotated_bvec_file = Path(runtime.cwd) / "dwi_rotated.bvec"
+        np.savetxt(rotated_bvec_file, rotated_bvecs, fmt="%.6f")
+        bval_file = Path(runtime.cwd) / "dwi_resampled.bval"
+        bval_file.write_text(Path(self.inputs.in_bval).read_text())
+        self._results["out_file"] = str(out_file)
+        self._results["out_bvec"] = str(bvec_file)
+        self._results["out_bval"] = str(bval_file)
+        self._results["out_rotated_bvec"] = str(rotated_bvec_file)
+        return runtime
+
+    def _move(
+        self, reference: nb.Nifti1Image, matrix: np.ndarray, out_file: Path
+    ):
+        """
+        Moves the series' affine into *reference*'s space, patching the
+        header of a compressed copy without reading its data. Compressed
+        inputs are placed as they are (see *place_file*); the data are only
+        re-deflated if the input's header shares a gzip member with them.
+        """
+        in_file = Path(self.inputs.in_file)
+        img = nb.load(str(in_file))
+        # moving voxels -> reference voxels -> reference's world
+        affine = reference.affine @ np.linalg.inv(
+            fsl_to_voxel_mapping(matrix, img, reference)
+        )
+        header = img.header.copy()
+        header.set_qform(affine)
+        header.set_sform(affine)
+        uncompressed = in_file
+        if in_file.name.endswith(".gz"):
+            place_file(in_file, out_file, writable=True)
+            if patch_nifti_header(out_file, header):
+                return
+            # the header shares a gzip member with the data
+            out_file.unlink()
+            uncompressed = decompress(in_file, out_file.parent)
+        compress(uncompressed, out_file)
+        if uncompressed != in_file:
+            uncompressed.unlink()
+        if not patch_nifti_header(out_file, header):
+            raise RuntimeError(f"Could not patch the header of {out_file}.")
+
+    def _regrid(
+        self,
+        in_file: Path,
+        reference: nb.Nifti1Image,
+        matrix: np.ndarray,
+        out_file: Path,
+    ):
+        """
+        Resamples an uncompressed series into *reference*'s grid.
+        """
+        img = nb.load(str(in_file), mmap=True)
+        reference_shape = reference.shape[:3]
+        moving_shape = img.shape[:3]
+        n_volumes = img.shape[3]
+        mapping = fsl_to_voxel_mapping(matrix, img, reference)
+
+        # memory-mapped (voxels, volumes) views of input and output
+        slope, inter = img.dataobj.slope, img.dataobj.inter
+        data = img.dataobj.get_unscaled().reshape(-1, n_volumes, order="F")
+        header = reference.header.copy()
+        header.set_qform(reference.affine)
+        header.set_sform(reference.affine)
+        header.set_xyzt_units(*img.header.get_xyzt_units())
+        out_data = allocate_nifti(
+            out_file, header, reference_shape + (n_volumes,)
+        ).reshape(-1, n_volumes, order="F")
+
+        budget = self.inputs.max_memory_mb * 1024 ** 2 / 2
+        n_reference = int(np.prod(reference_shape))
+        voxel_chunk = int(
+            max(1, min(n_reference, budget // WEIGHTS_BYTES_PER_VOXEL))
+        )
+        volume_chunk = int(
+            max(
+                1,
+                min(
+                    n_volumes,
+                    budget // (voxel_chunk * value_bytes(data.dtype)),
+                ),
+            )
+        )
+        for chunk in grid_chunks(reference_shape, voxel_chunk):
+            indices, weights = trilinear_weights(
+                mapping, reference_shape, moving_shape, chunk
+            )
+            for first in range(0, n_volumes, volume_chunk):
+                volumes = slice(first, min(first + volume_chunk, n_volumes))
+                values = interpolate(data[:, volumes], indices, weights)
+                values *= slope
+                values += inter
+                out_data[chunk, volumes] = values
+            del indices, weights
+        out_data.flush()
+        del data, out_data
+
+
+class _FSLToITKInputSpec(BaseInterfaceInputSpec):
+    in_matrix_file = File(
+        exists=True,
+        mandatory=True,
+        desc="FSL-formatted affine mapping *moving* to *reference*",
+    )
+    moving = File(exists=True, mandatory=True, desc="transformed image")
+    reference = File(
+        exists=True, mandatory=True, desc="image defining the target space"
+    )
+
+
+class _FSLToITKOutputSpec(TraitedSpec):
+    out_file = File(exists=True, desc="ITK-formatted affine (text)")
+
+
+class FSLToITK(SimpleInterface):
+    """
+    Converts a FLIRT matrix into an ITK affine that can be composed with
+    other (i.e, *smriprep*'s) transforms by *antsApplyTransforms*.
+    """
+
+    input_spec = _FSLToITKInputSpec
+    output_spec = _FSLToITKOutputSpec
+
+    def _run_interface(self, runtime):
+        affine = fsl_to_itk(
+            np.loadtxt(self.inputs.in_matrix_file),
+            nb.load(self.inputs.moving),
+            nb.load(self.inputs.reference),
+        )
+        self._results["out_file"] = write_itk_affine(
+            affine, str(Path(runtime.cwd) / "affine_itk.txt")
+        )
+        return runtime
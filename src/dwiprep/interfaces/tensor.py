@@ -0,0 +1,375 @@
+"""
+In-process diffusion tensor fitting and tensor-derived metrics estimation.
+"""
+import json
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import nibabel as nb
+import numpy as np
+from nipype import logging
+from nipype.interfaces.base import (
+    BaseInterfaceInputSpec,
+    File,
+    OutputMultiObject,
+    SimpleInterface,
+    TraitedSpec,
+    isdefined,
+    traits,
+)
+
+from dwiprep.utils.gradients import load_gradient_table
+
+LOGGER = logging.getLogger("nipype.interface")
+
+#: Estimated metrics, ordered as in *tensor_estimation*'s ``METRICS``
+METRICS = ["fa", "adc", "ad", "rd", "cl", "cp", "cs", "evec", "eval"]
+
+#: Metrics with three components (i.e, 4D outputs)
+VECTOR_METRICS = ["evec", "eval"]
+
+#: Lower bound for signal values before taking their logarithm
+MIN_SIGNAL = 1e-6
+
+
+def bvecs_to_world(bvecs: np.ndarray, affine: np.ndarray) -> np.ndarray:
+    """
+    Rotates FSL-formatted b-vectors (defined in image axes) to scanner space.
+
+    Parameters
+    ----------
+    bvecs : np.ndarray
+        A (3, N) array of FSL-formatted b-vectors
+    affine : np.ndarray
+        The DWI series' voxel-to-world affine
+
+    Returns
+    -------
+    np.ndarray
+        A (3, N) array of b-vectors in scanner (RAS+) space.
+    """
+    linear = affine[:3, :3]
+    rotation = linear / np.linalg.norm(linear, axis=0)
+    bvecs = np.array(bvecs, dtype=float)
+    if np.linalg.det(linear) > 0:
+        # FSL flips the first axis of "neurological" images
+        bvecs[0] *= -1
+    return rotation @ bvecs
+
+
+def design_matrix(bvals: np.ndarray, bvecs: np.ndarray) -> np.ndarray:
+    """
+    Builds the log-linear tensor model's design matrix.
+
+    Parameters
+    ----------
+    bvals : np.ndarray
+        (N,) b-values
+    bvecs : np.ndarray
+        (3, N) unit gradient directions
+
+    Returns
+    -------
+    np.ndarray
+        An (N, 7) matrix mapping (Dxx, Dyy, Dzz, Dxy, Dxz, Dyz, ln(S0))
+        to the log-signal.
+    """
+    gx, gy, gz = bvecs
+    return np.column_stack(
+        [
+            -bvals * gx * gx,
+            -bvals * gy * gy,
+            -bvals * gz * gz,
+            -2 * bvals * gx * gy,
+            -2 * bvals * gx * gz,
+            -2 * bvals * gy * gz,
+            np.ones_like(bvals),
+        ]
+    )
+
+
+def fit_wls(
+    signal: np.ndarray, design: np.ndarray, n_iter: int = 2
+) -> np.ndarray:
+    """
+    Iteratively reweighted least-squares fit of the log-linear tensor model.
+
+    Parameters
+    ----------
+    signal : np.ndarray
+        (V, N) diffusion-weighted signal of V voxels
+    design : np.ndarray
+        (N, 7) design matrix (see :func:`design_matrix`)
+    n_iter : int, optional
+        Number of weighted iterations following the initial OLS fit,
+        by default 2
+
+    Returns
+    -------
+    np.ndarray
+        (V, 7) model parameters
+    """
+    log_signal = np.log(np.maximum(signal, MIN_SIGNAL))
+    params = log_signal @ np.linalg.pinv(design).T
+    for _ in range(n_iter):
+        # weights are the squared predicted signal (Salvador et al., 2005)
+        weights = np.exp(np.minimum(2 * params @ design.T, 700))
+        lhs = np.einsum("vn,ni,nj->vij", weights, design, design)
+        rhs = np.einsum("vn,ni->vi", weights * log_signal, design)
+        params = (np.linalg.pinv(lhs) @ rhs[..., None])[..., 0]
+    return params
+
+
+def tensor_metrics(params: np.ndarray) -> dict:
+    """
+    Derives all of *METRICS* from fitted tensor parameters in a single pass.
+
+    Parameters
+    ----------
+    params : np.ndarray
+        (V, 7) model parameters (see :func:`fit_wls`)
+
+    Returns
+    -------
+    dict
+        Metric label and its (V,) or (V, 3) values.
+    """
+    dxx, dyy, dzz, dxy, dxz, dyz = params[:, :6].T
+    tensors = np.stack(
+        [
+            np.stack([dxx, dxy, dxz], axis=-1),
+            np.stack([dxy, dyy, dyz], axis=-1),
+            np.stack([dxz, dyz, dzz], axis=-1),
+        ],
+        axis=-2,
+    )
+    evals, evecs = np.linalg.eigh(tensors)
+    # descending order: l1 >= l2 >= l3
+    evals, evecs = evals[:, ::-1], evecs[:, :, ::-1]
+    l1, l2, l3 = evals.T
+    md = evals.mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fa = np.sqrt(
+            1.5 * ((evals - md[:, None]) ** 2).sum(1) / (evals ** 2).sum(1)
+        )
+        cl, cp, cs = (l1 - l2) / l1, (l2 - l3) / l1, l3 / l1
+    metrics = {
+        "fa": fa,
+        "adc": md,
+        "ad": l1,
+        "rd": (l2 + l3) / 2,
+        "cl": cl,
+        "cp": cp,
+        "cs": cs,
+        "evec": evecs[:, :, 0],
+        "eval": evals,
+    }
+    return {
+        key: np.nan_to_num(value, nan=0.0, posinf=0.0, neginf=0.0)
+        for key, value in metrics.items()
+    }
+
+
+def fit_slab(
+    in_file: str,
+    mask: np.ndarray,
+    bounds: tuple,
+    design: np.ndarray,
+    chunk_size: int,
+) -> dict:
+    """
+    Fits the tensor model to all masked voxels of a single slab.
+
+    Parameters
+    ----------
+    in_file : str
+        DWI series (NIfTI)
+    mask : np.ndarray
+        Boolean mask of the slab
+    bounds : tuple
+        First and last (exclusive) slices of the slab along the third axis
+    design : np.ndarray
+        (N, 7) design matrix
+    chunk_size : int
+        Maximal number of voxels fitted at once
+
+    Returns
+    -------
+    dict
+        Metric label and its values over the slab's masked voxels.
+    """
+    first, last = bounds
+    slab = np.asanyarray(
+        nb.load(in_file).dataobj[:, :, first:last, :], dtype=np.float32
+    )
+    signal = slab[mask]
+    del slab
+    results = {
+        metric: np.zeros(
+            (len(signal), 3) if metric in VECTOR_METRICS else len(signal),
+            dtype=np.float32,
+        )
+        for metric in METRICS
+    }
+    for start in range(0, len(signal), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        params = fit_wls(signal[chunk].astype(np.float64), design)
+        for metric, values in tensor_metrics(params).items():
+            results[metric][chunk] = values
+    return results
+
+
+def peak_memory_mb(children: bool = False) -> float:
+    """
+    Peak resident memory of this process, or of the largest of its (reaped)
+    children. The two are separate maxima, so they are reported apart.
+
+    Parameters
+    ----------
+    children : bool, optional
+        Whether to report the children's peak, by default False
+
+    Returns
+    -------
+    float
+        Peak resident set size, in megabytes.
+    """
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+class _FitTensorMetricsInputSpec(BaseInterfaceInputSpec):
+    in_file = File(exists=True, mandatory=True, desc="DWI series (NIfTI)")
+    in_bvec = File(exists=True, mandatory=True, desc="FSL-formatted bvec")
+    in_bval = File(exists=True, mandatory=True, desc="FSL-formatted bval")
+    in_mask = File(
+        exists=True,
+        desc="binary mask of voxels to fit (default: all voxels with signal)",
+    )
+    chunk_size = traits.Int(
+        20000, usedefault=True, desc="maximal number of voxels fitted at once"
+    )
+    max_memory_mb = traits.Float(
+        1024.0,
+        usedefault=True,
+        desc="memory budget of a single slab (per worker process)",
+    )
+    n_procs = traits.Int(
+        1, usedefault=True, desc="number of worker processes (one per slab)"
+    )
+
+
+class _FitTensorMetricsOutputSpec(TraitedSpec):
+    out_fa = File(exists=True, desc="fractional anisotropy")
+    out_adc = File(exists=True, desc="mean apparent diffusion coefficient")
+    out_ad = File(exists=True, desc="axial diffusivity")
+    out_rd = File(exists=True, desc="radial diffusivity")
+    out_cl = File(exists=True, desc="linearity")
+    out_cp = File(exists=True, desc="planarity")
+    out_cs = File(exists=True, desc="sphericity")
+    out_evec = File(exists=True, desc="principal eigenvector (3 volumes)")
+    out_eval = File(exists=True, desc="eigenvalues, descending (3 volumes)")
+    metrics = OutputMultiObject(
+        File(exists=True), desc="all of the above, ordered as in *METRICS*"
+    )
+    out_report = File(exists=True, desc="runtime and memory report (JSON)")
+
+
+class FitTensorMetrics(SimpleInterface):
+    """
+    Fits a diffusion tensor and derives all of *METRICS* within a single
+    process.
+
+    The DWI series is read in slabs along its third axis, each bounded by
+    ``max_memory_mb``, and the masked voxels of each slab are fitted with
+    iteratively reweighted least-squares in chunks of ``chunk_size`` voxels.
+    Slabs are optionally distributed across ``n_procs`` worker processes.
+    Output file names match those of *tensor2metric* within the
+    *tensor_estimation* workflow (i.e, ``fa.nii.gz``, ``adc.nii.gz``, ...).
+    """
+
+    input_spec = _FitTensorMetricsInputSpec
+    output_spec = _FitTensorMetricsOutputSpec
+
+    def _run_interface(self, runtime):
+        start_time = time.time()
+        img = nb.load(self.inputs.in_file)
+        shape = img.shape[:3]
+        n_volumes = img.shape[3]
+
+        table = load_gradient_table(self.inputs.in_bval, self.inputs.in_bvec)
+        design = design_matrix(
+            table.bvals, bvecs_to_world(table.bvecs, img.affine)
+        )
+
+        if isdefined(self.inputs.in_mask):
+            mask = np.asanyarray(nb.load(self.inputs.in_mask).dataobj) > 0
+        else:
+            mask = np.zeros(shape, dtype=bool)
+            for index in table.b0_indices:
+                mask |= np.asanyarray(img.dataobj[..., index]) > 0
+
+        # Slabs' thickness is bounded by the memory budget (float32 + float64)
+        slice_bytes = shape[0] * shape[1] * n_volumes * 12
+        thickness = max(
+            1, int(self.inputs.max_memory_mb * 1024 ** 2 // slice_bytes)
+        )
+        slabs = [
+            (first, min(first + thickness, shape[2]))
+            for first in range(0, shape[2], thickness)
+        ]
+        jobs = [
+            (
+                self.inputs.in_file,
+                mask[:, :, first:last],
+                (first, last),
+                design,
+                self.inputs.chunk_size,
+            )
+            for first, last in slabs
+        ]
+        if self.inputs.n_procs > 1:
+            with ProcessPoolExecutor(self.inputs.n_procs) as executor:
+                slab_results = list(executor.map(fit_slab, *zip(*jobs)))
+        else:
+            slab_results = [fit_slab(*job) for job in jobs]
+
+        outputs = {
+            metric: np.zeros(
+                shape + (3,) if metric in VECTOR_METRICS else shape,
+                dtype=np.float32,
+            )
+            for metric in METRICS
+        }
+        for (first, last), results in zip(slabs, slab_results):
+            for metric, values in results.items():
+                slab = outputs[metric][:, :, first:last]
+                slab[mask[:, :, first:last]] = values
+
+        header = img.header.copy()
+        header.set_data_dtype(np.float32)
+        self._results["metrics"] = []
+        for metric in METRICS:
+            out_file = str(Path(runtime.cwd) / f"{metric}.nii.gz")
+            nb.Nifti1Image(
+                outputs.pop(metric), img.affine, header
+            ).to_filename(out_file)
+            self._results[f"out_{metric}"] = out_file
+            self._results["metrics"].append(out_file)
+
+        report = {
+            "n_voxels": int(mask.sum()),
+            "n_volumes": int(n_volumes),
+            "n_slabs": len(slabs),
+            "n_procs": self.inputs.n_procs,
+            "runtime_sec": round(time.time() - start_time, 3),
+            "peak_memory_mb": round(peak_memory_mb(), 1),
+            "peak_children_memory_mb": round(peak_memory_mb(True), 1),
+        }
+        LOGGER.info(f"Tensor fit: {report}")
+        report_file = Path(runtime.cwd) / "tensor_fit_report.json"
+        report_file.write_text(json.dumps(report, indent=2))
+        self._results["out_report"] = str(report_file)
+        return runtime
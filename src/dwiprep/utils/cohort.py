@@ -0,0 +1,367 @@
+"""
+A consolidated HDF5 store of cohort-level tensor metrics. Images sharing a
+grid (shape and affine) are stacked along a first "row" axis of chunked,
+compressed and resizable datasets, next to an index of their subjects.
+Requires *h5py* (``pip install dwiprep[cohort]``).
+"""
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+import nibabel as nb
+import numpy as np
+
+#: Decimals of affines compared to tell grids apart
+AFFINE_DECIMALS = 4
+
+#: Keys' prefixes of the spaces that can be exported (see ``OUTPUTS``)
+SPACES = ["native", "coreg", "std"]
+
+#: Rows and spatial extent of datasets' chunks, so that a region is read
+#: across many subjects from a few chunks
+ROWS_PER_CHUNK = 16
+SPATIAL_CHUNK = (32, 32, 32)
+
+
+def chunk_shape(shape: Tuple[int, ...]) -> Tuple[int, ...]:
+    """
+    Chunks of a metric's dataset: blocks of rows (subjects) by a spatial
+    block, holding all of the metric's components (i.e, eigenvectors).
+
+    Parameters
+    ----------
+    shape : Tuple[int, ...]
+        The metric's image's shape
+
+    Returns
+    -------
+    Tuple[int, ...]
+        The dataset's chunk shape
+    """
+    spatial = tuple(
+        min(size, chunk) for size, chunk in zip(shape[:3], SPATIAL_CHUNK)
+    )
+    return (ROWS_PER_CHUNK,) + spatial + tuple(shape[3:])
+
+
+def grid_key(img: nb.Nifti1Image) -> str:
+    """
+    Identifies an image's grid (spatial shape and rounded affine).
+
+    Parameters
+    ----------
+    img : nb.Nifti1Image
+        An image (only its header is used)
+
+    Returns
+    -------
+    str
+        ``grid-<hash>``
+    """
+    digest = hashlib.blake2b(digest_size=6)
+    digest.update(np.asarray(img.shape[:3], dtype=np.int64).tobytes())
+    digest.update(
+        np.round(img.affine, AFFINE_DECIMALS).astype(np.float64).tobytes()
+    )
+    return f"grid-{digest.hexdigest()}"
+
+
+def row_label(in_file: Union[Path, str], metric: str) -> str:
+    """
+    Labels an image's row by its file name, without the metric's entity.
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        A metric's image (i.e, ``sub-01_space-anat_desc-fa_epiref.nii.gz``)
+    metric : str
+        The metric (i.e, "fa")
+
+    Returns
+    -------
+    str
+        The row's label (i.e, ``sub-01_space-anat_epiref``)
+    """
+    return Path(in_file).name.split(".")[0].replace(f"_desc-{metric}", "")
+
+
+class CohortStore:
+    """
+    Stacks subjects' metrics into ``/<space>/<grid>/<metric>`` datasets of
+    shape (rows, *image's shape*), chunked by blocks of rows and space (see
+    *chunk_shape*). Each grid group holds the
+    row's ``subjects`` and ``labels`` and its ``affine`` (as attributes),
+    so new subjects can be appended incrementally and a single metric can
+    be read lazily across all subjects of a grid.
+    """
+
+    def __init__(
+        self,
+        path: Union[Path, str],
+        mode: str = "a",
+        compression: str = "gzip",
+        compression_opts: int = 4,
+    ) -> None:
+        """
+        Opens (or creates) a cohort store.
+
+        Parameters
+        ----------
+        path : Union[Path, str]
+            Path to the store (``.h5``)
+        mode : str, optional
+            *h5py* file mode, by default "a"
+        compression : str, optional
+            Datasets' compression filter (None for none), by default "gzip"
+        compression_opts : int, optional
+            Compression level, by default 4
+        """
+        import h5py
+
+        self.path = Path(path)
+        self.h5 = h5py.File(self.path, mode)
+        self.compression = compression
+        self.compression_opts = compression_opts if compression else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.h5.close()
+
+    def get_group(self, space: str, img: nb.Nifti1Image):
+        """
+        Locates (or creates) the group of an image's grid.
+
+        Parameters
+        ----------
+        space : str
+            Metrics' space (i.e, "coreg")
+        img : nb.Nifti1Image
+            An image of the grid
+
+        Returns
+        -------
+        h5py.Group
+            The grid's group
+        """
+        import h5py
+
+        name = f"{space}/{grid_key(img)}"
+        if name in self.h5:
+            return self.h5[name]
+        group = self.h5.create_group(name)
+        group.attrs["affine"] = img.affine
+        group.attrs["shape"] = img.shape[:3]
+        for index in ("subjects", "labels"):
+            group.create_dataset(
+                index,
+                shape=(0,),
+                maxshape=(None,),
+                dtype=h5py.string_dtype(),
+            )
+        return group
+
+    def append(
+        self,
+        subject_id: str,
+        files: Dict[str, Union[Path, str]],
+        space: str,
+        overwrite: bool = False,
+    ) -> Tuple[str, int]:
+        """
+        Appends a single row of metrics (sharing a grid) to the store.
+
+        Parameters
+        ----------
+        subject_id : str
+            Subject's label
+        files : Dict[str, Union[Path, str]]
+            Metrics' images by metric
+        space : str
+            Metrics' space (i.e, "coreg")
+        overwrite : bool, optional
+            Whether to overwrite a row with the same label, by default
+            False (the row is then kept as is)
+
+        Returns
+        -------
+        Tuple[str, int]
+            The row's group name and index
+        """
+        images = {metric: nb.load(str(f)) for metric, f in files.items()}
+        first_metric = next(iter(images))
+        group = self.get_group(space, images[first_metric])
+        label = row_label(files[first_metric], first_metric)
+        labels = list(group["labels"].asstr()[()])
+        if label in labels and not overwrite:
+            return group.name, labels.index(label)
+        row = labels.index(label) if label in labels else len(labels)
+        n_rows = max(row + 1, len(labels))
+        for index, value in (("subjects", subject_id), ("labels", label)):
+            group[index].resize((n_rows,))
+            group[index][row] = value
+        for metric, img in images.items():
+            if metric not in group:
+                group.create_dataset(
+                    metric,
+                    shape=(0,) + img.shape,
+                    maxshape=(None,) + img.shape,
+                    dtype=np.float32,
+                    chunks=chunk_shape(img.shape),
+                    compression=self.compression,
+                    compression_opts=self.compression_opts,
+                    fillvalue=np.nan,
+                )
+            dataset = group[metric]
+            if dataset.shape[0] < n_rows:
+                dataset.resize(n_rows, axis=0)
+            # a single decompression of each image
+            dataset[row] = np.asanyarray(img.dataobj, dtype=np.float32)
+        return group.name, row
+
+    def grids(self, space: str) -> List[str]:
+        """
+        Groups of a space's grids.
+
+        Parameters
+        ----------
+        space : str
+            Metrics' space
+
+        Returns
+        -------
+        List[str]
+            Groups' names (i.e, ``/coreg/grid-0123456789ab``)
+        """
+        if space not in self.h5:
+            return []
+        return [group.name for group in self.h5[space].values()]
+
+    def index(self, space: str = None):
+        """
+        The store's rows (i.e, to select subjects before reading).
+
+        Parameters
+        ----------
+        space : str, optional
+            Metrics' space, by default all
+
+        Returns
+        -------
+        pd.DataFrame
+            Rows' "space", "grid", "row", "subject" and "label"
+        """
+        import pandas as pd
+
+        rows = []
+        for current_space in [space] if space else list(self.h5):
+            for name in self.grids(current_space):
+                group = self.h5[name]
+                for row, (subject_id, label) in enumerate(
+                    zip(group["subjects"].asstr(), group["labels"].asstr())
+                ):
+                    rows.append(
+                        dict(
+                            space=current_space,
+                            grid=name,
+                            row=row,
+                            subject=subject_id,
+                            label=label,
+                        )
+                    )
+        return pd.DataFrame(
+            rows, columns=["space", "grid", "row", "subject", "label"]
+        )
+
+    def read(self, metric: str, grid: str):
+        """
+        A metric across all rows of a grid. The dataset is read lazily, i.e
+        a region across all subjects with ``store.read("fa", grid)[:, x]``.
+
+        Parameters
+        ----------
+        metric : str
+            Metric's name (i.e, "fa")
+        grid : str
+            Grid's group (see *grids*)
+
+        Returns
+        -------
+        Tuple[h5py.Dataset, List[str]]
+            The (rows, *shape) dataset and its rows' subjects
+        """
+        group = self.h5[grid]
+        return group[metric], list(group["subjects"].asstr()[()])
+
+
+def export_cohort(
+    path: Union[Path, str],
+    output_index,
+    subjects: Iterable[str] = None,
+    space: str = "std",
+    metrics: Iterable[str] = None,
+    **kwargs,
+) -> Path:
+    """
+    Packs subjects' tensor metrics (located by an *OutputIndex*) into a
+    cohort store, skipping rows that were already exported.
+
+    Parameters
+    ----------
+    path : Union[Path, str]
+        Path to the store (``.h5``), created or appended to
+    output_index : OutputIndex
+        Index of the derivatives (keyed by ``OUTPUTS``)
+    subjects : Iterable[str], optional
+        Subjects' labels, by default all indexed subjects
+    space : str, optional
+        One of ``SPACES``, by default "std" (a standard space shared by
+        all subjects)
+    metrics : Iterable[str], optional
+        Metrics to export, by default all of *METRICS*
+    **kwargs
+        Passed to *CohortStore*
+
+    Returns
+    -------
+    Path
+        Path to the store
+
+    Raises
+    ------
+    ValueError
+        If *space* is not one of ``SPACES``.
+    FileNotFoundError
+        If none of the subjects has metrics in *space* (the store is not
+        created).
+    """
+    from dwiprep.interfaces.tensor import METRICS
+
+    if space not in SPACES:
+        raise ValueError(f"Unknown space {space}, expected {SPACES}.")
+    metrics = list(METRICS if metrics is None else metrics)
+    subjects = output_index.subjects if subjects is None else subjects
+    rows = {}
+    for subject_id in subjects:
+        for metric in metrics:
+            for in_file in output_index.find(f"{space}_{metric}", subject_id):
+                label = row_label(in_file, metric)
+                rows.setdefault((subject_id, label), {})[metric] = in_file
+    if not rows:
+        raise FileNotFoundError(
+            f"No {space}-space tensor metrics were found for subjects "
+            f"{list(subjects)}"
+            + (
+                " (standard-space metrics require std_space_output)."
+                if space == "std"
+                else "."
+            )
+        )
+    with CohortStore(path, **kwargs) as store:
+        for (subject_id, _), files in rows.items():
+            store.append(subject_id, files, space)
+    return Path(path)
@@ -0,0 +1,161 @@
+"""
+Detection of complete (*smriprep*) anatomical derivatives, to be reused
+instead of running the anatomical preprocessing again.
+"""
+import re
+from pathlib import Path
+from typing import Iterable, List, Union
+
+#: Anatomical derivatives (*smriprep*'s outputs) by file name suffix
+ANAT_DERIVATIVES = {
+    "t1w_preproc": "desc-preproc_T1w.nii.gz",
+    "t1w_mask": "desc-brain_mask.nii.gz",
+    "t1w_dseg": "dseg.nii.gz",
+}
+
+#: Tissue probability maps, ordered as *smriprep*'s ``t1w_tpms`` output
+TPMS_TEMPLATE = "label-{tissue}_probseg.nii.gz"
+TISSUES = ["GM", "WM", "CSF"]
+
+#: Transforms from and to each standard template
+STD_XFMS = {
+    "anat2std_xfm": "from-T1w_to-{template}_mode-image_xfm.h5",
+    "std2anat_xfm": "from-{template}_to-T1w_mode-image_xfm.h5",
+}
+
+#: Derivatives of FreeSurfer's reconstruction
+FS_DERIVATIVES = {
+    "t1w_aseg": "desc-aseg_dseg.nii.gz",
+    "t1w_aparc": "desc-aparcaseg_dseg.nii.gz",
+    "t1w2fsnative_xfm": "from-T1w_to-fsnative_mode-image_xfm.txt",
+    "fsnative2t1w_xfm": "from-fsnative_to-T1w_mode-image_xfm.txt",
+}
+
+#: Files of a finished FreeSurfer reconstruction (under its subject)
+FS_DONE = ["scripts/recon-all.done", "mri/aseg.mgz", "mri/aparc+aseg.mgz"]
+
+
+def find_anat_derivative(
+    files: Iterable[str], subject_id: str, suffix: str, output_name: str
+) -> Union[str, None]:
+    """
+    Locates a subject's anatomical derivative, preferring the subject-level
+    (longitudinal) derivative over a session's.
+
+    Parameters
+    ----------
+    files : Iterable[str]
+        The subject's files (relative to the derivatives' destination)
+    subject_id : str
+        Subject's label
+    suffix : str
+        The derivative's entities and suffix (i.e, "dseg.nii.gz")
+    output_name : str
+        Pipeline's output directory (i.e, "dmriprep")
+
+    Returns
+    -------
+    Union[str, None]
+        The derivative's relative path, if it exists
+    """
+    pattern = re.compile(
+        rf"{re.escape(output_name)}/sub-{subject_id}/"
+        rf"(?:ses-[a-zA-Z0-9]+/)?anat/"
+        rf"sub-{subject_id}(?:_ses-[a-zA-Z0-9]+)?_{re.escape(suffix)}"
+    )
+    matches = sorted(f for f in files if pattern.fullmatch(str(f)))
+    return matches[0] if matches else None
+
+
+def is_fs_subject_done(subjects_dir: Union[Path, str], subject_id: str):
+    """
+    Whether a subject's FreeSurfer reconstruction finished.
+
+    Parameters
+    ----------
+    subjects_dir : Union[Path, str]
+        FreeSurfer's subjects directory
+    subject_id : str
+        Subject's label
+
+    Returns
+    -------
+    bool
+        Whether all of *FS_DONE* exist
+    """
+    subject_dir = Path(subjects_dir) / f"sub-{subject_id}"
+    return all((subject_dir / f).exists() for f in FS_DONE)
+
+
+def collect_anat_derivatives(
+    files: Iterable[str],
+    destination: Union[Path, str],
+    subject_id: str,
+    templates: List[str],
+    output_name: str = "dmriprep",
+    subjects_dir: Union[Path, str] = None,
+    freesurfer: bool = False,
+) -> Union[dict, None]:
+    """
+    Collects a subject's anatomical derivatives, keyed by the fields of
+    *smriprep*'s anatomical workflow's outputnode, if they are complete.
+
+    Parameters
+    ----------
+    files : Iterable[str]
+        The subject's files (relative to *destination*)
+    destination : Union[Path, str]
+        Derivatives' base directory
+    subject_id : str
+        Subject's label
+    templates : List[str]
+        Standard templates whose transforms are required
+    output_name : str, optional
+        Pipeline's output directory, by default "dmriprep"
+    subjects_dir : Union[Path, str], optional
+        FreeSurfer's subjects directory, by default ``freesurfer`` under
+        *destination*
+    freesurfer : bool, optional
+        Whether FreeSurfer's reconstruction (and its derivatives) is
+        required, by default False
+
+    Returns
+    -------
+    Union[dict, None]
+        Absolute paths by outputnode's field, or None if any required
+        derivative is missing
+    """
+    destination = Path(destination).absolute()
+    files = list(files)
+
+    def find(suffix: str) -> Union[str, None]:
+        path = find_anat_derivative(files, subject_id, suffix, output_name)
+        return str(destination / path) if path is not None else None
+
+    derivatives = {
+        field: find(suffix) for field, suffix in ANAT_DERIVATIVES.items()
+    }
+    derivatives["t1w_tpms"] = [
+        find(TPMS_TEMPLATE.format(tissue=tissue)) for tissue in TISSUES
+    ]
+    derivatives["template"] = list(templates)
+    for field, suffix in STD_XFMS.items():
+        derivatives[field] = [
+            find(suffix.format(template=template)) for template in templates
+        ]
+    if freesurfer:
+        subjects_dir = Path(
+            subjects_dir
+            if subjects_dir is not None
+            else destination / "freesurfer"
+        ).absolute()
+        if not is_fs_subject_done(subjects_dir, subject_id):
+            return None
+        derivatives["subjects_dir"] = str(subjects_dir)
+        for field, suffix in FS_DERIVATIVES.items():
+            derivatives[field] = find(suffix)
+    for value in derivatives.values():
+        values = value if isinstance(value, list) else [value]
+        if any(v is None for v in values):
+            return None
+    return derivatives
@@ -0,0 +1,331 @@
+"""
+Estimation of workflows' runtime and memory before running them, from
+the sizes of their images and a calibration table of per-node costs
+(fitted to profiles of earlier runs).
+"""
+import json
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+from pkg_resources import resource_filename as _pkgres
+
+#: Default calibration table (see its "description")
+CALIBRATION_FILE = "data/calibration.json"
+
+#: Fields of a node's cost model
+COST_FIELDS = ["seconds", "seconds_per_mvox", "mem_gb", "mem_gb_per_mvox"]
+
+
+def load_calibration(path: Union[Path, str] = None) -> dict:
+    """
+    Reads a calibration table.
+
+    Parameters
+    ----------
+    path : Union[Path, str], optional
+        Path to a calibration table, by default the package's
+
+    Returns
+    -------
+    dict
+        The table, with "default" and "nodes" costs
+    """
+    path = path if path is not None else _pkgres("dwiprep", CALIBRATION_FILE)
+    return json.loads(Path(path).read_text())
+
+
+def image_mvox(in_file: Union[Path, str]) -> float:
+    """
+    An image's size (voxels times volumes), read from its (cached) header
+    (see *dwiprep.utils.metadata.load_metadata*).
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        A MIF or NIfTI image
+
+    Returns
+    -------
+    float
+        Millions of voxels (of all volumes)
+    """
+    import numpy as np
+
+    from dwiprep.utils.metadata import load_metadata
+
+    return float(np.prod(load_metadata(in_file)["dim"])) / 1e6
+
+
+def match_cost(node_name: str, calibration: dict) -> dict:
+    """
+    Locates a node's cost model: the longest key of the table's "nodes"
+    matching either the node's dotted name or its own name.
+
+    Parameters
+    ----------
+    node_name : str
+        Node's dotted name (i.e, "dwi_preproc_wf.preprocess_wf.denoise")
+    calibration : dict
+        Calibration table
+
+    Returns
+    -------
+    dict
+        The node's cost model (the table's "default" if none matched)
+    """
+    leaf = node_name.split(".")[-1]
+    matches = [
+        key
+        for key in calibration.get("nodes", {})
+        if fnmatchcase(node_name, key) or fnmatchcase(leaf, key)
+    ]
+    if not matches:
+        return calibration["default"]
+    return calibration["nodes"][max(matches, key=len)]
+
+
+def estimate_node(
+    node_name: str, mvox: float, calibration: dict
+) -> Tuple[float, float]:
+    """
+    Estimates a node's runtime and memory.
+
+    Parameters
+    ----------
+    node_name : str
+        Node's dotted name
+    mvox : float
+        Size of the node's run (see *image_mvox*)
+    calibration : dict
+        Calibration table
+
+    Returns
+    -------
+    Tuple[float, float]
+        Runtime (seconds) and memory (GB)
+    """
+    cost = dict.fromkeys(COST_FIELDS, 0)
+    cost.update(match_cost(node_name, calibration))
+    return (
+        cost["seconds"] + cost["seconds_per_mvox"] * mvox,
+        cost["mem_gb"] + cost["mem_gb_per_mvox"] * mvox,
+    )
+
+
+def node_mvox(
+    node_name: str, sizes: Dict[str, float], default_mvox: float
+) -> float:
+    """
+    The size of a node's run, by the node's top-level workflow.
+
+    Parameters
+    ----------
+    node_name : str
+        Node's dotted name
+    sizes : Dict[str, float]
+        Sizes by top-level workflow's name
+    default_mvox : float
+        Size of nodes of other workflows
+
+    Returns
+    -------
+    float
+        Millions of voxels
+    """
+    return sizes.get(node_name.split(".")[0], default_mvox)
+
+
+def estimate_nodes(
+    node_names: Iterable[str],
+    sizes: Dict[str, float],
+    default_mvox: float,
+    calibration: dict,
+) -> List[dict]:
+    """
+    Estimates the runtime and memory of a workflow's nodes.
+
+    Parameters
+    ----------
+    node_names : Iterable[str]
+        Nodes' dotted names (i.e, ``workflow.list_node_names()``)
+    sizes : Dict[str, float]
+        Sizes by top-level workflow's name
+    default_mvox : float
+        Size of nodes of other workflows
+    calibration : dict
+        Calibration table
+
+    Returns
+    -------
+    List[dict]
+        A row per node: its "node" name, "run" (top-level workflow),
+        "mvox", "seconds" and "mem_gb"
+    """
+    rows = []
+    for node_name in node_names:
+        mvox = node_mvox(node_name, sizes, default_mvox)
+        seconds, mem_gb = estimate_node(node_name, mvox, calibration)
+        rows.append(
+            dict(
+                node=node_name,
+                run=node_name.split(".")[0],
+                mvox=mvox,
+                seconds=seconds,
+                mem_gb=mem_gb,
+            )
+        )
+    return rows
+
+
+def summarize_estimates(
+    rows: Iterable[dict], key: str = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Totals of estimated nodes (runtime, as if serial) and their peak memory.
+
+    Parameters
+    ----------
+    rows : Iterable[dict]
+        Nodes' estimates (see *estimate_nodes*)
+    key : str, optional
+        Field to group rows by (i.e, "run" or "subject"), by default all
+        rows are summarized together (under "total")
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        "nodes", "seconds" and (peak) "mem_gb" by group
+    """
+    summary = {}
+    for row in rows:
+        group = summary.setdefault(
+            row[key] if key else "total",
+            dict(nodes=0, seconds=0.0, mem_gb=0.0),
+        )
+        group["nodes"] += 1
+        group["seconds"] += row["seconds"]
+        group["mem_gb"] = max(group["mem_gb"], row["mem_gb"])
+    return summary
+
+
+def collect_profiles(
+    workflow_dir: Union[Path, str],
+    sizes: Dict[str, float],
+    default_mvox: float,
+) -> List[dict]:
+    """
+    Collects the runtime (and, if nipype's resource monitor was enabled,
+    the peak memory) of a run workflow's nodes from its working directory.
+
+    Parameters
+    ----------
+    workflow_dir : Union[Path, str]
+        The workflow's own working directory (``<base_dir>/<name>``)
+    sizes : Dict[str, float]
+        Sizes by top-level workflow's name
+    default_mvox : float
+        Size of nodes of other workflows
+
+    Returns
+    -------
+    List[dict]
+        A row per profiled node: its "node" name, "mvox", "seconds" and
+        "mem_gb" (None if unmonitored)
+    """
+    from nipype.utils.filemanip import loadpkl
+
+    workflow_dir = Path(workflow_dir)
+    rows = []
+    for result_file in sorted(workflow_dir.rglob("result_*.pklz")):
+        node_dir = result_file.parent.relative_to(workflow_dir)
+        if "mapflow" in node_dir.parts:
+            # map nodes' iterations are profiled with the map node
+            continue
+        try:
+            runtime = loadpkl(result_file).runtime
+        except Exception:
+            continue
+        # map nodes' runtimes are lists
+        runtimes = runtime if isinstance(runtime, list) else [runtime]
+        node_name = ".".join(node_dir.parts)
+        for runtime in runtimes:
+            seconds = getattr(runtime, "duration", None)
+            if seconds is None:
+                continue
+            rows.append(
+                dict(
+                    node=node_name,
+                    mvox=node_mvox(node_name, sizes, default_mvox),
+                    seconds=seconds,
+                    mem_gb=getattr(runtime, "mem_peak_gb", None),
+                )
+            )
+    return rows
+
+
+def fit_cost(mvox: List[float], values: List[float]) -> Tuple[float, float]:
+    """
+    Fits a linear (fixed plus per-mvox) cost to profiled values.
+
+    Parameters
+    ----------
+    mvox : List[float]
+        Profiled runs' sizes
+    values : List[float]
+        Profiled runtimes or memory
+
+    Returns
+    -------
+    Tuple[float, float]
+        Fixed cost and cost per mvox (non-negative; a single size only
+        yields a fixed cost)
+    """
+    import numpy as np
+
+    mvox, values = np.asarray(mvox, float), np.asarray(values, float)
+    if np.unique(mvox).size < 2:
+        return float(values.mean()), 0.0
+    slope, intercept = np.polyfit(mvox, values, 1)
+    if slope < 0:
+        return float(values.mean()), 0.0
+    if intercept < 0:
+        return 0.0, float(np.sum(mvox * values) / np.sum(mvox ** 2))
+    return float(intercept), float(slope)
+
+
+def calibrate(profiles: Iterable[dict], calibration: dict = None) -> dict:
+    """
+    Fits nodes' costs to profiles, updating (a copy of) a calibration table
+    with an entry per profiled node's own name.
+
+    Parameters
+    ----------
+    profiles : Iterable[dict]
+        Profiled nodes (see *collect_profiles*)
+    calibration : dict, optional
+        Table to update, by default the package's
+
+    Returns
+    -------
+    dict
+        The updated table
+    """
+    calibration = json.loads(json.dumps(calibration or load_calibration()))
+    by_node = {}
+    for row in profiles:
+        by_node.setdefault(row["node"].split(".")[-1], []).append(row)
+    for node_name, rows in by_node.items():
+        cost = dict(match_cost(node_name, calibration))
+        mvox = [row["mvox"] for row in rows]
+        cost["seconds"], cost["seconds_per_mvox"] = fit_cost(
+            mvox, [row["seconds"] for row in rows]
+        )
+        monitored = [row for row in rows if row["mem_gb"] is not None]
+        if monitored:
+            cost["mem_gb"], cost["mem_gb_per_mvox"] = fit_cost(
+                [row["mvox"] for row in monitored],
+                [row["mem_gb"] for row in monitored],
+            )
+        calibration.setdefault("nodes", {})[node_name] = cost
+    return calibration
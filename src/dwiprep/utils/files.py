@@ -0,0 +1,275 @@
+"""
+Copy-free placement of files: reflinks (copy-on-write clones) and
+hardlinks, with a regular copy as the last resort. Placed files may be
+recorded (with a fingerprint of their source) to skip unchanged rewrites.
+"""
+import errno
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Union
+
+#: Placement methods, from cheapest to most expensive
+COPY_MODES = ["reflink", "hardlink", "copy"]
+
+#: Linux's FICLONE ioctl request (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+#: Errors raised by filesystems that cannot clone or link a file
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EMLINK,
+}
+
+#: Bytes hashed at each end of a file for its (fast) fingerprint
+HASH_BYTES = 1024 ** 2
+
+
+def same_filesystem(src: Union[Path, str], dst: Union[Path, str]) -> bool:
+    """
+    Whether *src* and the folder of *dst* reside on the same filesystem
+    (device), as required by reflinks and hardlinks.
+
+    Parameters
+    ----------
+    src : Union[Path, str]
+        Existing file
+    dst : Union[Path, str]
+        Destination path (its parent folder must exist)
+
+    Returns
+    -------
+    bool
+        Whether both are on the same device
+    """
+    return os.stat(src).st_dev == os.stat(Path(dst).parent).st_dev
+
+
+def reflink(src: Union[Path, str], dst: Union[Path, str]):
+    """
+    Clones *src* into *dst* (copy-on-write, i.e on Btrfs or XFS), sharing
+    their data blocks until either is modified.
+
+    Parameters
+    ----------
+    src : Union[Path, str]
+        Existing file
+    dst : Union[Path, str]
+        Destination path (must not exist)
+
+    Raises
+    ------
+    OSError
+        If the filesystem (or platform) does not support cloning.
+    """
+    import fcntl
+
+    with open(src, "rb") as src_obj, open(dst, "xb") as dst_obj:
+        try:
+            fcntl.ioctl(dst_obj.fileno(), FICLONE, src_obj.fileno())
+        except OSError:
+            dst_obj.close()
+            os.unlink(dst)
+            raise
+
+
+def place_file(
+    src: Union[Path, str],
+    dst: Union[Path, str],
+    mode: str = "reflink",
+    writable: bool = False,
+) -> str:
+    """
+    Places *src* at *dst* using the cheapest available method, starting at
+    *mode* and falling back along ``COPY_MODES`` (reflink, then hardlink,
+    then copy). Links are only attempted within a single filesystem, and
+    hardlinks are skipped if *dst* is to be modified in place.
+
+    Parameters
+    ----------
+    src : Union[Path, str]
+        Existing file
+    dst : Union[Path, str]
+        Destination path (overwritten if it exists)
+    mode : str, optional
+        Cheapest method to try, by default "reflink"
+    writable : bool, optional
+        Whether *dst* will be modified in place, by default False
+
+    Returns
+    -------
+    str
+        The method that was used
+
+    Raises
+    ------
+    ValueError
+        If *mode* is not one of ``COPY_MODES``.
+    """
+    if mode not in COPY_MODES:
+        raise ValueError(f"Unknown copy mode {mode}, expected {COPY_MODES}.")
+    dst = Path(dst)
+    dst.parent.mkdir(exist_ok=True, parents=True)
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    methods = COPY_MODES[COPY_MODES.index(mode) :]
+    if writable:
+        methods = [method for method in methods if method != "hardlink"]
+    if not same_filesystem(src, dst):
+        methods = ["copy"]
+    for method in methods:
+        if place_with(src, dst, method):
+            return method
+
+
+def place_with(src: Union[Path, str], dst: Path, method: str) -> bool:
+    """
+    Places *src* at *dst* with a single method of ``COPY_MODES``.
+
+    Parameters
+    ----------
+    src : Union[Path, str]
+        Existing file
+    dst : Path
+        Destination path (that does not exist)
+    method : str
+        "reflink", "hardlink" or "copy"
+
+    Returns
+    -------
+    bool
+        Whether the method is supported (copies always are)
+    """
+    if method == "copy":
+        shutil.copyfile(src, dst)
+        return True
+    try:
+        if method == "reflink":
+            reflink(src, dst)
+        else:
+            os.link(src, dst)
+    except (OSError, ImportError) as e:
+        if isinstance(e, OSError) and e.errno not in UNSUPPORTED_ERRNOS:
+            raise
+        return False
+    return True
+
+
+def fingerprint(path: Union[Path, str], fast_hash: bool = False) -> dict:
+    """
+    Cheap fingerprint of a file: its size and modification time and,
+    optionally, a hash of its first and last ``HASH_BYTES``.
+
+    Parameters
+    ----------
+    path : Union[Path, str]
+        Existing file
+    fast_hash : bool, optional
+        Whether to hash the file's ends, by default False
+
+    Returns
+    -------
+    dict
+        The file's "size", "mtime_ns" and (optionally) "blake2b"
+    """
+    stat = os.stat(path)
+    result = dict(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    if fast_hash:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as fileobj:
+            digest.update(fileobj.read(HASH_BYTES))
+            if stat.st_size > 2 * HASH_BYTES:
+                fileobj.seek(-HASH_BYTES, os.SEEK_END)
+            digest.update(fileobj.read(HASH_BYTES))
+        result["blake2b"] = digest.hexdigest()
+    return result
+
+
+def same_fingerprint(first: dict, second: dict) -> bool:
+    """
+    Compares two fingerprints, by hash if both have one (ignoring
+    modification times) and by modification time otherwise.
+
+    Parameters
+    ----------
+    first : dict
+        A fingerprint (see *fingerprint*)
+    second : dict
+        Another fingerprint
+
+    Returns
+    -------
+    bool
+        Whether both describe the same content
+    """
+    if not first or not second or first["size"] != second["size"]:
+        return False
+    if "blake2b" in first and "blake2b" in second:
+        return first["blake2b"] == second["blake2b"]
+    return first["mtime_ns"] == second["mtime_ns"]
+
+
+def record_path(out_file: Union[Path, str]) -> Path:
+    """
+    Path of the (hidden) record of the last write of *out_file*.
+
+    Parameters
+    ----------
+    out_file : Union[Path, str]
+        A written file
+
+    Returns
+    -------
+    Path
+        ``.<name>.record.json``, next to *out_file*
+    """
+    out_file = Path(out_file)
+    return out_file.parent / f".{out_file.name}.record.json"
+
+
+def read_record(out_file: Union[Path, str]) -> dict:
+    """
+    Reads the record of the last write of *out_file*.
+
+    Parameters
+    ----------
+    out_file : Union[Path, str]
+        A written file
+
+    Returns
+    -------
+    dict
+        The record, or None if it is missing or unreadable
+    """
+    try:
+        return json.loads(record_path(out_file).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def write_record(out_file: Union[Path, str], record: dict) -> Path:
+    """
+    Records a write of *out_file*, along with its current fingerprint.
+
+    Parameters
+    ----------
+    out_file : Union[Path, str]
+        A freshly written file
+    record : dict
+        What was written (i.e, the source's fingerprint and options)
+
+    Returns
+    -------
+    Path
+        Path to the record
+    """
+    path = record_path(out_file)
+    record = dict(record, target=fingerprint(out_file))
+    path.write_text(json.dumps(record, sort_keys=True, default=str))
+    return path
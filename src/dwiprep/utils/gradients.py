@@ -0,0 +1,229 @@
+"""
+Shell-aware gradient table, loaded once per (bval, bvec) pair and cached.
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Union
+
+import numpy as np
+
+#: b-values below this threshold are considered b=0
+B0_THRESHOLD = 50
+
+#: Maximal difference between b-values of the same shell
+SHELL_TOLERANCE = 100
+
+
+class GradientTable:
+    #: b-values below this threshold are considered b=0
+    B0_THRESHOLD = B0_THRESHOLD
+
+    #: Maximal difference between b-values of the same shell
+    SHELL_TOLERANCE = SHELL_TOLERANCE
+
+    def __init__(
+        self,
+        bvals: Iterable[float],
+        bvecs: Iterable[Iterable[float]],
+        b0_threshold: float = B0_THRESHOLD,
+        shell_tolerance: float = SHELL_TOLERANCE,
+    ) -> None:
+        """
+        Initiates a gradient table and clusters its b-values into shells.
+
+        Parameters
+        ----------
+        bvals : Iterable[float]
+            (N,) b-values
+        bvecs : Iterable[Iterable[float]]
+            (3, N) gradient directions, as stored in FSL-formatted bvec files
+        b0_threshold : float, optional
+            b-values below this threshold are considered b=0,
+            by default B0_THRESHOLD
+        shell_tolerance : float, optional
+            Maximal difference between b-values of the same shell,
+            by default SHELL_TOLERANCE
+        """
+        self.bvals = np.asarray(bvals, dtype=float).ravel()
+        self.bvecs = np.asarray(bvecs, dtype=float).reshape(3, -1)
+        if self.bvecs.shape[1] != self.bvals.size:
+            raise ValueError(
+                f"Number of b-vectors ({self.bvecs.shape[1]}) does not match "
+                f"number of b-values ({self.bvals.size})."
+            )
+        self.b0_threshold = b0_threshold
+        self.shell_tolerance = shell_tolerance
+        self.shells, self.shell_labels = self.cluster_shells()
+
+    @classmethod
+    def from_files(
+        cls, in_bval: Union[Path, str], in_bvec: Union[Path, str]
+    ) -> "GradientTable":
+        """
+        Loads (or retrieves a cached) gradient table from FSL-formatted files.
+
+        Parameters
+        ----------
+        in_bval : Union[Path, str]
+            Path to a bval file
+        in_bvec : Union[Path, str]
+            Path to a bvec file
+
+        Returns
+        -------
+        GradientTable
+            The gradient table described by *in_bval* and *in_bvec*
+        """
+        return load_gradient_table(in_bval, in_bvec)
+
+    def cluster_shells(self):
+        """
+        Clusters b-values into shells by splitting the sorted b-values
+        wherever consecutive values differ by more than *shell_tolerance*
+        (b=0 volumes always form a shell of their own).
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Shells' (rounded mean) b-values and each volume's shell b-value.
+        """
+        bvals = np.where(self.bvals < self.b0_threshold, 0, self.bvals)
+        order = np.argsort(bvals, kind="stable")
+        sorted_bvals = bvals[order]
+        breaks = (np.diff(sorted_bvals) > self.shell_tolerance) | (
+            (sorted_bvals[:-1] == 0) & (sorted_bvals[1:] > 0)
+        )
+        labels = np.zeros(bvals.size, dtype=int)
+        labels[order] = np.r_[0, np.cumsum(breaks)]
+        shells = np.round(
+            np.bincount(labels, weights=bvals) / np.bincount(labels)
+        )
+        return shells, shells[labels]
+
+    def shell_indices(self, shells: Iterable[float]) -> np.ndarray:
+        """
+        Volume indices of the requested shells.
+
+        Parameters
+        ----------
+        shells : Iterable[float]
+            Shells' b-values (as in *self.shells*)
+
+        Returns
+        -------
+        np.ndarray
+            Indices of volumes that belong to any of *shells*
+        """
+        return np.flatnonzero(np.isin(self.shell_labels, list(shells)))
+
+    def select(
+        self,
+        max_bvalue: float = None,
+        min_bvalue: float = None,
+        include_b0: bool = True,
+    ) -> np.ndarray:
+        """
+        Volume indices of all shells within a range of b-values.
+
+        Parameters
+        ----------
+        max_bvalue : float, optional
+            Upper (inclusive) limit of shells' b-values, by default None
+        min_bvalue : float, optional
+            Lower (inclusive) limit of non-zero shells' b-values,
+            by default None
+        include_b0 : bool, optional
+            Whether to include b=0 volumes, by default True
+
+        Returns
+        -------
+        np.ndarray
+            Indices of the selected volumes
+        """
+        selected = np.ones(self.shell_labels.size, dtype=bool)
+        if max_bvalue is not None:
+            selected &= self.shell_labels <= max_bvalue
+        if min_bvalue is not None:
+            selected &= self.shell_labels >= min_bvalue
+        b0 = self.shell_labels == 0
+        selected = (selected & ~b0) | (b0 & include_b0)
+        return np.flatnonzero(selected)
+
+    @staticmethod
+    def to_coord(indices: Iterable[int]) -> str:
+        """
+        Formats volume indices for *mrtrix3*'s ``-coord 3`` option.
+
+        Parameters
+        ----------
+        indices : Iterable[int]
+            Volume indices
+
+        Returns
+        -------
+        str
+            Comma-separated indices
+        """
+        return ",".join(str(int(i)) for i in indices)
+
+    @property
+    def b0_indices(self) -> np.ndarray:
+        """
+        Indices of b=0 volumes.
+
+        Returns
+        -------
+        np.ndarray
+            Indices of b=0 volumes
+        """
+        return self.shell_indices([0])
+
+    @property
+    def is_multishell(self) -> bool:
+        """
+        Whether there is more than a single non-zero shell.
+
+        Returns
+        -------
+        bool
+            Whether there is more than a single non-zero shell
+        """
+        return int((self.shells > 0).sum()) > 1
+
+
+@lru_cache(maxsize=32)
+def _load_gradient_table(
+    in_bval: str, in_bvec: str, fingerprint: tuple
+) -> GradientTable:
+    return GradientTable(
+        np.loadtxt(in_bval, ndmin=1), np.loadtxt(in_bvec, ndmin=2)
+    )
+
+
+def load_gradient_table(
+    in_bval: Union[Path, str], in_bvec: Union[Path, str]
+) -> GradientTable:
+    """
+    Loads a gradient table, reading the files only if they changed since
+    the last call.
+
+    Parameters
+    ----------
+    in_bval : Union[Path, str]
+        Path to a bval file
+    in_bvec : Union[Path, str]
+        Path to a bvec file
+
+    Returns
+    -------
+    GradientTable
+        The gradient table described by *in_bval* and *in_bvec*
+    """
+    in_bval, in_bvec = str(Path(in_bval).absolute()), str(
+        Path(in_bvec).absolute()
+    )
+    fingerprint = tuple(
+        (stat.st_size, stat.st_mtime_ns)
+        for stat in (Path(in_bval).stat(), Path(in_bvec).stat())
+    )
+    return _load_gradient_table(in_bval, in_bvec, fingerprint)
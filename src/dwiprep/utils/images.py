@@ -0,0 +1,315 @@
+"""
+Low-level, memory-conscious NIfTI I/O helpers.
+"""
+import gzip
+import io
+import os
+import shutil
+import zlib
+from pathlib import Path
+from typing import Iterator, Tuple, Union
+
+import nibabel as nb
+import numpy as np
+
+#: Largest first gzip member re-deflated to patch a compressed header
+MAX_HEADER_MEMBER = 1024 ** 2
+
+#: Header fields that must match for a header to be patched in place (the
+#: data offset is compared separately, as loaded headers hold it unset)
+LAYOUT_FIELDS = ["sizeof_hdr", "dim", "datatype", "bitpix"]
+
+
+def allocate_nifti(
+    out_file: Union[Path, str],
+    header: nb.Nifti1Header,
+    shape: Tuple[int, ...],
+    dtype: Union[np.dtype, str] = np.float32,
+) -> np.memmap:
+    """
+    Writes an uncompressed NIfTI header and preallocates its data block,
+    so that the image can be filled in chunks through a memory map.
+
+    Parameters
+    ----------
+    out_file : Union[Path, str]
+        Output path (an uncompressed ``.nii`` file)
+    header : nb.Nifti1Header
+        Header to copy orientation and metadata from
+    shape : Tuple[int, ...]
+        Output image's shape
+    dtype : Union[np.dtype, str], optional
+        Output data type, by default np.float32
+
+    Returns
+    -------
+    np.memmap
+        A writable, Fortran-ordered memory map of the image's data block
+    """
+    header = nb.Nifti1Header.from_header(header)
+    del header.extensions[:]
+    header.set_data_shape(shape)
+    header.set_data_dtype(dtype)
+    header.set_slope_inter(1.0, 0.0)
+    header["vox_offset"] = 0
+    with open(out_file, "wb") as fileobj:
+        header.write_to(fileobj)
+        offset = header.get_data_offset()
+        n_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        fileobj.seek(offset + n_bytes - 1)
+        fileobj.write(b"\x00")
+    return np.memmap(
+        out_file,
+        dtype=header.get_data_dtype(),
+        mode="r+",
+        offset=offset,
+        shape=tuple(shape),
+        order="F",
+    )
+
+
+def decompress(
+    in_file: Union[Path, str], out_dir: Union[Path, str], chunk_mb: int = 64
+) -> Path:
+    """
+    Streams a gzipped NIfTI into an uncompressed copy (so that it can be
+    memory-mapped), without holding the data in memory.
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        A NIfTI image (returned as is if not compressed)
+    out_dir : Union[Path, str]
+        Directory of the uncompressed copy
+    chunk_mb : int, optional
+        Size of blocks copied at once, by default 64
+
+    Returns
+    -------
+    Path
+        Path to an uncompressed NIfTI
+    """
+    in_file = Path(in_file)
+    if not in_file.name.endswith(".gz"):
+        return in_file
+    out_file = Path(out_dir) / in_file.name[: -len(".gz")]
+    with gzip.open(in_file, "rb") as source, open(out_file, "wb") as target:
+        shutil.copyfileobj(source, target, chunk_mb * 1024 ** 2)
+    return out_file
+
+
+def compress(
+    in_file: Union[Path, str], out_file: Union[Path, str], chunk_mb: int = 64
+) -> Path:
+    """
+    Streams an uncompressed NIfTI into a gzipped copy written as two gzip
+    members: the header (and extensions) and the data block. The header
+    can thus be patched later without re-deflating the data (see
+    *patch_nifti_header*).
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        An uncompressed NIfTI image
+    out_file : Union[Path, str]
+        Output path (``.nii.gz``)
+    chunk_mb : int, optional
+        Size of blocks compressed at once, by default 64
+
+    Returns
+    -------
+    Path
+        Path to the compressed NIfTI
+    """
+    # loaded headers leave vox_offset unset; the proxy holds the real one
+    offset = int(nb.load(str(in_file)).dataobj.offset)
+    with open(in_file, "rb") as source, open(out_file, "wb") as target:
+        target.write(gzip.compress(source.read(offset), mtime=0))
+        with gzip.GzipFile(fileobj=target, mode="wb", mtime=0) as member:
+            shutil.copyfileobj(source, member, chunk_mb * 1024 ** 2)
+    return Path(out_file)
+
+
+def iter_slabs(
+    shape: Tuple[int, ...], itemsize: int, chunk_mb: int = 64
+) -> Iterator[slice]:
+    """
+    Splits an image's last axis into slabs (i.e, slices of a 3D image or
+    volumes of a 4D one) of about *chunk_mb* each. Slabs are contiguous
+    on disk, as NIfTI data is stored in Fortran order.
+
+    Parameters
+    ----------
+    shape : Tuple[int, ...]
+        Image's shape
+    itemsize : int
+        Bytes per (in-memory) voxel
+    chunk_mb : int, optional
+        Size of a slab, by default 64
+
+    Yields
+    ------
+    slice
+        Indices of a single slab along the last axis
+    """
+    slab_bytes = int(np.prod(shape[:-1])) * itemsize
+    step = int(max(1, chunk_mb * 1024 ** 2 // max(slab_bytes, 1)))
+    for start in range(0, shape[-1], step):
+        yield slice(start, min(start + step, shape[-1]))
+
+
+def write_coerced_nifti(
+    in_file: Union[Path, str],
+    out_file: Union[Path, str],
+    header: nb.Nifti1Header,
+    chunk_mb: int = 64,
+) -> Path:
+    """
+    Streams an image's (scaled) data into a new NIfTI, coerced to
+    *header*'s data type slab by slab, so that only a single slab is held
+    in memory. Values are rounded for integer types. Compressed outputs
+    are written as header and data gzip members (see *compress*).
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        A NIfTI image
+    out_file : Union[Path, str]
+        Output path (``.nii`` or ``.nii.gz``)
+    header : nb.Nifti1Header
+        Output header, sharing the image's shape
+    chunk_mb : int, optional
+        Size of slabs coerced at once (as float64), by default 64
+
+    Returns
+    -------
+    Path
+        Path to the coerced NIfTI
+    """
+    img = nb.load(str(in_file))
+    header = header.copy()
+    header.set_slope_inter(1.0, 0.0)
+    offset = header.single_vox_offset + header.extensions.get_sizeondisk()
+    header.set_data_offset(max(offset, header.get_data_offset()))
+    dtype = header.get_data_dtype()
+    is_integer = np.issubdtype(dtype, np.integer)
+
+    out_file = Path(out_file)
+    with open(out_file, "wb") as fileobj:
+        head = io.BytesIO()
+        header.write_to(head)
+        head = head.getvalue().ljust(int(header.get_data_offset()), b"\x00")
+        if out_file.name.endswith(".gz"):
+            fileobj.write(gzip.compress(head, mtime=0))
+            target = gzip.GzipFile(fileobj=fileobj, mode="wb", mtime=0)
+        else:
+            fileobj.write(head)
+            target = fileobj
+        for slab in iter_slabs(img.shape, 8, chunk_mb):
+            values = img.dataobj[..., slab]
+            if is_integer:
+                values = np.rint(values)
+            target.write(values.astype(dtype).tobytes(order="F"))
+        if target is not fileobj:
+            target.close()
+    return out_file
+
+
+def read_first_gzip_member(
+    in_file: Union[Path, str], max_size: int = MAX_HEADER_MEMBER
+) -> Tuple[bytes, int]:
+    """
+    Decompresses the first member of a (possibly multi-member) gzip file.
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        A gzip file
+    max_size : int, optional
+        Largest (uncompressed) member to read, by default MAX_HEADER_MEMBER
+
+    Returns
+    -------
+    Tuple[bytes, int]
+        The member's content and its compressed size, or None if it is
+        larger than *max_size* (i.e, the whole file is a single member)
+    """
+    decompressor = zlib.decompressobj(wbits=31)
+    data, n_read = b"", 0
+    with open(in_file, "rb") as fileobj:
+        while not decompressor.eof:
+            chunk = decompressor.unconsumed_tail
+            if not chunk:
+                chunk = fileobj.read(64 * 1024)
+                n_read += len(chunk)
+            if not chunk:
+                return None
+            data += decompressor.decompress(chunk, max_size + 1 - len(data))
+            if len(data) > max_size:
+                return None
+    return data, n_read - len(decompressor.unused_data)
+
+
+def patch_nifti_header(
+    in_file: Union[Path, str], header: nb.Nifti1Header
+) -> bool:
+    """
+    Overwrites the header of an existing NIfTI image without reading or
+    rewriting its data. Uncompressed images are patched in place; for
+    compressed images only the first gzip member is re-deflated, so the
+    patch is cheap only if it holds the header alone (see *compress*).
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        A NIfTI image (modified in place)
+    header : nb.Nifti1Header
+        The new header, sharing the image's data layout (i.e, only its
+        orientation codes or units differ)
+
+    Returns
+    -------
+    bool
+        Whether the header was patched (False if the layouts differ or the
+        first gzip member is too large)
+    """
+    in_file = Path(in_file)
+    block_size = header.sizeof_hdr
+    if in_file.name.endswith(".gz"):
+        member = read_first_gzip_member(in_file)
+        if member is None:
+            return False
+        data, member_size = member
+    else:
+        with open(in_file, "rb") as fileobj:
+            data = fileobj.read(block_size)
+    if len(data) < block_size:
+        return False
+    current = header.__class__(
+        binaryblock=data[:block_size],
+        endianness=header.endianness,
+        check=False,
+    )
+    if any(
+        np.any(current[field] != header[field]) for field in LAYOUT_FIELDS
+    ):
+        return False
+    # a vox_offset of 0 is unset (nibabel computes it when saving)
+    offset = current.get_data_offset()
+    if header.get_data_offset() not in (0, offset):
+        return False
+    header = header.copy()
+    header.set_data_offset(offset)
+    block = header.binaryblock
+
+    if not in_file.name.endswith(".gz"):
+        with open(in_file, "r+b") as fileobj:
+            fileobj.write(block)
+        return True
+    tmp_file = in_file.with_name(f".{in_file.name}.tmp")
+    with open(in_file, "rb") as source, open(tmp_file, "wb") as target:
+        target.write(gzip.compress(block + data[len(block) :], mtime=0))
+        source.seek(member_size)
+        shutil.copyfileobj(source, target)
+    os.replace(tmp_file, in_file)
+    return True
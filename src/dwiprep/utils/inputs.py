@@ -13,9 +13,13 @@ INPUT_FIELDS = [
     "fmap_ap_json",
     "fmap_pa",
     "fmap_pa_json",
+    "merged_phasediff",
+    "topup_prefix",
     # From anatomical
     "t1w_preproc",
     "t1w_mask",
+    "t1w_brain",
+    "t1w_wm_mask",
     "t1w_dseg",
     "t1w_aseg",
     "t1w_aparc",
@@ -42,9 +46,13 @@ INPUTNODE = pe.Node(
             "fmap_ap_json",
             "fmap_pa",
             "fmap_pa_json",
+            "merged_phasediff",
+            "topup_prefix",
             # From anatomical
             "t1w_preproc",
             "t1w_mask",
+            "t1w_brain",
+            "t1w_wm_mask",
             "t1w_dseg",
             "t1w_aseg",
             "t1w_aparc",
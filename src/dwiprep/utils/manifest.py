@@ -0,0 +1,359 @@
+"""
+Per-subject manifests of derivatives: JSON lines of files (relative to the
+derivatives' base directory), appended by the sinks so outputs can be
+located without walking the derivatives tree. A new manifest is seeded with
+a single walk of its subject's tree, and entries whose files were removed
+are pruned when read.
+"""
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Pattern, Union
+
+#: Manifests' directory, relative to the base directory
+MANIFEST_DIR = ".manifests"
+
+#: A subject's directory (or file name prefix) in a relative path
+SUBJECT_PATTERN = re.compile(r"(?:^|/)sub-([a-zA-Z0-9]+)(?=[/_.]|$)")
+
+
+def manifest_path(base_directory: Union[Path, str], subject: str) -> Path:
+    """
+    Path to a subject's manifest.
+
+    Parameters
+    ----------
+    base_directory : Union[Path, str]
+        Derivatives' base directory (i.e, *destination*)
+    subject : str
+        Subject's label (without "sub-")
+
+    Returns
+    -------
+    Path
+        ``<base_directory>/.manifests/sub-<subject>.jsonl``
+    """
+    return Path(base_directory) / MANIFEST_DIR / f"sub-{subject}.jsonl"
+
+
+def get_subject(relative_path: str) -> str:
+    """
+    Subject's label of a derivative, from its path.
+
+    Parameters
+    ----------
+    relative_path : str
+        Derivative's path, relative to the base directory
+
+    Returns
+    -------
+    str
+        Subject's label, or None if the path holds none
+    """
+    match = SUBJECT_PATTERN.search(Path(relative_path).as_posix())
+    return match.group(1) if match else None
+
+
+def read_manifest(
+    base_directory: Union[Path, str], subject: str
+) -> List[str]:
+    """
+    Reads a subject's manifest (without locking it, so read-only trees can
+    be read), skipping entries whose files no longer exist. The manifest
+    itself is pruned by *append_manifest*.
+
+    Parameters
+    ----------
+    base_directory : Union[Path, str]
+        Derivatives' base directory
+    subject : str
+        Subject's label
+
+    Returns
+    -------
+    List[str]
+        Recorded files (relative to *base_directory*, in order of first
+        record), or None if the subject has no manifest
+    """
+    path = manifest_path(base_directory, subject)
+    if not path.exists():
+        return None
+    with open(path) as fileobj:
+        files = parse_manifest(fileobj)
+    return [f for f in files if (Path(base_directory) / f).exists()]
+
+
+def parse_manifest(fileobj) -> List[str]:
+    """
+    Parses a manifest's lines, skipping malformed (i.e, partially written)
+    ones.
+
+    Parameters
+    ----------
+    fileobj
+        An open manifest
+
+    Returns
+    -------
+    List[str]
+        Recorded files, in order of first record
+    """
+    files = {}
+    for line in fileobj:
+        try:
+            files.setdefault(json.loads(line)["path"])
+        except (ValueError, KeyError):
+            continue
+    return list(files)
+
+
+def write_manifest(
+    base_directory: Union[Path, str], subject: str, files: Iterable[str]
+) -> Path:
+    """
+    (Over)writes a subject's manifest.
+
+    Parameters
+    ----------
+    base_directory : Union[Path, str]
+        Derivatives' base directory
+    subject : str
+        Subject's label
+    files : Iterable[str]
+        Files, relative to *base_directory*
+
+    Returns
+    -------
+    Path
+        Path to the manifest
+    """
+    path = manifest_path(base_directory, subject)
+    path.parent.mkdir(exist_ok=True, parents=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(
+        "".join(json.dumps(dict(path=f)) + "\n" for f in files)
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def append_manifest(
+    base_directory: Union[Path, str], out_files: Iterable[Union[Path, str]]
+) -> List[Path]:
+    """
+    Records written derivatives in their subjects' manifests. Files that are
+    already recorded (or hold no subject) are ignored, entries of removed
+    files are pruned, and a subject's new manifest is first seeded with its
+    existing files (see *index_tree*) so it does not hide outputs written
+    before it.
+
+    Parameters
+    ----------
+    base_directory : Union[Path, str]
+        Derivatives' base directory
+    out_files : Iterable[Union[Path, str]]
+        Written files (absolute, or relative to *base_directory*)
+
+    Returns
+    -------
+    List[Path]
+        Paths to the updated manifests
+    """
+    import fcntl
+
+    base_directory = Path(base_directory).absolute()
+    by_subject = {}
+    for out_file in out_files:
+        relative_path = os.path.relpath(
+            base_directory / out_file, base_directory
+        )
+        subject = get_subject(relative_path)
+        if subject is not None:
+            by_subject.setdefault(subject, []).append(relative_path)
+
+    updated = []
+    for subject, files in by_subject.items():
+        path = manifest_path(base_directory, subject)
+        path.parent.mkdir(exist_ok=True, parents=True)
+        with open(path, "a+") as fileobj:
+            # sinks of a subject may run concurrently
+            fcntl.flock(fileobj, fcntl.LOCK_EX)
+            fileobj.seek(0)
+            recorded = parse_manifest(fileobj)
+            if not os.fstat(fileobj.fileno()).st_size:
+                # the walk lists the (already written) files themselves
+                files = index_tree(base_directory, [subject])[subject] + files
+            existing = [f for f in recorded if (base_directory / f).exists()]
+            if len(existing) < len(recorded):
+                # entries of removed files are pruned in place (while locked)
+                fileobj.truncate(0)
+                files, recorded = existing + files, []
+            lines = [
+                json.dumps(dict(path=f)) + "\n"
+                for f in dict.fromkeys(files)
+                if f not in recorded
+            ]
+            if lines:
+                fileobj.write("".join(lines))
+                updated.append(path)
+    return updated
+
+
+def index_tree(
+    base_directory: Union[Path, str], subjects: Iterable[str] = None
+) -> Dict[str, List[str]]:
+    """
+    Lists the derivatives of some (or all) subjects in a single
+    ``os.scandir`` walk, i.e to build manifests of legacy trees. Hidden
+    directories and directories of other subjects are not entered.
+
+    Parameters
+    ----------
+    base_directory : Union[Path, str]
+        Derivatives' base directory
+    subjects : Iterable[str], optional
+        Subjects' labels, by default all
+
+    Returns
+    -------
+    Dict[str, List[str]]
+        Files (relative to *base_directory*) by subject
+    """
+    base_directory = Path(base_directory).absolute()
+    subjects = None if subjects is None else set(subjects)
+    index = {} if subjects is None else {s: [] for s in subjects}
+    stack = [(str(base_directory), "", None)]
+    while stack:
+        directory, relative, subject = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.name.startswith("."):
+                continue
+            relative_path = f"{relative}{entry.name}"
+            entry_subject = subject
+            if subject is None and entry.name.startswith("sub-"):
+                entry_subject = get_subject(relative_path)
+            if entry.is_dir(follow_symlinks=False):
+                if subjects is None or entry_subject in (None, *subjects):
+                    stack.append(
+                        (entry.path, f"{relative_path}/", entry_subject)
+                    )
+            elif entry_subject is not None and (
+                subjects is None or entry_subject in subjects
+            ):
+                index.setdefault(entry_subject, []).append(relative_path)
+    return index
+
+
+def index_subject(
+    base_directory: Union[Path, str], subject: str
+) -> List[str]:
+    """
+    Rebuilds a subject's manifest from a single walk of the tree.
+
+    Parameters
+    ----------
+    base_directory : Union[Path, str]
+        Derivatives' base directory
+    subject : str
+        Subject's label
+
+    Returns
+    -------
+    List[str]
+        The subject's files, relative to *base_directory*
+    """
+    files = index_tree(base_directory, [subject])[subject]
+    write_manifest(base_directory, subject, files)
+    return files
+
+
+def load_manifest(
+    base_directory: Union[Path, str], subject: str
+) -> List[str]:
+    """
+    A subject's recorded derivatives, indexing the subject's tree (once) if
+    the subject has no manifest yet.
+
+    Parameters
+    ----------
+    base_directory : Union[Path, str]
+        Derivatives' base directory
+    subject : str
+        Subject's label
+
+    Returns
+    -------
+    List[str]
+        The subject's files, relative to *base_directory*
+    """
+    files = read_manifest(base_directory, subject)
+    if files is None:
+        files = index_subject(base_directory, subject)
+    return files
+
+
+def glob_to_regex(pattern: str) -> Pattern:
+    """
+    Translates a glob pattern into a regular expression with the semantics
+    of ``Path.rglob`` (``*`` stays within a path component, ``**`` matches
+    any number of directories, and the pattern may start at any depth).
+
+    Parameters
+    ----------
+    pattern : str
+        A glob pattern (i.e, ``dmriprep/**/anat/sub-01_*_T1w.nii.gz``)
+
+    Returns
+    -------
+    Pattern
+        A compiled expression, to be matched against relative paths
+    """
+    any_directories = "(?:[^/]+/)*"
+    regex = any_directories
+    for part in pattern.strip("/").split("/"):
+        if part == "**":
+            regex += any_directories
+            continue
+        for token in re.split(r"(\*|\?|\[[^\]]+\])", part):
+            if token == "*":
+                regex += "[^/]*"
+            elif token == "?":
+                regex += "[^/]"
+            elif token.startswith("[") and token.endswith("]"):
+                regex += token.replace("[!", "[^", 1)
+            else:
+                regex += re.escape(token)
+        regex += "/"
+    return re.compile(regex[:-1] + r"\Z")
+
+
+def match_manifest(
+    files: Iterable[str],
+    pattern: str,
+    base_directory: Union[Path, str] = None,
+) -> List[Path]:
+    """
+    Selects a manifest's files that match a glob pattern.
+
+    Parameters
+    ----------
+    files : Iterable[str]
+        Files, relative to *base_directory*
+    pattern : str
+        A glob pattern (see *glob_to_regex*)
+    base_directory : Union[Path, str], optional
+        Prefix of returned paths, by default None
+
+    Returns
+    -------
+    List[Path]
+        Matching files
+    """
+    regex = glob_to_regex(pattern)
+    base_directory = Path(base_directory or "")
+    return [base_directory / f for f in files if regex.match(f)]
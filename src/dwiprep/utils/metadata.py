@@ -0,0 +1,303 @@
+"""
+Image metadata service: parses *mrtrix3* (MIF) headers and BIDS JSON
+sidecars in Python and caches the results per file fingerprint.
+"""
+import gzip
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+#: Extensions of *mrtrix3* image formats
+MIF_EXTENSIONS = [".mif", ".mih", ".mif.gz"]
+
+#: Extensions of NIfTI images
+NIFTI_EXTENSIONS = [".nii", ".nii.gz"]
+
+#: Header keys parsed into numeric lists
+NUMERIC_KEYS = ["dim", "vox", "scaling"]
+
+#: Header keys spanning several lines (one row per line)
+MATRIX_KEYS = ["transform", "dw_scheme", "pe_scheme"]
+
+#: Phase encoding axes and their BIDS labels
+PE_AXES = ["i", "j", "k"]
+
+
+def split_extension(in_file: Union[Path, str]) -> tuple:
+    """
+    Splits a file name into its stem and (possibly double) extension.
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        File to split
+
+    Returns
+    -------
+    tuple
+        Path without extension and the extension (i.e, ".nii.gz")
+    """
+    in_file = Path(in_file)
+    extensions = sorted(MIF_EXTENSIONS + NIFTI_EXTENSIONS, key=len)
+    for extension in reversed(extensions):
+        if in_file.name.endswith(extension):
+            return in_file.parent / in_file.name[: -len(extension)], extension
+    return in_file.with_suffix(""), in_file.suffix
+
+
+def read_mif_header(in_file: Union[Path, str]) -> dict:
+    """
+    Parses the textual header of a MIF/MIH image without reading its data.
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        *mrtrix3* image (``.mif``, ``.mih`` or ``.mif.gz``)
+
+    Returns
+    -------
+    dict
+        Header keys and values; numeric keys are parsed into lists and
+        matrix keys into lists of rows.
+    """
+    opener = gzip.open if str(in_file).endswith(".gz") else open
+    header = {}
+    with opener(in_file, "rb") as fileobj:
+        if not fileobj.readline().startswith(b"mrtrix image"):
+            raise ValueError(f"{in_file} is not a valid MIF image.")
+        for line in fileobj:
+            line = line.decode("utf-8", errors="replace").strip()
+            if line == "END":
+                break
+            key, _, value = line.partition(":")
+            key, value = key.strip(), value.strip()
+            if key in NUMERIC_KEYS:
+                header[key] = [float(item) for item in value.split(",")]
+            elif key in MATRIX_KEYS:
+                row = [float(item) for item in value.split(",")]
+                header.setdefault(key, []).append(row)
+            elif key in header:
+                header[key] = f"{header[key]}\n{value}"
+            else:
+                header[key] = value
+    if "dim" in header:
+        header["dim"] = [int(dim) for dim in header["dim"]]
+    return header
+
+
+def read_json_sidecar(in_file: Union[Path, str]) -> dict:
+    """
+    Reads the BIDS JSON sidecar accompanying an image, if there is one.
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        Image (or the sidecar itself)
+
+    Returns
+    -------
+    dict
+        Sidecar's content (empty if there is no sidecar).
+    """
+    stem, _ = split_extension(in_file)
+    sidecar = stem.with_name(stem.name + ".json")
+    if not sidecar.exists():
+        return {}
+    return json.loads(sidecar.read_text())
+
+
+def phase_encoding_from_scheme(pe_scheme: list) -> tuple:
+    """
+    Derives a BIDS phase encoding direction and readout time from a
+    (uniform) *mrtrix3* phase encoding scheme.
+
+    Parameters
+    ----------
+    pe_scheme : list
+        Rows of [x, y, z, readout time], one per volume
+
+    Returns
+    -------
+    tuple
+        Phase encoding direction (i.e, "j-") and total readout time, or
+        Nones if the scheme varies across volumes.
+    """
+    rows = np.unique(np.asarray(pe_scheme, dtype=float), axis=0)
+    if len(rows) != 1:
+        return None, None
+    direction = rows[0, :3]
+    axis = int(np.argmax(np.abs(direction)))
+    label = PE_AXES[axis] + ("-" if direction[axis] < 0 else "")
+    readout = float(rows[0, 3]) if rows.shape[1] > 3 else None
+    return label, readout
+
+
+@lru_cache(maxsize=128)
+def _load_metadata(in_file: str, fingerprint: tuple) -> dict:
+    _, extension = split_extension(in_file)
+    metadata = read_json_sidecar(in_file)
+    if extension in MIF_EXTENSIONS:
+        header = read_mif_header(in_file)
+        metadata.update(header)
+        if "pe_scheme" in header:
+            direction, readout = phase_encoding_from_scheme(
+                header["pe_scheme"]
+            )
+            metadata.setdefault("PhaseEncodingDirection", direction)
+            metadata.setdefault("TotalReadoutTime", readout)
+    elif extension in NIFTI_EXTENSIONS:
+        import nibabel as nb
+
+        img = nb.load(in_file)
+        metadata["dim"] = [int(dim) for dim in img.shape]
+        metadata["vox"] = [float(zoom) for zoom in img.header.get_zooms()]
+    if "TotalReadoutTime" in metadata and metadata["TotalReadoutTime"]:
+        metadata["TotalReadoutTime"] = float(metadata["TotalReadoutTime"])
+    dims = metadata.get("dim", [])
+    metadata["n_volumes"] = dims[3] if len(dims) > 3 else 1
+    return metadata
+
+
+def load_metadata(in_file: Union[Path, str]) -> dict:
+    """
+    Loads an image's metadata (header and JSON sidecar), parsing the files
+    only if they changed since the last call.
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        A MIF or NIfTI image
+
+    Returns
+    -------
+    dict
+        Image metadata, including at least ``dim``, ``n_volumes`` and
+        (where available) ``PhaseEncodingDirection`` and
+        ``TotalReadoutTime``.
+    """
+    in_file = Path(in_file).absolute()
+    stem, _ = split_extension(in_file)
+    fingerprint = tuple(
+        (path.stat().st_size, path.stat().st_mtime_ns)
+        for path in (in_file, stem.with_name(stem.name + ".json"))
+        if path.exists()
+    )
+    return dict(_load_metadata(str(in_file), fingerprint))
+
+
+def get_phase_encoding_direction(in_file: Union[Path, str]) -> str:
+    """
+    Phase encoding direction of an image, in BIDS (i.e, "j-") format.
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        A MIF or NIfTI image
+
+    Returns
+    -------
+    str
+        Phase encoding direction (None if unavailable).
+    """
+    return load_metadata(in_file).get("PhaseEncodingDirection")
+
+
+def get_total_readout_time(in_file: Union[Path, str]) -> float:
+    """
+    Total readout time of an image, in seconds.
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        A MIF or NIfTI image
+
+    Returns
+    -------
+    float
+        Total readout time (None if unavailable).
+    """
+    return load_metadata(in_file).get("TotalReadoutTime")
+
+
+def infer_phase_encoding_direction_mif(in_file: str) -> str:
+    """
+    Reads the phase encoding direction stored in *in_file*'s header.
+    Self-contained, so it can be wrapped by a *nipype* Function node.
+
+    Parameters
+    ----------
+    in_file : str
+        File to query
+
+    Returns
+    -------
+    str
+        Phase Encoding Direction as denoted in *in_file*`s header.
+    """
+    from dwiprep.utils.metadata import get_phase_encoding_direction
+
+    return get_phase_encoding_direction(in_file)
+
+
+def get_acqparams(in_file: Union[Path, str]) -> np.ndarray:
+    """
+    Acquisition parameters of an image in *topup*/*eddy* format: one row
+    of [x, y, z, total readout time] per volume.
+
+    Parameters
+    ----------
+    in_file : Union[Path, str]
+        A MIF image with a phase encoding scheme, or a NIfTI image with a
+        ``PhaseEncodingDirection`` and ``TotalReadoutTime`` sidecar
+
+    Returns
+    -------
+    np.ndarray
+        (n_volumes, 4) acquisition parameters
+
+    Raises
+    ------
+    ValueError
+        If *in_file*'s phase encoding is unknown.
+    """
+    metadata = load_metadata(in_file)
+    if "pe_scheme" in metadata:
+        return np.asarray(metadata["pe_scheme"], dtype=float)
+    direction = metadata.get("PhaseEncodingDirection")
+    readout = metadata.get("TotalReadoutTime")
+    if not direction or not readout:
+        raise ValueError(f"Unknown phase encoding of {in_file}.")
+    row = np.zeros(4)
+    row[PE_AXES.index(direction[0])] = -1 if direction.endswith("-") else 1
+    row[3] = readout
+    return np.tile(row, (metadata["n_volumes"], 1))
+
+
+def write_acqparams(in_file: str) -> str:
+    """
+    Writes *in_file*'s acquisition parameters (i.e, for *topup*) to the
+    current directory. Self-contained, so it can be wrapped by a *nipype*
+    Function node.
+
+    Parameters
+    ----------
+    in_file : str
+        A MIF image with a phase encoding scheme
+
+    Returns
+    -------
+    str
+        Path to the acquisition parameters file
+    """
+    from pathlib import Path
+
+    import numpy as np
+
+    from dwiprep.utils.metadata import get_acqparams
+
+    out_file = Path("acqparams.txt").absolute()
+    np.savetxt(out_file, get_acqparams(in_file), fmt="%g")
+    return str(out_file)
@@ -0,0 +1,287 @@
+"""
+A cached index of a derivatives directory, answering output lookups (by
+key, subject and session) without walking the tree for each of them.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Union
+
+from dwiprep.utils.manifest import index_tree, load_manifest, match_manifest
+
+#: Pipeline (i.e, smriprep or dmriprep) output pattern
+OUTPUT_PATTERN: str = (
+    "{main_dir}/**/{sub_dir}/sub-{subject_id}_{session_id}_{output_id}"
+)
+
+#: FreeSurfer output pattern
+FS_OUTPUT_PATTERN: str = "{main_dir}/sub-{subject_id}/**/*{output_id}"
+
+
+class OutputIndex:
+    """
+    Locates the outputs described by an ``OUTPUTS`` dictionary (key to
+    main directory, sub-directory and file name pattern) under
+    *destination*.
+
+    Subjects' files are read from their manifests (see
+    *dwiprep.utils.manifest*), which are seeded with a single walk of the
+    subject's tree if missing. Without manifests, a single walk of
+    *destination* indexes all subjects at once. Files and matched outputs
+    are cached until invalidated.
+    """
+
+    def __init__(
+        self,
+        destination: Union[Path, str],
+        outputs: dict,
+        output_pattern: str = OUTPUT_PATTERN,
+        fs_output_pattern: str = FS_OUTPUT_PATTERN,
+        use_manifests: bool = True,
+    ) -> None:
+        """
+        Initiates an OutputIndex instance.
+
+        Parameters
+        ----------
+        destination : Union[Path, str]
+            Derivatives' base directory
+        outputs : dict
+            Outputs' main directory, sub-directory and pattern by key
+        output_pattern : str, optional
+            Pattern of (non-FreeSurfer) outputs, by default OUTPUT_PATTERN
+        fs_output_pattern : str, optional
+            Pattern of FreeSurfer outputs, by default FS_OUTPUT_PATTERN
+        use_manifests : bool, optional
+            Whether to read subjects' manifests, by default True
+        """
+        self.destination = Path(destination).absolute()
+        self.outputs = outputs
+        self.output_pattern = output_pattern
+        self.fs_output_pattern = fs_output_pattern
+        self.use_manifests = use_manifests
+        self._files = {}
+        self._walked = False
+        self._matches = {}
+
+    def invalidate(self, subject_id: str = None):
+        """
+        Drops cached files and outputs of a subject (or of all subjects).
+
+        Parameters
+        ----------
+        subject_id : str, optional
+            Subject's label, by default all subjects
+        """
+        if subject_id is None:
+            self._files, self._matches = {}, {}
+            self._walked = False
+            return
+        self._files.pop(subject_id, None)
+        self._matches = {
+            query: paths
+            for query, paths in self._matches.items()
+            if query[0] != subject_id
+        }
+        # the subject is read again from its manifest (or a new walk)
+        self._walked = False
+
+    def walk(self) -> Dict[str, List[str]]:
+        """
+        Indexes all subjects' files in a single walk of *destination*.
+
+        Returns
+        -------
+        Dict[str, List[str]]
+            Files (relative to *destination*) by subject
+        """
+        for subject_id, files in index_tree(self.destination).items():
+            self._files.setdefault(subject_id, files)
+        self._walked = True
+        return self._files
+
+    def get_files(self, subject_id: str) -> List[str]:
+        """
+        A subject's files, relative to *destination*.
+
+        Parameters
+        ----------
+        subject_id : str
+            Subject's label
+
+        Returns
+        -------
+        List[str]
+            The subject's (cached) files
+        """
+        if subject_id not in self._files and self.use_manifests:
+            self._files[subject_id] = load_manifest(
+                self.destination, subject_id
+            )
+        if subject_id not in self._files and not self._walked:
+            self.walk()
+        return self._files.setdefault(subject_id, [])
+
+    @property
+    def subjects(self) -> List[str]:
+        """
+        Subjects with outputs under *destination*.
+
+        Returns
+        -------
+        List[str]
+            Subjects' labels
+        """
+        if not self._walked:
+            self.walk()
+        return sorted(self._files)
+
+    def build_pattern(
+        self, key: str, subject_id: str, session_id: str = "*"
+    ) -> str:
+        """
+        Formats an output's glob pattern.
+
+        Parameters
+        ----------
+        key : str
+            Output's key (in *self.outputs*)
+        subject_id : str
+            Subject's label
+        session_id : str, optional
+            Session's entity (i.e, "ses-1"), by default any
+
+        Returns
+        -------
+        str
+            A pattern relative to *destination*
+        """
+        main_dir, sub_dir, output_id = self.outputs.get(key)
+        if main_dir == "freesurfer":
+            return self.fs_output_pattern.format(
+                main_dir=main_dir, subject_id=subject_id, output_id=output_id
+            )
+        return self.output_pattern.format(
+            main_dir=main_dir,
+            sub_dir=sub_dir,
+            subject_id=subject_id,
+            session_id=session_id,
+            output_id=output_id,
+        )
+
+    def find(
+        self, key: str, subject_id: str, session_id: str = "*"
+    ) -> List[str]:
+        """
+        Locates an output of a subject.
+
+        Parameters
+        ----------
+        key : str
+            Output's key (in *self.outputs*)
+        subject_id : str
+            Subject's label
+        session_id : str, optional
+            Session's entity (i.e, "ses-1"), by default any
+
+        Returns
+        -------
+        List[str]
+            Output's paths (native outputs exclude standard spaces)
+        """
+        query = (subject_id, key, session_id)
+        if query not in self._matches:
+            outputs = match_manifest(
+                self.get_files(subject_id),
+                self.build_pattern(key, subject_id, session_id),
+                self.destination,
+            )
+            if ("native" in key) and ("transform" not in key):
+                outputs = [f for f in outputs if ("MNI" not in f.name)]
+            self._matches[query] = [str(f) for f in outputs]
+        return list(self._matches[query])
+
+    def get_outputs(
+        self,
+        subject_id: str,
+        session_id: str = "*",
+        keys: Iterable[str] = None,
+    ) -> Dict[str, List[str]]:
+        """
+        Locates several (by default all) outputs of a subject.
+
+        Parameters
+        ----------
+        subject_id : str
+            Subject's label
+        session_id : str, optional
+            Session's entity (i.e, "ses-1"), by default any
+        keys : Iterable[str], optional
+            Outputs' keys, by default all of *self.outputs*
+
+        Returns
+        -------
+        Dict[str, List[str]]
+            Output's paths by key
+        """
+        keys = self.outputs if keys is None else keys
+        return {key: self.find(key, subject_id, session_id) for key in keys}
+
+    def table(
+        self,
+        subjects: Iterable[str] = None,
+        keys: Iterable[str] = None,
+        session_id: str = "*",
+        long: bool = False,
+    ):
+        """
+        Locates outputs of several subjects at once.
+
+        Parameters
+        ----------
+        subjects : Iterable[str], optional
+            Subjects' labels, by default all indexed subjects
+        keys : Iterable[str], optional
+            Outputs' keys, by default all of *self.outputs*
+        session_id : str, optional
+            Session's entity (i.e, "ses-1"), by default any
+        long : bool, optional
+            Whether to return a row per path (with "subject", "session",
+            "key" and "path" columns), by default False
+
+        Returns
+        -------
+        pd.DataFrame
+            Lists of paths of subjects (rows) by outputs (columns), or a
+            long table of paths
+        """
+        import pandas as pd
+
+        subjects = self.subjects if subjects is None else list(subjects)
+        keys = list(self.outputs if keys is None else keys)
+        outputs = {
+            subject_id: self.get_outputs(subject_id, session_id, keys)
+            for subject_id in subjects
+        }
+        if not long:
+            return pd.DataFrame.from_dict(
+                outputs, orient="index", columns=keys
+            ).rename_axis("subject")
+        rows = []
+        for subject_id, paths in outputs.items():
+            for key, key_paths in paths.items():
+                for path in key_paths:
+                    sessions = [
+                        part
+                        for part in Path(path).parent.parts
+                        if part.startswith("ses-")
+                    ]
+                    rows.append(
+                        dict(
+                            subject=subject_id,
+                            session=sessions[-1] if sessions else None,
+                            key=key,
+                            path=path,
+                        )
+                    )
+        return pd.DataFrame(
+            rows, columns=["subject", "session", "key", "path"]
+        )
@@ -0,0 +1,120 @@
+"""
+Vectorized region-wise statistics of images over a parcellation, and their
+aggregation across a cohort.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+#: Region-wise statistics, ordered as in the statistics' tables
+STATISTICS = ["n_voxels", "mean", "median", "std"]
+
+#: Columns of a run's statistics table
+STATS_COLUMNS = ["label", "metric"] + STATISTICS
+
+
+def index_labels(
+    labels: np.ndarray, exclude: Iterable[int] = (0,)
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Maps a label image's voxels to consecutive region indices (once, to be
+    shared by all images measured over it).
+
+    Parameters
+    ----------
+    labels : np.ndarray
+        Label (parcellation) image's data
+    exclude : Iterable[int], optional
+        Labels to ignore, by default (0,) (background)
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Regions' labels, the region index of each included voxel and a
+        (flat, Fortran-ordered) mask of included voxels
+    """
+    labels = np.rint(np.asarray(labels)).astype(np.int64).ravel(order="F")
+    mask = ~np.isin(labels, list(exclude))
+    regions, inverse = np.unique(labels[mask], return_inverse=True)
+    return regions, inverse, mask
+
+
+def region_statistics(
+    values: np.ndarray, inverse: np.ndarray, n_regions: int
+) -> Dict[str, np.ndarray]:
+    """
+    Computes all of *STATISTICS* for all regions at once, with
+    ``np.bincount`` (sums) and a single sort (medians). Non-finite values
+    are ignored.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Included voxels' values (see *index_labels*)
+    inverse : np.ndarray
+        Included voxels' region indices
+    n_regions : int
+        Number of regions
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        (n_regions,) arrays by statistic (NaN for regions without values)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    values, inverse = values[finite], inverse[finite]
+    counts = np.bincount(inverse, minlength=n_regions)
+    sums = np.bincount(inverse, weights=values, minlength=n_regions)
+    squares = np.bincount(inverse, weights=values ** 2, minlength=n_regions)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+        std = np.sqrt(np.maximum(squares / counts - mean ** 2, 0))
+
+    # values sorted within each region, regions laid out consecutively
+    sorted_values = values[np.lexsort((values, inverse))]
+    starts = np.cumsum(counts) - counts
+    median = np.full(n_regions, np.nan)
+    filled = counts > 0
+    lower = starts[filled] + (counts[filled] - 1) // 2
+    upper = starts[filled] + counts[filled] // 2
+    median[filled] = (sorted_values[lower] + sorted_values[upper]) / 2
+    return dict(n_voxels=counts, mean=mean, median=median, std=std)
+
+
+def aggregate_statistics(stats_files: Dict[str, Iterable[str]]):
+    """
+    Concatenates runs' statistics tables into a single cohort table.
+
+    Parameters
+    ----------
+    stats_files : Dict[str, Iterable[str]]
+        Runs' statistics tables (TSV) by subject
+
+    Returns
+    -------
+    pd.DataFrame
+        All rows, with "subject", "session" and "source" (the table's
+        file name) columns
+    """
+    import pandas as pd
+
+    tables = []
+    for subject_id, files in stats_files.items():
+        for stats_file in files:
+            table = pd.read_csv(stats_file, sep="\t")
+            sessions = [
+                part
+                for part in Path(stats_file).parent.parts
+                if part.startswith("ses-")
+            ]
+            table.insert(0, "source", Path(stats_file).name)
+            table.insert(0, "session", sessions[-1] if sessions else None)
+            table.insert(0, "subject", subject_id)
+            tables.append(table)
+    if not tables:
+        return pd.DataFrame(
+            columns=["subject", "session", "source"] + STATS_COLUMNS
+        )
+    return pd.concat(tables, ignore_index=True)
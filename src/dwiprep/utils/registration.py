@@ -0,0 +1,267 @@
+"""
+In-process rigid registration by multi-resolution normalized mutual
+information, producing FSL-formatted (FLIRT) matrices.
+"""
+from typing import Iterable
+
+import nibabel as nb
+import numpy as np
+
+from dwiprep.utils.resampling import fsl_scaling, fsl_to_voxel_mapping
+
+#: Number of intensity bins of the joint histogram
+N_BINS = 32
+
+#: Reference grid subsampling (in voxels) of each resolution level
+LEVELS = [4, 2]
+
+#: Radius (mm) of the sphere over which transforms are compared
+RMS_RADIUS = 80.0
+
+
+def rigid_matrix(
+    params: np.ndarray, moving_center: np.ndarray, reference_center: np.ndarray
+) -> np.ndarray:
+    """
+    Builds an FSL-formatted rigid transform rotating about the moving
+    image's center and mapping it onto the reference's center.
+
+    Parameters
+    ----------
+    params : np.ndarray
+        Rotations about x, y, z (radians) and translations (mm)
+    moving_center : np.ndarray
+        Moving image's center, in FSL scaled voxel coordinates
+    reference_center : np.ndarray
+        Reference's center, in FSL scaled voxel coordinates
+
+    Returns
+    -------
+    np.ndarray
+        A (4, 4) affine
+    """
+    rx, ry, rz = params[:3]
+    cx, sx = np.cos(rx), np.sin(rx)
+    cy, sy = np.cos(ry), np.sin(ry)
+    cz, sz = np.cos(rz), np.sin(rz)
+    rotation = (
+        np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+        @ np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+        @ np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    )
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation
+    matrix[:3, 3] = reference_center + params[3:] - rotation @ moving_center
+    return matrix
+
+
+def center_of_mass(img: nb.Nifti1Image, data: np.ndarray) -> np.ndarray:
+    """
+    Intensity-weighted center of an image, in FSL scaled voxel coordinates.
+
+    Parameters
+    ----------
+    img : nb.Nifti1Image
+        The image (header is used for FSL's coordinates)
+    data : np.ndarray
+        The image's (3D) data
+
+    Returns
+    -------
+    np.ndarray
+        (3,) center of mass
+    """
+    weights = np.clip(data, 0, None)
+    voxels = np.array(np.nonzero(weights > 0), dtype=float)
+    com = voxels @ weights[weights > 0] / weights.sum()
+    return (fsl_scaling(img) @ np.r_[com, 1])[:3]
+
+
+def quantize(values: np.ndarray, n_bins: int = N_BINS) -> np.ndarray:
+    """
+    Bins intensities between their 1st and 99th percentiles.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Intensities
+    n_bins : int, optional
+        Number of bins, by default N_BINS
+
+    Returns
+    -------
+    np.ndarray
+        Integer bin of each value
+    """
+    low, high = np.percentile(values, [1, 99])
+    scaled = (values - low) / max(high - low, np.finfo(float).eps)
+    return np.clip((scaled * n_bins).astype(int), 0, n_bins - 1)
+
+
+def normalized_mutual_information(
+    first: np.ndarray, second: np.ndarray, n_bins: int = N_BINS
+) -> float:
+    """
+    Studholme's normalized mutual information of two binned samples.
+
+    Parameters
+    ----------
+    first : np.ndarray
+        Binned intensities (integers in [0, n_bins))
+    second : np.ndarray
+        Binned intensities, paired with *first*
+    n_bins : int, optional
+        Number of bins, by default N_BINS
+
+    Returns
+    -------
+    float
+        (H(A) + H(B)) / H(A, B), between 1 and 2
+    """
+    joint = np.bincount(
+        first * n_bins + second, minlength=n_bins ** 2
+    ).astype(float)
+    joint /= max(joint.sum(), 1)
+
+    def entropy(p):
+        p = p[p > 0]
+        return -(p * np.log(p)).sum()
+
+    joint = joint.reshape(n_bins, n_bins)
+    joint_entropy = entropy(joint.ravel())
+    if joint_entropy == 0:
+        return 1.0
+    return (entropy(joint.sum(1)) + entropy(joint.sum(0))) / joint_entropy
+
+
+def sample_moving(
+    moving_data: np.ndarray, mapping: np.ndarray, voxels: np.ndarray
+):
+    """
+    Trilinearly samples the moving image at mapped reference voxels.
+
+    Parameters
+    ----------
+    moving_data : np.ndarray
+        Moving image's (3D) data
+    mapping : np.ndarray
+        (4, 4) affine mapping reference voxels to moving voxels
+    voxels : np.ndarray
+        (3, V) reference voxels
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Sampled values and a boolean mask of samples inside the moving image
+    """
+    coords = mapping[:3, :3] @ voxels + mapping[:3, 3:]
+    shape = np.array(moving_data.shape)[:, None]
+    inside = np.all((coords >= 0) & (coords <= shape - 1), axis=0)
+    coords = coords[:, inside]
+    floor = np.minimum(np.floor(coords).astype(int), shape - 2)
+    fraction = coords - floor
+    values = np.zeros(coords.shape[1])
+    for offset in np.ndindex(2, 2, 2):
+        offset = np.array(offset)[:, None]
+        weight = np.prod(np.where(offset, fraction, 1 - fraction), axis=0)
+        values += weight * moving_data[tuple(floor + offset)]
+    return values, inside
+
+
+def register_rigid(
+    moving: nb.Nifti1Image,
+    reference: nb.Nifti1Image,
+    levels: Iterable[int] = LEVELS,
+    n_bins: int = N_BINS,
+) -> np.ndarray:
+    """
+    Rigidly registers *moving* to *reference* by maximizing normalized
+    mutual information, coarse to fine.
+
+    Parameters
+    ----------
+    moving : nb.Nifti1Image
+        The image to register (i.e, an EPI reference)
+    reference : nb.Nifti1Image
+        The target image (i.e, a skull-stripped T1w)
+    levels : Iterable[int], optional
+        Reference grid subsampling of each level, by default LEVELS
+    n_bins : int, optional
+        Number of joint histogram bins, by default N_BINS
+
+    Returns
+    -------
+    np.ndarray
+        (4, 4) FSL-formatted affine mapping *moving* to *reference*
+    """
+    from scipy.optimize import minimize
+
+    moving_data = np.asanyarray(moving.dataobj, dtype=np.float64)
+    reference_data = np.asanyarray(reference.dataobj, dtype=np.float64)
+    moving_center = center_of_mass(moving, moving_data)
+    reference_center = center_of_mass(reference, reference_data)
+    moving_low, moving_high = np.percentile(
+        moving_data[moving_data > 0], [1, 99]
+    )
+    # optimize in units of ~1 degree and ~1mm
+    scales = np.r_[np.full(3, np.pi / 180), np.ones(3)]
+    params = np.zeros(6)
+    for step in levels:
+        subsampled = reference_data[::step, ::step, ::step]
+        foreground = subsampled > 0
+        voxels = np.array(np.nonzero(foreground), dtype=float) * step
+        reference_bins = quantize(subsampled[foreground], n_bins)
+
+        def cost(scaled_params):
+            matrix = rigid_matrix(
+                scaled_params * scales, moving_center, reference_center
+            )
+            mapping = fsl_to_voxel_mapping(matrix, moving, reference)
+            values, inside = sample_moving(moving_data, mapping, voxels)
+            if inside.sum() < 0.1 * inside.size:
+                return 0.0
+            scaled = (values - moving_low) / (moving_high - moving_low)
+            moving_bins = np.clip((scaled * n_bins).astype(int), 0, n_bins - 1)
+            return -normalized_mutual_information(
+                reference_bins[inside], moving_bins, n_bins
+            )
+
+        result = minimize(
+            cost, params / scales, method="Powell", options=dict(xtol=1e-2)
+        )
+        params = result.x * scales
+    return rigid_matrix(params, moving_center, reference_center)
+
+
+def rms_deviation(
+    first: np.ndarray,
+    second: np.ndarray,
+    center: np.ndarray,
+    radius: float = RMS_RADIUS,
+) -> float:
+    """
+    Root-mean-square displacement between two affines over a sphere
+    (Jenkinson, 1999), i.e, to compare a registration against *epi_reg*.
+
+    Parameters
+    ----------
+    first : np.ndarray
+        (4, 4) FSL-formatted affine
+    second : np.ndarray
+        (4, 4) FSL-formatted affine of the same moving/reference pair
+    center : np.ndarray
+        Sphere's center (i.e, the moving image's center, FSL coordinates)
+    radius : float, optional
+        Sphere's radius in mm, by default RMS_RADIUS
+
+    Returns
+    -------
+    float
+        RMS displacement, in mm
+    """
+    difference = first @ np.linalg.inv(second) - np.eye(4)
+    linear, translation = difference[:3, :3], difference[:3, 3]
+    shift = translation + linear @ center
+    return float(
+        np.sqrt(radius ** 2 / 5 * np.trace(linear.T @ linear) + shift @ shift)
+    )
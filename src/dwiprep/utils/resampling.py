@@ -0,0 +1,275 @@
+"""
+Resampling of images through FSL-formatted (FLIRT) affine matrices.
+"""
+from typing import Iterator, Tuple
+
+import nibabel as nb
+import numpy as np
+
+#: Offsets of a voxel's eight neighbours used for trilinear interpolation
+CORNERS = np.array(
+    [[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)]
+).T
+
+
+def fsl_scaling(img: nb.Nifti1Image) -> np.ndarray:
+    """
+    Voxel to FSL's "scaled voxel" coordinates, flipping the first axis of
+    images stored in neurological orientation (as FSL does).
+
+    Parameters
+    ----------
+    img : nb.Nifti1Image
+        An image (only its header is used)
+
+    Returns
+    -------
+    np.ndarray
+        A (4, 4) affine
+    """
+    zooms = np.array(img.header.get_zooms()[:3], dtype=float)
+    scaling = np.diag(np.r_[zooms, 1.0])
+    if np.linalg.det(img.affine[:3, :3]) > 0:
+        flip = np.eye(4)
+        flip[0, 0] = -1
+        flip[0, 3] = img.shape[0] - 1
+        scaling = scaling @ flip
+    return scaling
+
+
+def fsl_to_voxel_mapping(
+    matrix: np.ndarray,
+    moving: nb.Nifti1Image,
+    reference: nb.Nifti1Image,
+) -> np.ndarray:
+    """
+    Converts a FLIRT matrix into a mapping from reference voxels to
+    (fractional) moving image's voxels.
+
+    Parameters
+    ----------
+    matrix : np.ndarray
+        (4, 4) FSL-formatted affine mapping *moving* to *reference*
+    moving : nb.Nifti1Image
+        The image being resampled
+    reference : nb.Nifti1Image
+        The image defining the target grid
+
+    Returns
+    -------
+    np.ndarray
+        A (4, 4) affine mapping reference voxels to moving voxels
+    """
+    return (
+        np.linalg.inv(fsl_scaling(moving))
+        @ np.linalg.inv(matrix)
+        @ fsl_scaling(reference)
+    )
+
+
+def grid_chunks(
+    shape: Tuple[int, int, int], chunk_size: int
+) -> Iterator[slice]:
+    """
+    Splits a grid's (Fortran-ordered) flat voxel indices into chunks.
+
+    Parameters
+    ----------
+    shape : Tuple[int, int, int]
+        Grid's shape
+    chunk_size : int
+        Maximal number of voxels per chunk
+
+    Yields
+    ------
+    slice
+        Flat indices of a single chunk
+    """
+    n_voxels = int(np.prod(shape))
+    for start in range(0, n_voxels, chunk_size):
+        yield slice(start, min(start + chunk_size, n_voxels))
+
+
+def trilinear_weights(
+    mapping: np.ndarray,
+    reference_shape: Tuple[int, int, int],
+    moving_shape: Tuple[int, int, int],
+    chunk: slice,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes trilinear interpolation indices and weights for a chunk of the
+    reference grid. Neighbours outside of the moving image get zero weight.
+
+    Parameters
+    ----------
+    mapping : np.ndarray
+        (4, 4) affine mapping reference voxels to moving voxels
+    reference_shape : Tuple[int, int, int]
+        Reference grid's shape
+    moving_shape : Tuple[int, int, int]
+        Moving image's (spatial) shape
+    chunk : slice
+        Flat (Fortran-ordered) indices of reference voxels
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        (8, V) flat (Fortran-ordered) moving voxel indices and their weights
+    """
+    voxels = np.array(
+        np.unravel_index(
+            np.arange(chunk.start, chunk.stop), reference_shape, order="F"
+        ),
+        dtype=np.float64,
+    )
+    coords = mapping[:3, :3] @ voxels + mapping[:3, 3:]
+    floor = np.floor(coords)
+    fraction = (coords - floor).astype(np.float32)
+    floor = floor.astype(np.int64)
+    moving_shape = np.array(moving_shape)[:, None]
+    indices = np.empty((8, voxels.shape[1]), dtype=np.int64)
+    weights = np.empty((8, voxels.shape[1]), dtype=np.float32)
+    for corner, offset in enumerate(CORNERS.T):
+        neighbour = floor + offset[:, None]
+        inside = np.all((neighbour >= 0) & (neighbour < moving_shape), axis=0)
+        neighbour = np.clip(neighbour, 0, moving_shape - 1)
+        indices[corner] = np.ravel_multi_index(
+            neighbour, moving_shape[:, 0], order="F"
+        )
+        weights[corner] = inside * np.prod(
+            np.where(offset[:, None], fraction, 1 - fraction), axis=0
+        )
+    return indices, weights
+
+
+def interpolate(
+    data: np.ndarray, indices: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    """
+    Applies precomputed interpolation indices and weights to all volumes.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        (N, K) moving image's voxels (Fortran-ordered) by volumes
+    indices : np.ndarray
+        (8, V) flat moving voxel indices
+    weights : np.ndarray
+        (8, V) interpolation weights
+
+    Returns
+    -------
+    np.ndarray
+        (V, K) interpolated values
+    """
+    values = np.zeros((indices.shape[1], data.shape[1]), dtype=np.float32)
+    for corner_indices, corner_weights in zip(indices, weights):
+        values += data[corner_indices] * corner_weights[:, None]
+    return values
+
+
+def rotation_from_fsl(matrix: np.ndarray) -> np.ndarray:
+    """
+    Extracts the rotation of a FLIRT matrix (polar decomposition of its
+    linear part), discarding scaling and shears.
+
+    Parameters
+    ----------
+    matrix : np.ndarray
+        (4, 4) FSL-formatted affine
+
+    Returns
+    -------
+    np.ndarray
+        A (3, 3) rotation matrix
+    """
+    u, _, vt = np.linalg.svd(matrix[:3, :3])
+    return u @ vt
+
+
+def rotate_bvecs(bvecs: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """
+    Reorients FSL-formatted b-vectors to match an image resampled with a
+    FLIRT matrix (both are defined in FSL's scaled voxel axes).
+
+    Parameters
+    ----------
+    bvecs : np.ndarray
+        (3, N) b-vectors of the moving image
+    matrix : np.ndarray
+        (4, 4) FSL-formatted affine mapping the moving image to a reference
+
+    Returns
+    -------
+    np.ndarray
+        (3, N) b-vectors of the resampled image
+    """
+    rotated = rotation_from_fsl(matrix) @ np.asarray(bvecs, dtype=float)
+    norms = np.linalg.norm(rotated, axis=0)
+    return np.divide(
+        rotated, norms, out=np.zeros_like(rotated), where=norms > 0
+    )
+
+
+#: RAS+ <-> LPS+ conversion (ITK's world coordinates)
+RAS_TO_LPS = np.diag([-1.0, -1.0, 1.0, 1.0])
+
+
+def fsl_to_itk(
+    matrix: np.ndarray,
+    moving: nb.Nifti1Image,
+    reference: nb.Nifti1Image,
+) -> np.ndarray:
+    """
+    Converts a FLIRT matrix into an ITK (ANTs) affine, which maps reference
+    (fixed) physical LPS+ coordinates to moving ones.
+
+    Parameters
+    ----------
+    matrix : np.ndarray
+        (4, 4) FSL-formatted affine mapping *moving* to *reference*
+    moving : nb.Nifti1Image
+        The image being resampled
+    reference : nb.Nifti1Image
+        The image defining the target grid
+
+    Returns
+    -------
+    np.ndarray
+        A (4, 4) affine in ITK's (LPS+) physical space
+    """
+    reference_to_moving = (
+        moving.affine
+        @ fsl_to_voxel_mapping(matrix, moving, reference)
+        @ np.linalg.inv(reference.affine)
+    )
+    return RAS_TO_LPS @ reference_to_moving @ RAS_TO_LPS
+
+
+def write_itk_affine(affine: np.ndarray, out_file: str) -> str:
+    """
+    Writes a (4, 4) affine as an ITK text transform file.
+
+    Parameters
+    ----------
+    affine : np.ndarray
+        (4, 4) affine in ITK's (LPS+) physical space
+    out_file : str
+        Output path (``.txt``)
+
+    Returns
+    -------
+    str
+        *out_file*
+    """
+    values = np.r_[affine[:3, :3].ravel(), affine[:3, 3]]
+    parameters = " ".join(f"{value:.10g}" for value in values)
+    with open(out_file, "w") as fileobj:
+        fileobj.write(
+            "#Insight Transform File V1.0\n"
+            "#Transform 0\n"
+            "Transform: AffineTransform_double_3_3\n"
+            f"Parameters: {parameters}\n"
+            "FixedParameters: 0 0 0\n"
+        )
+    return out_file
@@ -1,4 +1,8 @@
+from dwiprep.workflows.coreg.pipelines.anat_prep import init_anat_prep_wf
 from dwiprep.workflows.coreg.pipelines.epi_reg import init_epireg_wf
 from dwiprep.workflows.coreg.pipelines.apply_transform import (
     init_apply_transform,
 )
+from dwiprep.workflows.coreg.pipelines.std_transform import (
+    init_std_transform_wf,
+)
@@ -0,0 +1,3 @@
+from dwiprep.workflows.coreg.pipelines.anat_prep.anat_prep import (
+    init_anat_prep_wf,
+)
@@ -0,0 +1,42 @@
+import nipype.pipeline.engine as pe
+
+from dwiprep.workflows.coreg.pipelines.anat_prep.edges import (
+    INPUT_TO_T1W_BRAIN_EDGES,
+    INPUT_TO_WM_MASK_EDGES,
+    T1W_BRAIN_TO_OUTPUT_EDGES,
+    WM_MASK_TO_OUTPUT_EDGES,
+)
+from dwiprep.workflows.coreg.pipelines.anat_prep.nodes import (
+    INPUT_NODE,
+    OUTPUT_NODE,
+    T1W_BRAIN_NODE,
+    WM_MASK_NODE,
+)
+
+ANAT_PREP = [
+    (INPUT_NODE, T1W_BRAIN_NODE, INPUT_TO_T1W_BRAIN_EDGES),
+    (INPUT_NODE, WM_MASK_NODE, INPUT_TO_WM_MASK_EDGES),
+    (T1W_BRAIN_NODE, OUTPUT_NODE, T1W_BRAIN_TO_OUTPUT_EDGES),
+    (WM_MASK_NODE, OUTPUT_NODE, WM_MASK_TO_OUTPUT_EDGES),
+]
+
+
+def init_anat_prep_wf(name="anat_prep_wf") -> pe.Workflow:
+    """
+    Initiates a subject-level workflow that prepares the anatomical
+    registration targets (skull-stripped T1w and a white matter mask for
+    *epi_reg*'s BBR) once, to be shared by all of the subject's DWI runs.
+
+    Parameters
+    ----------
+    name : str, optional
+        Workflow's name, by default "anat_prep_wf"
+
+    Returns
+    -------
+    pe.Workflow
+        Initiated workflow for anatomical preparation.
+    """
+    wf = pe.Workflow(name=name)
+    wf.connect(ANAT_PREP)
+    return wf
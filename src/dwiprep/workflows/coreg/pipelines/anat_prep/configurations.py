@@ -0,0 +1,14 @@
+"""
+Configurations for *anat_prep* pipeline.
+"""
+#: i/o
+INPUT_NODE_FIELDS = ["t1w_preproc", "t1w_mask", "t1w_dseg"]
+OUTPUT_NODE_FIELDS = ["t1w_brain", "wm_mask"]
+
+#: Keyword arguments
+WM_MASK_KWARGS = dict(
+    input_names=["in_file", "label"], output_names=["out_file"]
+)
+
+#: White matter label of *smriprep*'s dseg (1: GM, 2: WM, 3: CSF)
+WM_LABEL = 2
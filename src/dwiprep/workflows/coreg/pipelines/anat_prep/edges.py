@@ -0,0 +1,10 @@
+"""
+Connections configurations for *anat_prep* pipelines.
+"""
+INPUT_TO_T1W_BRAIN_EDGES = [
+    ("t1w_preproc", "in_file"),
+    ("t1w_mask", "in_mask"),
+]
+INPUT_TO_WM_MASK_EDGES = [("t1w_dseg", "in_file")]
+T1W_BRAIN_TO_OUTPUT_EDGES = [("out_file", "t1w_brain")]
+WM_MASK_TO_OUTPUT_EDGES = [("out_file", "wm_mask")]
@@ -0,0 +1,61 @@
+"""
+Nodes' configurations for *anat_prep* pipelines.
+"""
+import nipype.pipeline.engine as pe
+from nipype.interfaces import utility as niu
+from niworkflows.interfaces.nibabel import ApplyMask
+
+from dwiprep.workflows.coreg.pipelines.anat_prep.configurations import (
+    INPUT_NODE_FIELDS,
+    OUTPUT_NODE_FIELDS,
+    WM_LABEL,
+    WM_MASK_KWARGS,
+)
+
+
+def extract_label(in_file: str, label: int) -> str:
+    """
+    Binarizes a single label of a discrete segmentation.
+
+    Parameters
+    ----------
+    in_file : str
+        Discrete segmentation (i.e, *smriprep*'s ``dseg``)
+    label : int
+        Label to extract
+
+    Returns
+    -------
+    str
+        Path to a binary (uint8) mask
+    """
+    from pathlib import Path
+
+    import nibabel as nb
+    import numpy as np
+
+    img = nb.load(in_file)
+    mask = (np.asanyarray(img.dataobj) == label).astype(np.uint8)
+    header = img.header.copy()
+    header.set_data_dtype(np.uint8)
+    out_file = str(Path(f"label-{label}_mask.nii.gz").absolute())
+    nb.Nifti1Image(mask, img.affine, header).to_filename(out_file)
+    return out_file
+
+
+#: i/o
+INPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=INPUT_NODE_FIELDS),
+    name="inputnode",
+)
+OUTPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=OUTPUT_NODE_FIELDS),
+    name="outputnode",
+)
+
+#: Building blocks
+T1W_BRAIN_NODE = pe.Node(ApplyMask(), name="t1w_brain")
+WM_MASK_NODE = pe.Node(
+    niu.Function(**WM_MASK_KWARGS, function=extract_label), name="wm_mask"
+)
+WM_MASK_NODE.inputs.label = WM_LABEL
@@ -5,11 +5,20 @@ Configurations for *apply_transform* pipelines
 INPUT_NODE_FIELDS = [
     "tensor_metrics",
     "dwi_file",
+    "dwi_bvec",
+    "dwi_bval",
     "epiref",
     "epi_to_t1w_aff",
     "t1w_brain",
 ]
-OUTPUT_NODE_FIELDS = ["tensor_metrics", "dwi_file"]
-TRANSFORM_AFF_KWARGS = dict(flirt_import=True)
-TENSOR_APPLY_XFM_KWARGS = dict(apply_xfm=True)
-DWI_APPLY_XFM_KWARGS = dict()
+OUTPUT_NODE_FIELDS = [
+    "tensor_metrics",
+    "dwi_file",
+    "dwi_bvec",
+    "dwi_bval",
+    "dwi_rotated_bvec",
+]
+RESAMPLE_METRICS_KWARGS = dict(chunk_size=500000)
+#: The coregistered series keeps its own grid by default (see the
+#: ``regrid`` argument of *init_apply_transform*)
+RESAMPLE_DWI_KWARGS = dict(regrid=False, max_memory_mb=1024)
@@ -2,19 +2,21 @@
 Edges' configurations for *apply_transforms* pipelines.
 """
 INPUT_TO_TENSOR_XFM_EDGES = [
-    ("tensor_metrics", "in_file"),
+    ("tensor_metrics", "in_files"),
     ("epi_to_t1w_aff", "in_matrix_file"),
     ("t1w_brain", "reference"),
 ]
 INPUT_TO_DWI_XFM_EDGES = [
-    ("dwi_file", "in_files"),
-    # ("t1w_brain", "reference_image"),
-]
-INPUT_TO_TRANSFORM_CONVERT_EDGES = [
-    ("epiref", "in_file"),
+    ("dwi_file", "in_file"),
+    ("dwi_bvec", "in_bvec"),
+    ("dwi_bval", "in_bval"),
+    ("epi_to_t1w_aff", "in_matrix_file"),
     ("t1w_brain", "reference"),
-    ("epi_to_t1w_aff", "in_transform"),
 ]
-TRANSFORM_CONVERT_TO_DWI_XFM_EDGES = [("out_transform", "linear_transform")]
-TENSOR_XFM_TO_OUTPUT_EDGES = [("out_file", "tensor_metrics")]
-DWI_XFM_TO_OUTPUT_EDGES = [("out_file", "dwi_file")]
+TENSOR_XFM_TO_OUTPUT_EDGES = [("out_files", "tensor_metrics")]
+DWI_XFM_TO_OUTPUT_EDGES = [
+    ("out_file", "dwi_file"),
+    ("out_bvec", "dwi_bvec"),
+    ("out_bval", "dwi_bval"),
+    ("out_rotated_bvec", "dwi_rotated_bvec"),
+]
@@ -2,9 +2,13 @@
 Configurations for *epi_reg* pipeline.
 """
 #: i/o
-INPUT_NODE_FIELDS = ["in_file", "t1w_brain", "t1w_head"]
+INPUT_NODE_FIELDS = ["in_file", "t1w_brain", "t1w_head", "wm_mask"]
 OUTPUT_NODE_FIELDS = ["epi_to_t1w_aff", "t1w_to_epi_aff", "epi_to_t1w"]
 
+#: Registration engines
+EPIREG_ENGINES = ["fsl", "nmi"]
+
 #: Keyword arguments
 EPIREG_KWARGS = dict()
+RIGID_REGISTRATION_KWARGS = dict(levels=[4, 2], n_bins=32)
 CONVERTXFM_KWARGS = dict(invert_xfm=True)
@@ -6,6 +6,8 @@ INPUT_TO_EPIREG_EDGES = [
     ("t1w_brain", "t1_brain"),
     ("t1w_head", "t1_head"),
     ("in_file", "epi"),
+    # a precomputed WM mask spares epi_reg's internal FAST segmentation
+    ("wm_mask", "wmseg"),
 ]
 EPIREG_TO_CONVERTXFM_EDGES = [("epi2str_mat", "in_file")]
 EPIREG_TO_OUTPUT_EDGES = [
@@ -13,3 +15,14 @@ EPIREG_TO_OUTPUT_EDGES = [
     ("out_file", "epi_to_t1w"),
 ]
 CONVERTXFM_TO_OUTPUT_EDGES = [("out_file", "t1w_to_epi_aff")]
+
+#: in-process (NMI) engine
+INPUT_TO_RIGID_REGISTRATION_EDGES = [
+    ("in_file", "in_file"),
+    ("t1w_brain", "reference"),
+]
+RIGID_REGISTRATION_TO_OUTPUT_EDGES = [
+    ("epi_to_t1w_aff", "epi_to_t1w_aff"),
+    ("t1w_to_epi_aff", "t1w_to_epi_aff"),
+    ("out_file", "epi_to_t1w"),
+]
@@ -6,12 +6,18 @@ from dwiprep.workflows.coreg.pipelines.epi_reg.nodes import (
     OUTPUT_NODE,
     EPIREG_NODE,
     CONVERTXFM_NODE,
+    RIGID_REGISTRATION_NODE,
 )
 from dwiprep.workflows.coreg.pipelines.epi_reg.edges import (
     INPUT_TO_EPIREG_EDGES,
     EPIREG_TO_CONVERTXFM_EDGES,
     EPIREG_TO_OUTPUT_EDGES,
     CONVERTXFM_TO_OUTPUT_EDGES,
+    INPUT_TO_RIGID_REGISTRATION_EDGES,
+    RIGID_REGISTRATION_TO_OUTPUT_EDGES,
+)
+from dwiprep.workflows.coreg.pipelines.epi_reg.configurations import (
+    EPIREG_ENGINES,
 )
 
 EPI_REG = [
@@ -20,24 +26,34 @@ EPI_REG = [
     (EPIREG_NODE, OUTPUT_NODE, EPIREG_TO_OUTPUT_EDGES),
     (CONVERTXFM_NODE, OUTPUT_NODE, CONVERTXFM_TO_OUTPUT_EDGES),
 ]
+RIGID_REGISTRATION = [
+    (INPUT_NODE, RIGID_REGISTRATION_NODE, INPUT_TO_RIGID_REGISTRATION_EDGES),
+    (RIGID_REGISTRATION_NODE, OUTPUT_NODE, RIGID_REGISTRATION_TO_OUTPUT_EDGES),
+]
 
 
-def init_epireg_wf(
-    name="epi_reg_wf",
-) -> pe.Workflow:
+def init_epireg_wf(name="epi_reg_wf", engine: str = "fsl") -> pe.Workflow:
     """
-    Initiates a FSL's epi_reg-based workflow to coregister EPI images to structural ones.
+    Initiates a workflow to coregister EPI images to structural ones.
 
     Parameters
     ----------
     name : str, optional
         Workflow's name, by default "epi_reg_wf"
+    engine : str, optional
+        Either "fsl" (FSL's *epi_reg*, BBR-based) or "nmi" (in-process,
+        multi-resolution normalized mutual information), by default "fsl"
 
     Returns
     -------
     pe.Workflow
         An initiated workflow for coregistering EPI images to structural ones.
     """
+    if engine not in EPIREG_ENGINES:
+        raise ValueError(
+            f"Unknown registration engine: {engine}. "
+            f"Available engines are: {', '.join(EPIREG_ENGINES)}"
+        )
     wf = pe.Workflow(name=name)
-    wf.connect(EPI_REG)
+    wf.connect(RIGID_REGISTRATION if engine == "nmi" else EPI_REG)
     return wf
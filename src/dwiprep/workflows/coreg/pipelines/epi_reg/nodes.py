@@ -5,11 +5,13 @@ import nipype.pipeline.engine as pe
 from nipype.interfaces import utility as niu
 from nipype.interfaces import fsl
 
+from dwiprep.interfaces.registration import RigidRegistration
 from dwiprep.workflows.coreg.pipelines.epi_reg.configurations import (
     INPUT_NODE_FIELDS,
     OUTPUT_NODE_FIELDS,
     EPIREG_KWARGS,
     CONVERTXFM_KWARGS,
+    RIGID_REGISTRATION_KWARGS,
 )
 
 #: i/o
@@ -29,3 +31,8 @@ CONVERTXFM_NODE = pe.Node(
     fsl.ConvertXFM(**CONVERTXFM_KWARGS),
     name="invert_xfm",
 )
+
+RIGID_REGISTRATION_NODE = pe.Node(
+    RigidRegistration(**RIGID_REGISTRATION_KWARGS),
+    name="rigid_registration",
+)
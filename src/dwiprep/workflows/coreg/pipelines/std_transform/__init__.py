@@ -0,0 +1,3 @@
+from dwiprep.workflows.coreg.pipelines.std_transform.std_transform import (
+    init_std_transform_wf,
+)
@@ -0,0 +1,37 @@
+"""
+Configurations for *std_transform* pipelines
+"""
+#: Standard space of the derivatives
+STD_TEMPLATE = "MNI152NLin2009cAsym"
+
+#: i/o
+INPUT_NODE_FIELDS = [
+    "tensor_metrics",
+    "dwi_file",
+    "epiref",
+    "epi_to_t1w_aff",
+    "t1w_brain",
+    "template",
+    "anat2std_xfm",
+]
+OUTPUT_NODE_FIELDS = ["tensor_metrics", "dwi_file"]
+
+#: Keyword arguments
+SELECT_STD_XFM_KWARGS = dict(
+    input_names=["template", "anat2std_xfm", "std_template"],
+    output_names=["anat2std_xfm"],
+)
+STD_REFERENCE_KWARGS = dict(
+    input_names=["template", "resolution"], output_names=["reference"]
+)
+IMAGE_TYPES_KWARGS = dict(
+    input_names=["in_files"], output_names=["in_files", "image_types"]
+)
+APPLY_STD_TENSOR_KWARGS = dict(dimension=3, interpolation="Linear", float=True)
+APPLY_STD_DWI_KWARGS = dict(
+    dimension=3,
+    input_image_type=3,
+    interpolation="Linear",
+    float=True,
+    output_image="dwi_std.nii.gz",
+)
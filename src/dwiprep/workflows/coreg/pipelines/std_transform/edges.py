@@ -0,0 +1,25 @@
+"""
+Edges' configurations for *std_transform* pipelines.
+"""
+INPUT_TO_FSL_TO_ITK_EDGES = [
+    ("epi_to_t1w_aff", "in_matrix_file"),
+    ("epiref", "moving"),
+    ("t1w_brain", "reference"),
+]
+INPUT_TO_SELECT_STD_XFM_EDGES = [
+    ("template", "template"),
+    ("anat2std_xfm", "anat2std_xfm"),
+]
+#: transforms are applied last-to-first: EPI -> T1w -> standard
+SELECT_STD_XFM_TO_MERGE_EDGES = [("anat2std_xfm", "in1")]
+FSL_TO_ITK_TO_MERGE_EDGES = [("out_file", "in2")]
+INPUT_TO_IMAGE_TYPES_EDGES = [("tensor_metrics", "in_files")]
+IMAGE_TYPES_TO_TENSOR_XFM_EDGES = [
+    ("in_files", "input_image"),
+    ("image_types", "input_image_type"),
+]
+MERGE_TO_XFM_EDGES = [("out", "transforms")]
+REFERENCE_TO_XFM_EDGES = [("reference", "reference_image")]
+INPUT_TO_DWI_XFM_EDGES = [("dwi_file", "input_image")]
+TENSOR_XFM_TO_OUTPUT_EDGES = [("output_image", "tensor_metrics")]
+DWI_XFM_TO_OUTPUT_EDGES = [("output_image", "dwi_file")]
@@ -0,0 +1,128 @@
+"""
+Nodes' configurations for *std_transform* pipelines.
+"""
+import nipype.pipeline.engine as pe
+from nipype.interfaces import ants
+from nipype.interfaces import utility as niu
+
+from dwiprep.interfaces.resample import FSLToITK
+from dwiprep.workflows.coreg.pipelines.std_transform.configurations import (
+    APPLY_STD_DWI_KWARGS,
+    APPLY_STD_TENSOR_KWARGS,
+    IMAGE_TYPES_KWARGS,
+    INPUT_NODE_FIELDS,
+    OUTPUT_NODE_FIELDS,
+    SELECT_STD_XFM_KWARGS,
+    STD_REFERENCE_KWARGS,
+    STD_TEMPLATE,
+)
+
+
+def select_std_xfm(template: list, anat2std_xfm: list, std_template: str):
+    """
+    Picks the anatomical-to-standard transform of a specific template
+    out of *smriprep*'s (per-template) outputs.
+
+    Parameters
+    ----------
+    template : list
+        Templates' names, as in *smriprep*'s ``template`` output
+    anat2std_xfm : list
+        Corresponding anatomical-to-standard transforms
+    std_template : str
+        Requested template (i.e, "MNI152NLin2009cAsym")
+
+    Returns
+    -------
+    str
+        Path to the requested template's transform
+    """
+    if isinstance(template, str):
+        template, anat2std_xfm = [template], [anat2std_xfm]
+    for name, xfm in zip(template, anat2std_xfm):
+        if name.split(":")[0] == std_template:
+            return xfm
+    raise ValueError(
+        f"No anatomical-to-standard transform was found for {std_template}."
+    )
+
+
+def get_std_reference(template: str, resolution: int = 1) -> str:
+    """
+    Fetches a template's T1w image to serve as the resampling target.
+
+    Parameters
+    ----------
+    template : str
+        Template's name (i.e, "MNI152NLin2009cAsym")
+    resolution : int, optional
+        Template's resolution, by default 1
+
+    Returns
+    -------
+    str
+        Path to the template's T1w image
+    """
+    from templateflow.api import get as get_template
+
+    return str(
+        get_template(template, resolution=resolution, desc=None, suffix="T1w")
+    )
+
+
+def image_types(in_files: list):
+    """
+    *antsApplyTransforms* input image type of each file (0 for scalar
+    volumes, 3 for multi-volume images such as *evec* and *eval*).
+
+    Parameters
+    ----------
+    in_files : list
+        Images to transform
+
+    Returns
+    -------
+    Tuple[list, list]
+        *in_files* and their image types
+    """
+    import nibabel as nb
+
+    return in_files, [3 if len(nb.load(f).shape) > 3 else 0 for f in in_files]
+
+
+#: i/o
+INPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=INPUT_NODE_FIELDS),
+    name="inputnode",
+)
+OUTPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=OUTPUT_NODE_FIELDS),
+    name="outputnode",
+)
+
+#: Building blocks
+FSL_TO_ITK_NODE = pe.Node(FSLToITK(), name="fsl_to_itk")
+SELECT_STD_XFM_NODE = pe.Node(
+    niu.Function(**SELECT_STD_XFM_KWARGS, function=select_std_xfm),
+    name="select_std_xfm",
+)
+SELECT_STD_XFM_NODE.inputs.std_template = STD_TEMPLATE
+STD_REFERENCE_NODE = pe.Node(
+    niu.Function(**STD_REFERENCE_KWARGS, function=get_std_reference),
+    name="std_reference",
+)
+STD_REFERENCE_NODE.inputs.template = STD_TEMPLATE
+STD_REFERENCE_NODE.inputs.resolution = 1
+MERGE_XFMS_NODE = pe.Node(niu.Merge(numinputs=2), name="merge_xfms")
+IMAGE_TYPES_NODE = pe.Node(
+    niu.Function(**IMAGE_TYPES_KWARGS, function=image_types),
+    name="image_types",
+)
+APPLY_STD_TENSOR_NODE = pe.MapNode(
+    ants.ApplyTransforms(**APPLY_STD_TENSOR_KWARGS),
+    iterfield=["input_image", "input_image_type"],
+    name="std_xfm_tensor",
+)
+APPLY_STD_DWI_NODE = pe.Node(
+    ants.ApplyTransforms(**APPLY_STD_DWI_KWARGS), name="std_xfm_dwi"
+)
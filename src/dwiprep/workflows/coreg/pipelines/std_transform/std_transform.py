@@ -0,0 +1,65 @@
+import nipype.pipeline.engine as pe
+
+from dwiprep.workflows.coreg.pipelines.std_transform.edges import (
+    DWI_XFM_TO_OUTPUT_EDGES,
+    FSL_TO_ITK_TO_MERGE_EDGES,
+    IMAGE_TYPES_TO_TENSOR_XFM_EDGES,
+    INPUT_TO_DWI_XFM_EDGES,
+    INPUT_TO_FSL_TO_ITK_EDGES,
+    INPUT_TO_IMAGE_TYPES_EDGES,
+    INPUT_TO_SELECT_STD_XFM_EDGES,
+    MERGE_TO_XFM_EDGES,
+    REFERENCE_TO_XFM_EDGES,
+    SELECT_STD_XFM_TO_MERGE_EDGES,
+    TENSOR_XFM_TO_OUTPUT_EDGES,
+)
+from dwiprep.workflows.coreg.pipelines.std_transform.nodes import (
+    APPLY_STD_DWI_NODE,
+    APPLY_STD_TENSOR_NODE,
+    FSL_TO_ITK_NODE,
+    IMAGE_TYPES_NODE,
+    INPUT_NODE,
+    MERGE_XFMS_NODE,
+    OUTPUT_NODE,
+    SELECT_STD_XFM_NODE,
+    STD_REFERENCE_NODE,
+)
+
+STD_TRANSFORMS = [
+    (INPUT_NODE, FSL_TO_ITK_NODE, INPUT_TO_FSL_TO_ITK_EDGES),
+    (INPUT_NODE, SELECT_STD_XFM_NODE, INPUT_TO_SELECT_STD_XFM_EDGES),
+    (SELECT_STD_XFM_NODE, MERGE_XFMS_NODE, SELECT_STD_XFM_TO_MERGE_EDGES),
+    (FSL_TO_ITK_NODE, MERGE_XFMS_NODE, FSL_TO_ITK_TO_MERGE_EDGES),
+    #: tensor-derived metrics
+    (INPUT_NODE, IMAGE_TYPES_NODE, INPUT_TO_IMAGE_TYPES_EDGES),
+    (IMAGE_TYPES_NODE, APPLY_STD_TENSOR_NODE, IMAGE_TYPES_TO_TENSOR_XFM_EDGES),
+    (MERGE_XFMS_NODE, APPLY_STD_TENSOR_NODE, MERGE_TO_XFM_EDGES),
+    (STD_REFERENCE_NODE, APPLY_STD_TENSOR_NODE, REFERENCE_TO_XFM_EDGES),
+    (APPLY_STD_TENSOR_NODE, OUTPUT_NODE, TENSOR_XFM_TO_OUTPUT_EDGES),
+    #: DWI series
+    (INPUT_NODE, APPLY_STD_DWI_NODE, INPUT_TO_DWI_XFM_EDGES),
+    (MERGE_XFMS_NODE, APPLY_STD_DWI_NODE, MERGE_TO_XFM_EDGES),
+    (STD_REFERENCE_NODE, APPLY_STD_DWI_NODE, REFERENCE_TO_XFM_EDGES),
+    (APPLY_STD_DWI_NODE, OUTPUT_NODE, DWI_XFM_TO_OUTPUT_EDGES),
+]
+
+
+def init_std_transform_wf(name="std_transform_wf") -> pe.Workflow:
+    """
+    Initiates a workflow that resamples native-space images straight into
+    standard space, composing the EPI-to-T1w affine with *smriprep*'s
+    anatomical-to-standard transform so that images are interpolated once.
+
+    Parameters
+    ----------
+    name : str, optional
+        Workflow's name, by default "std_transform_wf"
+
+    Returns
+    -------
+    pe.Workflow
+        Initiated workflow to resample images into standard space.
+    """
+    wf = pe.Workflow(name=name)
+    wf.connect(STD_TRANSFORMS)
+    return wf
@@ -34,6 +34,15 @@ def init_dwi_preproc_wf(
     inputnode: pe.Node,
     output_dir=None,
     work_dir=None,
+    tensor_engine: str = "mrtrix",
+    tensor_max_bvalue: float = None,
+    std_space_output: bool = False,
+    coreg_engine: str = "fsl",
+    regrid_dwi: bool = False,
+    shared_fieldmap: bool = False,
+    shared_topup: bool = False,
+    parcellation: str = "dseg",
+    freesurfer: bool = True,
 ):
     """
     Build a preprocessing workflow for one DWI run.
@@ -58,6 +67,35 @@ def init_dwi_preproc_wf(
         One diffusion MRI dataset to be processed.
     has_fieldmap : :obj:`bool`
         Build the workflow with a path to register a fieldmap to the DWI.
+    tensor_engine : :obj:`str`
+        Tensor estimation engine, either "mrtrix" or "numpy".
+    tensor_max_bvalue : :obj:`float`
+        Upper b-value of the shells used for tensor estimation
+        (all shells are used if None).
+    std_space_output : :obj:`bool`
+        Whether to resample the DWI series and tensor-derived metrics
+        straight from native to MNI152NLin2009cAsym space.
+    coreg_engine : :obj:`str`
+        EPI-to-T1w registration engine, either "fsl" (*epi_reg*) or "nmi".
+    regrid_dwi : :obj:`bool`
+        Whether the coregistered DWI series is resampled into the T1w's
+        grid (in chunks bounded by ``max_memory_mb``), rather than keep its
+        own grid with an affine moved into the T1w's space.
+    shared_fieldmap : :obj:`bool`
+        Whether the merged phasediff is prepared (and stored) once per
+        session by a shared fieldmap workflow, and fed to this run through
+        the ``merged_phasediff`` input.
+    shared_topup : :obj:`bool`
+        Whether a shared fieldmap's susceptibility field is also estimated
+        once per session (the ``topup_prefix`` input), so that only *eddy*
+        runs for this run. Ignored unless ``shared_fieldmap``.
+    parcellation : :obj:`str`
+        Anatomical parcellation ("dseg", "aseg" or "aparc") over which
+        region-wise statistics of the coregistered tensor-derived metrics
+        are extracted (none are extracted if None).
+    freesurfer : :obj:`bool`
+        Whether the anatomical workflow runs FreeSurfer's reconstruction,
+        which outputs the "aseg" and "aparc" parcellations.
 
     Inputs
     ------
@@ -94,24 +132,23 @@ def init_dwi_preproc_wf(
     * :py:func:`~dmriprep.workflows.dwi.outputs.init_reportlets_wf`
 
     """
-    from niworkflows.interfaces.nibabel import ApplyMask
-
+    from dwiprep.utils.metadata import get_phase_encoding_direction
     from dwiprep.workflows.coreg.pipelines import (
         init_apply_transform,
         init_epireg_wf,
+        init_std_transform_wf,
     )
     from dwiprep.workflows.dmri.pipelines import (
         add_fieldmaps_to_wf,
+        init_brain_mask_wf,
         init_conversion_wf,
         init_epi_ref_wf,
         init_nii_conversion_wf,
+        init_parcellation_wf,
         init_phasediff_wf,
         init_preprocess_wf,
         init_tensor_wf,
     )
-    from dwiprep.workflows.dmri.pipelines.conversions.nodes import (
-        NII_COREG_DWI_CONVERSION_NODE,
-    )
     from dwiprep.workflows.dmri.pipelines.derivatives import (
         init_derivatives_wf,
     )
@@ -123,7 +160,9 @@ def init_dwi_preproc_wf(
     workflow.base_dir = work_dir
 
     # Initiate a workflow to store derivatives
-    derivatives_wf = init_derivatives_wf()
+    derivatives_wf = init_derivatives_wf(
+        std_space=std_space_output, phasediff=not shared_fieldmap
+    )
     workflow.connect(
         [
             (
@@ -165,19 +204,35 @@ def init_dwi_preproc_wf(
                 conversion_wf,
                 epi_ref_wf,
                 [("outputnode.dwi_file", "inputnode.dwi_file")],
-            )
+            ),
+            (
+                inputnode,
+                epi_ref_wf,
+                [
+                    ("in_bval", "inputnode.in_bval"),
+                    ("in_bvec", "inputnode.in_bvec"),
+                ],
+            ),
         ]
     )
 
     # prepare for topup+eddy and infer phasediff type
-    phasediff_wf = init_phasediff_wf()
-    phasediff_entry = add_fieldmaps_to_wf(
-        inputnode, conversion_wf, epi_ref_wf, phasediff_wf
-    )
-    workflow.connect(phasediff_entry)
+    if shared_fieldmap:
+        # merged once per session by the shared fieldmap workflow
+        phasediff_wf, merged_phasediff = inputnode, "merged_phasediff"
+    else:
+        phasediff_wf = init_phasediff_wf()
+        phasediff_entry = add_fieldmaps_to_wf(
+            inputnode, conversion_wf, epi_ref_wf, phasediff_wf
+        )
+        workflow.connect(phasediff_entry)
+        merged_phasediff = "outputnode.merged_phasediff"
 
     # preprocess - denoise, topup, eddy, bias correction
-    preprocess_wf = init_preprocess_wf()
+    topup = shared_fieldmap and shared_topup
+    preprocess_wf = init_preprocess_wf(
+        pe_dir=get_phase_encoding_direction(dwi_file), topup=topup
+    )
     workflow.connect(
         [
             (
@@ -185,18 +240,29 @@ def init_dwi_preproc_wf(
                 preprocess_wf,
                 [("outputnode.dwi_file", "inputnode.dwi_file")],
             ),
-            (
-                phasediff_wf,
-                preprocess_wf,
-                [
-                    (
-                        "outputnode.merged_phasediff",
-                        "inputnode.merged_phasediff",
-                    )
-                ],
-            ),
         ]
     )
+    if topup:
+        # the session's topup field is passed on to eddy
+        workflow.connect(
+            [
+                (
+                    inputnode,
+                    preprocess_wf,
+                    [("topup_prefix", "inputnode.topup_prefix")],
+                ),
+            ]
+        )
+    else:
+        workflow.connect(
+            [
+                (
+                    phasediff_wf,
+                    preprocess_wf,
+                    [(merged_phasediff, "inputnode.merged_phasediff")],
+                ),
+            ]
+        )
 
     # extract preprocessed mean b0
     preproc_epi_ref_wf = epi_ref_wf.clone(name="preprocessed_epi_ref_wf")
@@ -206,12 +272,21 @@ def init_dwi_preproc_wf(
                 preprocess_wf,
                 preproc_epi_ref_wf,
                 [("outputnode.dwi_preproc", "inputnode.dwi_file")],
-            )
+            ),
+            # preprocessing keeps the series' volumes (and their order)
+            (
+                inputnode,
+                preproc_epi_ref_wf,
+                [
+                    ("in_bval", "inputnode.in_bval"),
+                    ("in_bvec", "inputnode.in_bvec"),
+                ],
+            ),
         ]
     )
 
     # convert to NIfTI format
-    nii_conversion_wf = init_nii_conversion_wf()
+    nii_conversion_wf = init_nii_conversion_wf(phasediff=not shared_fieldmap)
     workflow.connect(
         [
             (
@@ -219,16 +294,6 @@ def init_dwi_preproc_wf(
                 nii_conversion_wf,
                 [("outputnode.dwi_preproc", "inputnode.dwi_file")],
             ),
-            (
-                phasediff_wf,
-                nii_conversion_wf,
-                [
-                    (
-                        "outputnode.merged_phasediff",
-                        "inputnode.phasediff",
-                    )
-                ],
-            ),
             (
                 preproc_epi_ref_wf,
                 nii_conversion_wf,
@@ -258,14 +323,6 @@ def init_dwi_preproc_wf(
                         "outputnode.dwi_bval",
                         "inputnode.native_dwi_preproc_bval",
                     ),
-                    (
-                        "outputnode.phasediff_file",
-                        "inputnode.phasediff_file",
-                    ),
-                    (
-                        "outputnode.phasediff_json",
-                        "inputnode.phasediff_json",
-                    ),
                     (
                         "outputnode.epi_ref_file",
                         "inputnode.native_epi_ref_file",
@@ -279,13 +336,66 @@ def init_dwi_preproc_wf(
         ]
     )
 
-    tensor_wf = init_tensor_wf()
+    if not shared_fieldmap:
+        workflow.connect(
+            [
+                (
+                    phasediff_wf,
+                    nii_conversion_wf,
+                    [(merged_phasediff, "inputnode.phasediff")],
+                ),
+                (
+                    nii_conversion_wf,
+                    derivatives_wf,
+                    [
+                        (
+                            "outputnode.phasediff_file",
+                            "inputnode.phasediff_file",
+                        ),
+                        (
+                            "outputnode.phasediff_json",
+                            "inputnode.phasediff_json",
+                        ),
+                    ],
+                ),
+            ]
+        )
+
+    # brain mask of the preprocessed EPI reference
+    brain_mask_wf = init_brain_mask_wf()
     workflow.connect(
         [
             (
-                preprocess_wf,
+                nii_conversion_wf,
+                brain_mask_wf,
+                [("outputnode.epi_ref_file", "inputnode.epi_ref_file")],
+            ),
+            (
+                brain_mask_wf,
+                derivatives_wf,
+                [("outputnode.brain_mask", "inputnode.native_brain_mask")],
+            ),
+        ]
+    )
+
+    tensor_wf = init_tensor_wf(
+        engine=tensor_engine, max_bvalue=tensor_max_bvalue
+    )
+    workflow.connect(
+        [
+            (
+                nii_conversion_wf,
                 tensor_wf,
-                [("outputnode.dwi_preproc", "inputnode.dwi_file")],
+                [
+                    ("outputnode.dwi_file", "inputnode.dwi_file"),
+                    ("outputnode.dwi_bvec", "inputnode.in_bvec"),
+                    ("outputnode.dwi_bval", "inputnode.in_bval"),
+                ],
+            ),
+            (
+                brain_mask_wf,
+                tensor_wf,
+                [("outputnode.brain_mask", "inputnode.brain_mask")],
             ),
             (
                 tensor_wf,
@@ -295,9 +405,8 @@ def init_dwi_preproc_wf(
         ]
     )
 
-    # Mask the T1w
-    t1w_brain = pe.Node(ApplyMask(), name="t1w_brain")
-    epi_reg_wf = init_epireg_wf()
+    # T1w brain and WM mask are prepared once per subject (anat_prep_wf)
+    epi_reg_wf = init_epireg_wf(engine=coreg_engine)
 
     workflow.connect(
         [
@@ -306,16 +415,10 @@ def init_dwi_preproc_wf(
                 epi_reg_wf,
                 [
                     ("t1w_preproc", "inputnode.t1w_head"),
+                    ("t1w_brain", "inputnode.t1w_brain"),
+                    ("t1w_wm_mask", "inputnode.wm_mask"),
                 ],
             ),
-            # T1w Mask
-            (
-                inputnode,
-                t1w_brain,
-                [("t1w_preproc", "in_file"), ("t1w_mask", "in_mask")],
-            ),
-            # T1w Brain
-            (t1w_brain, epi_reg_wf, [("out_file", "inputnode.t1w_brain")]),
             # BBRegister
             (
                 nii_conversion_wf,
@@ -338,13 +441,17 @@ def init_dwi_preproc_wf(
         ]
     )
 
-    apply_transform_wf = init_apply_transform()
+    apply_transform_wf = init_apply_transform(regrid=regrid_dwi)
     workflow.connect(
         [
             (
-                preprocess_wf,
+                nii_conversion_wf,
                 apply_transform_wf,
-                [("outputnode.dwi_preproc", "inputnode.dwi_file")],
+                [
+                    ("outputnode.dwi_file", "inputnode.dwi_file"),
+                    ("outputnode.dwi_bvec", "inputnode.dwi_bvec"),
+                    ("outputnode.dwi_bval", "inputnode.dwi_bval"),
+                ],
             ),
             (
                 preproc_epi_ref_wf,
@@ -357,20 +464,15 @@ def init_dwi_preproc_wf(
                 [("outputnode.epi_to_t1w_aff", "inputnode.epi_to_t1w_aff")],
             ),
             (
-                t1w_brain,
+                inputnode,
                 apply_transform_wf,
-                [("out_file", "inputnode.t1w_brain")],
+                [("t1w_brain", "inputnode.t1w_brain")],
             ),
             (
                 tensor_wf,
                 apply_transform_wf,
                 [("outputnode.metrics", "inputnode.tensor_metrics")],
             ),
-            (
-                apply_transform_wf,
-                NII_COREG_DWI_CONVERSION_NODE,
-                [("outputnode.dwi_file", "in_file")],
-            ),
             (
                 apply_transform_wf,
                 derivatives_wf,
@@ -379,36 +481,153 @@ def init_dwi_preproc_wf(
                         "outputnode.tensor_metrics",
                         "inputnode.coreg_tensor_metrics",
                     ),
-                ],
-            ),
-        ]
-    )
-    workflow.connect(
-        [
-            (
-                NII_COREG_DWI_CONVERSION_NODE,
-                derivatives_wf,
-                [
                     (
-                        "out_file",
+                        "outputnode.dwi_file",
                         "inputnode.coreg_dwi_preproc_file",
                     ),
                     (
-                        "out_bvec",
+                        "outputnode.dwi_bvec",
                         "inputnode.coreg_dwi_preproc_bvec",
                     ),
                     (
-                        "out_bval",
+                        "outputnode.dwi_bval",
                         "inputnode.coreg_dwi_preproc_bval",
                     ),
-                    (
-                        "json_export",
-                        "inputnode.coreg_dwi_preproc_json",
-                    ),
                 ],
             ),
+            # resampling keeps the series' acquisition metadata
+            (
+                nii_conversion_wf,
+                derivatives_wf,
+                [("outputnode.dwi_json", "inputnode.coreg_dwi_preproc_json")],
+            ),
         ]
     )
+    if parcellation is not None:
+        from dwiprep.workflows.dmri.pipelines.parcellation import (
+            PARCELLATIONS,
+        )
+
+        parcellation_wf = init_parcellation_wf(
+            parcellation=parcellation, freesurfer=freesurfer
+        )
+        workflow.connect(
+            [
+                (
+                    apply_transform_wf,
+                    parcellation_wf,
+                    [
+                        (
+                            "outputnode.tensor_metrics",
+                            "inputnode.tensor_metrics",
+                        )
+                    ],
+                ),
+                (
+                    inputnode,
+                    parcellation_wf,
+                    [
+                        (
+                            PARCELLATIONS[parcellation],
+                            "inputnode.parcellation",
+                        )
+                    ],
+                ),
+                (
+                    parcellation_wf,
+                    derivatives_wf,
+                    [
+                        (
+                            "outputnode.stats",
+                            "inputnode.coreg_parcellation_stats",
+                        )
+                    ],
+                ),
+            ]
+        )
+
+    if std_space_output:
+        # a single (composite) interpolation from native to standard space
+        std_transform_wf = init_std_transform_wf()
+        workflow.connect(
+            [
+                (
+                    inputnode,
+                    std_transform_wf,
+                    [
+                        ("template", "inputnode.template"),
+                        ("anat2std_xfm", "inputnode.anat2std_xfm"),
+                    ],
+                ),
+                (
+                    nii_conversion_wf,
+                    std_transform_wf,
+                    [
+                        ("outputnode.dwi_file", "inputnode.dwi_file"),
+                        ("outputnode.epi_ref_file", "inputnode.epiref"),
+                    ],
+                ),
+                (
+                    epi_reg_wf,
+                    std_transform_wf,
+                    [
+                        (
+                            "outputnode.epi_to_t1w_aff",
+                            "inputnode.epi_to_t1w_aff",
+                        ),
+                    ],
+                ),
+                (
+                    inputnode,
+                    std_transform_wf,
+                    [("t1w_brain", "inputnode.t1w_brain")],
+                ),
+                (
+                    tensor_wf,
+                    std_transform_wf,
+                    [("outputnode.metrics", "inputnode.tensor_metrics")],
+                ),
+                (
+                    std_transform_wf,
+                    derivatives_wf,
+                    [
+                        (
+                            "outputnode.dwi_file",
+                            "inputnode.std_dwi_preproc_file",
+                        ),
+                        (
+                            "outputnode.tensor_metrics",
+                            "inputnode.std_tensor_metrics",
+                        ),
+                    ],
+                ),
+                # b-vectors follow the rigid EPI-to-T1w rotation
+                (
+                    apply_transform_wf,
+                    derivatives_wf,
+                    [
+                        (
+                            "outputnode.dwi_rotated_bvec",
+                            "inputnode.std_dwi_preproc_bvec",
+                        ),
+                        (
+                            "outputnode.dwi_bval",
+                            "inputnode.std_dwi_preproc_bval",
+                        ),
+                    ],
+                ),
+                (
+                    nii_conversion_wf,
+                    derivatives_wf,
+                    [
+                        (
+                            "outputnode.dwi_json",
+                            "inputnode.std_dwi_preproc_json",
+                        ),
+                    ],
+                ),
+            ]
+        )
     return workflow
 
 
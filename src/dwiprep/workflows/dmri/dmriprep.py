@@ -10,6 +10,14 @@ from dwiprep.utils.bids_query.bids_query import BidsQuery
 from dwiprep.utils.bids_query.utils import get_fieldmaps
 from dwiprep.utils.inputs import INPUT_FIELDS, INPUTNODE
 from dwiprep.workflows.dmri.base import init_dwi_preproc_wf
+from dwiprep.workflows.dmri.pipelines.fieldmaps import (
+    get_fieldmap_wf_name,
+    init_fieldmap_wf,
+)
+from dwiprep.workflows.dmri.pipelines.fieldmaps.edges import (
+    OUTPUT_TO_DWI_PREPROC_EDGES,
+    OUTPUT_TO_DWI_PREPROC_TOPUP_EDGES,
+)
 from dwiprep.workflows.dmri.utils.messages import MISSING_ENTITY
 from dwiprep.workflows.dmri.utils.utils import (
     MANDATORY_ENTITIES,
@@ -42,6 +50,8 @@ class DmriPrep:
     OUTPUT_NAME = "dmriprep"
     #: Scan-wise input node
     INPUTNODE = INPUTNODE
+    #: Fieldmaps prepared once per session and shared across runs
+    SHARED_FIELDMAP_KEYS = ["fmap_ap", "fmap_pa"]
 
     def __init__(
         self,
@@ -50,9 +60,13 @@ class DmriPrep:
         participant_label: str,
         destination: str,
         work_dir: str = None,
+        dmriprep_kwargs: dict = {},
+        freesurfer: bool = True,
     ) -> None:
         """[summary]"""
         self.bids_query = bids_query
+        self.dmriprep_kwargs = dmriprep_kwargs
+        self.freesurfer = freesurfer
         self.session_data = session_data
         self.participant_label = participant_label
         self.destination = destination
@@ -116,7 +130,30 @@ class DmriPrep:
             niu.IdentityInterface(fields=INPUT_FIELDS), name="inputnode"
         )
 
-    def data_to_input_node(self, run_data: str) -> pe.Node:
+    def query_fieldmaps(self, dwi_file: str) -> dict:
+        """
+        Locates the fieldmaps *IntendedFor* a DWI run.
+
+        Parameters
+        ----------
+        dwi_file : str
+            Run's DWI NIfTI file
+
+        Returns
+        -------
+        dict
+            Fieldmaps' NIfTI and json files, keyed by input node fields
+            (i.e, "fmap_ap", "fmap_ap_json")
+        """
+        fieldmaps = get_fieldmaps(str(dwi_file), self.bids_query.layout)
+        return {
+            key.lower().replace("rev", "pa").replace("fwd", "ap"): value
+            for key, value in fieldmaps.items()
+        }
+
+    def data_to_input_node(
+        self, run_data: str, fieldmaps: dict = None
+    ) -> pe.Node:
         """
         Generate a run-specific input node.
 
@@ -124,8 +161,9 @@ class DmriPrep:
         ----------
         run_data : dict
             Run's DWI-related data.
-        session : str, optional
-            Session's identifier, by default None
+        fieldmaps : dict, optional
+            Run-specific fieldmaps, queried by default (empty when the
+            run's fieldmaps are prepared by a shared workflow)
 
         Returns
         -------
@@ -147,27 +185,118 @@ class DmriPrep:
         inputnode.inputs.in_json = str(Path(dwi_json).absolute())
 
         # add fieldmaps
-        fieldmaps = get_fieldmaps(str(dwi_nifti), self.bids_query.layout)
+        if fieldmaps is None:
+            fieldmaps = self.query_fieldmaps(dwi_nifti)
         for key, value in fieldmaps.items():
-            valid_key = key.lower().replace("rev", "pa").replace("fwd", "ap")
-            inputnode.set_input(valid_key, value)
+            inputnode.set_input(key, value)
         return inputnode
 
-    def init_workflow_per_dwi(self):
-        dmriprep_wfs = []
+    def init_fieldmap_wf(self, fieldmaps: dict) -> pe.Workflow:
+        """
+        Initiates a workflow preparing an AP/PA fieldmap pair once for all
+        of the session's runs it is *IntendedFor*.
+
+        Parameters
+        ----------
+        fieldmaps : dict
+            Fieldmaps' NIfTI and json files (output of *query_fieldmaps*)
+
+        Returns
+        -------
+        pe.Workflow
+            Shared fieldmap workflow
+        """
+        fieldmap_wf = init_fieldmap_wf(
+            name=get_fieldmap_wf_name(fieldmaps.get("fmap_ap")),
+            topup=self.shared_topup,
+        )
+        inputnode = fieldmap_wf.get_node("inputnode")
+        for key, value in fieldmaps.items():
+            inputnode.set_input(key, value)
+        inputnode.inputs.base_directory = self.destination
+        fieldmap_wf.base_dir = self.work_dir
+        self.set_out_path_base(fieldmap_wf)
+        return fieldmap_wf
+
+    def set_out_path_base(self, workflow: pe.Workflow):
+        """
+        Overwrites ``out_path_base`` of *workflow*'s DataSinks.
+
+        Parameters
+        ----------
+        workflow : pe.Workflow
+            A workflow with DerivativesDataSinks (named "ds_*")
+        """
+        for node in workflow.list_node_names():
+            if node.split(".")[-1].startswith("ds_"):
+                workflow.get_node(node).interface.out_path_base = (
+                    self.OUTPUT_NAME
+                )
+
+    def init_workflow_per_dwi(self) -> Tuple[list, list]:
+        """
+        Initiates a preprocessing workflow per DWI run. AP/PA fieldmap pairs
+        are prepared once per session, by a workflow shared between all of
+        the runs that reference the same pair (including the susceptibility
+        field, if ``shared_topup`` is set in *dmriprep_kwargs*).
+
+        Returns
+        -------
+        Tuple[list, list]
+            DWI runs' workflows and the connections of shared fieldmap
+            workflows to them
+        """
+        dmriprep_wfs, fieldmap_connections = [], []
+        fieldmap_wfs = {}
         for dwi_data in self.session_data.get("dwi"):
-            inputnode = self.data_to_input_node(dwi_data)
+            fieldmaps = self.query_fieldmaps(dwi_data.get("nifti"))
+            fieldmap_key = tuple(
+                fieldmaps.get(key) for key in self.SHARED_FIELDMAP_KEYS
+            )
+            shared_fieldmap = all(fieldmap_key)
+            inputnode = self.data_to_input_node(
+                dwi_data, {} if shared_fieldmap else fieldmaps
+            )
             dmriprep_wf = init_dwi_preproc_wf(
                 dwi_data.get("nifti"),
                 inputnode,
                 self.destination,
                 self.work_dir,
+                shared_fieldmap=shared_fieldmap,
+                freesurfer=self.freesurfer,
+                **self.dmriprep_kwargs,
             )
             dmriprep_wf.base_dir = self.work_dir
-            for node in dmriprep_wf.list_node_names():
-                if node.split(".")[-1].startswith("ds_"):
-                    dmriprep_wf.get_node(
-                        node
-                    ).interface.out_path_base = "dmriprep"
+            self.set_out_path_base(dmriprep_wf)
             dmriprep_wfs.append(dmriprep_wf)
-        return dmriprep_wfs
+            if shared_fieldmap:
+                if fieldmap_key not in fieldmap_wfs:
+                    fieldmap_wfs[fieldmap_key] = self.init_fieldmap_wf(
+                        fieldmaps
+                    )
+                fieldmap_connections.append(
+                    (
+                        fieldmap_wfs[fieldmap_key],
+                        dmriprep_wf,
+                        OUTPUT_TO_DWI_PREPROC_EDGES
+                        + (
+                            OUTPUT_TO_DWI_PREPROC_TOPUP_EDGES
+                            if self.shared_topup
+                            else []
+                        ),
+                    )
+                )
+        return dmriprep_wfs, fieldmap_connections
+
+    @property
+    def shared_topup(self) -> bool:
+        """
+        Whether shared fieldmaps' susceptibility fields are estimated once
+        per session, so that only *eddy* runs per DWI run.
+
+        Returns
+        -------
+        bool
+            ``shared_topup`` of *dmriprep_kwargs*, False by default
+        """
+        return self.dmriprep_kwargs.get("shared_topup", False)
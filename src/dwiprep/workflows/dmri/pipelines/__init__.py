@@ -1,11 +1,19 @@
+from dwiprep.workflows.dmri.pipelines.brain_mask import init_brain_mask_wf
 from dwiprep.workflows.dmri.pipelines.conversions import (
     init_conversion_wf,
     init_nii_conversion_wf,
 )
 from dwiprep.workflows.dmri.pipelines.epi_ref import init_epi_ref_wf
+from dwiprep.workflows.dmri.pipelines.fieldmaps import (
+    get_fieldmap_wf_name,
+    init_fieldmap_wf,
+)
 from dwiprep.workflows.dmri.pipelines.fmap_prep import (
     init_phasediff_wf,
     add_fieldmaps_to_wf,
 )
+from dwiprep.workflows.dmri.pipelines.parcellation import (
+    init_parcellation_wf,
+)
 from dwiprep.workflows.dmri.pipelines.preprocess import init_preprocess_wf
 from dwiprep.workflows.dmri.pipelines.tensor_estimation import init_tensor_wf
@@ -0,0 +1,3 @@
+from dwiprep.workflows.dmri.pipelines.brain_mask.brain_mask import (
+    init_brain_mask_wf,
+)
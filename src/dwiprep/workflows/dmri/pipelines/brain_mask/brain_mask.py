@@ -0,0 +1,36 @@
+import nipype.pipeline.engine as pe
+
+from dwiprep.workflows.dmri.pipelines.brain_mask.edges import (
+    BET_TO_OUTPUT_EDGES,
+    INPUT_TO_BET_EDGES,
+)
+from dwiprep.workflows.dmri.pipelines.brain_mask.nodes import (
+    BET_NODE,
+    INPUT_NODE,
+    OUTPUT_NODE,
+)
+
+BRAIN_MASK = [
+    (INPUT_NODE, BET_NODE, INPUT_TO_BET_EDGES),
+    (BET_NODE, OUTPUT_NODE, BET_TO_OUTPUT_EDGES),
+]
+
+
+def init_brain_mask_wf(name: str = "brain_mask_wf") -> pe.Workflow:
+    """
+    Initiate a workflow for the generation of a DWI brain mask from
+    the (preprocessed) EPI reference image.
+
+    Parameters
+    ----------
+    name : str, optional
+        Workflow's name, by default "brain_mask_wf"
+
+    Returns
+    -------
+    pe.Workflow
+        Initiated workflow
+    """
+    wf = pe.Workflow(name=name)
+    wf.connect(BRAIN_MASK)
+    return wf
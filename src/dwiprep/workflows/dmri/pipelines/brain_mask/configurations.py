@@ -0,0 +1,9 @@
+"""
+Configurations for *brain_mask* pipeline.
+"""
+#: i/o
+INPUT_NODE_FIELDS = ["epi_ref_file"]
+OUTPUT_NODE_FIELDS = ["brain_mask"]
+
+#: Keyword arguments
+BET_KWARGS = dict(mask=True, frac=0.2, robust=True, output_type="NIFTI_GZ")
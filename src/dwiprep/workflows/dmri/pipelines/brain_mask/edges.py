@@ -0,0 +1,6 @@
+"""
+Connections configurations for *brain_mask* pipelines.
+"""
+
+INPUT_TO_BET_EDGES = [("epi_ref_file", "in_file")]
+BET_TO_OUTPUT_EDGES = [("mask_file", "brain_mask")]
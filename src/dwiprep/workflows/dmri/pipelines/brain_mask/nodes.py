@@ -0,0 +1,25 @@
+"""
+Nodes' configurations for *brain_mask* pipelines.
+"""
+import nipype.pipeline.engine as pe
+from nipype.interfaces import fsl
+from nipype.interfaces import utility as niu
+
+from dwiprep.workflows.dmri.pipelines.brain_mask.configurations import (
+    BET_KWARGS,
+    INPUT_NODE_FIELDS,
+    OUTPUT_NODE_FIELDS,
+)
+
+#: i/o
+INPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=INPUT_NODE_FIELDS),
+    name="inputnode",
+)
+OUTPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=OUTPUT_NODE_FIELDS),
+    name="outputnode",
+)
+
+#: Building blocks
+BET_NODE = pe.Node(fsl.BET(**BET_KWARGS), name="bet")
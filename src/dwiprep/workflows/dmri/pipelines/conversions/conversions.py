@@ -79,11 +79,6 @@ NII_CONVERSION = [
         NII_PREPROC_DWI_CONVERSION_NODE,
         NII_INPUT_TO_PREPROC_DWI_CONVERSION_EDGES,
     ),
-    (
-        NII_INPUT_NODE,
-        NII_PHASEDIFF_CONVERSION_NODE,
-        NII_INPUT_TO_PHASEDIFF_CONVERSION_EDGES,
-    ),
     (
         NII_INPUT_NODE,
         NII_PREPROC_SBREF_CONVERSION_NODE,
@@ -95,14 +90,21 @@ NII_CONVERSION = [
         NII_PREPROC_DWI_CONVERSION_TO_OUTPUT_EDGES,
     ),
     (
-        NII_PHASEDIFF_CONVERSION_NODE,
+        NII_PREPROC_SBREF_CONVERSION_NODE,
         NII_OUTPUT_NODE,
-        NII_PHASEDIFF_CONVERSION_TO_OUTPUT_EDGES,
+        NII_PREPROC_SBREF_CONVERSION_TO_OUTPUT_EDGES,
+    ),
+]
+NII_PHASEDIFF_CONVERSION = [
+    (
+        NII_INPUT_NODE,
+        NII_PHASEDIFF_CONVERSION_NODE,
+        NII_INPUT_TO_PHASEDIFF_CONVERSION_EDGES,
     ),
     (
-        NII_PREPROC_SBREF_CONVERSION_NODE,
+        NII_PHASEDIFF_CONVERSION_NODE,
         NII_OUTPUT_NODE,
-        NII_PREPROC_SBREF_CONVERSION_TO_OUTPUT_EDGES,
+        NII_PHASEDIFF_CONVERSION_TO_OUTPUT_EDGES,
     ),
 ]
 
@@ -147,7 +149,9 @@ def init_conversion_wf(
     return wf
 
 
-def init_nii_conversion_wf(name: str = "nii_conversion_wf") -> pe.Workflow:
+def init_nii_conversion_wf(
+    name: str = "nii_conversion_wf", phasediff: bool = True
+) -> pe.Workflow:
     """
     Initiate a workflow to convert input files to NIfTI format for ease of use
 
@@ -156,6 +160,9 @@ def init_nii_conversion_wf(name: str = "nii_conversion_wf") -> pe.Workflow:
     ----------
     name : str, optional
         Workflow's name, by default "nii_conversion_wf"
+    phasediff : bool, optional
+        Whether to convert the run's phasediff image as well, by default True
+        (False when the fieldmap is shared across runs)
 
     Returns
     -------
@@ -164,6 +171,8 @@ def init_nii_conversion_wf(name: str = "nii_conversion_wf") -> pe.Workflow:
     """
     wf = pe.Workflow(name=name)
     wf.connect(NII_CONVERSION)
+    if phasediff:
+        wf.connect(NII_PHASEDIFF_CONVERSION)
     return wf
 
 def init_coreg_conversion_wf(name: str = "coreg_conversion_wf") -> pe.Workflow:
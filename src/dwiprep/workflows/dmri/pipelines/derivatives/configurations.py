@@ -9,6 +9,7 @@ INPUT_NODE_FIELDS = [
     "native_dwi_preproc_bval",
     "native_epi_ref_file",
     "native_epi_ref_json",
+    "native_brain_mask",
     "epi_to_t1w_aff",
     "t1w_to_epi_aff",
     "coreg_dwi_preproc_file",
@@ -18,8 +19,41 @@ INPUT_NODE_FIELDS = [
     "coreg_epi_ref_file",
     "native_tensor_metrics",
     "coreg_tensor_metrics",
+    "std_dwi_preproc_file",
+    "std_dwi_preproc_bvec",
+    "std_dwi_preproc_bval",
+    "std_dwi_preproc_json",
+    "std_tensor_metrics",
+    "coreg_parcellation_stats",
 ]
 
+#: Run-specific phasediff (shared fieldmaps are stored once per session)
+PHASEDIFF_FIELDS = ["phasediff_file", "phasediff_json"]
+
+#: Optional standard-space derivatives
+STD_FIELDS = [
+    "std_dwi_preproc_file",
+    "std_dwi_preproc_bvec",
+    "std_dwi_preproc_bval",
+    "std_dwi_preproc_json",
+    "std_tensor_metrics",
+]
+
+#: Derivatives stored for every run
+DERIVATIVES_FIELDS = [
+    field
+    for field in INPUT_NODE_FIELDS
+    if field not in ["source_file", "base_directory"]
+    + PHASEDIFF_FIELDS
+    + STD_FIELDS
+]
+
+#: Concurrent writes of the batched sink
+DS_BATCH_KWARGS = dict(num_threads=4)
+
+#: Standard space of the (optional) standard-space derivatives
+STD_SPACE = "MNI152NLin2009cAsym"
+
 PHASEDIFF_KWARGS = dict(
     datatype="fmap",
     space="orig",
@@ -43,6 +77,13 @@ COREG_DWI_PREPROC_KWARGS = dict(
     suffix="dwi",
     compress=None,
 )
+STD_DWI_PREPROC_KWARGS = dict(
+    datatype="dwi",
+    space=STD_SPACE,
+    desc="preproc",
+    suffix="dwi",
+    compress=None,
+)
 NATIVE_SBREF_PREPROC_KWARGS = dict(
     datatype="dwi",
     space="orig",
@@ -57,6 +98,13 @@ COREG_SBREF_PREPROC_KWARGS = dict(
     suffix="epiref",
     compress=None,
 )
+NATIVE_BRAIN_MASK_KWARGS = dict(
+    datatype="dwi",
+    space="orig",
+    desc="brain",
+    suffix="mask",
+    compress=True,
+)
 EPI_TO_T1_AFF_KWARGS = dict(
     datatype="dwi",
     suffix="xfm",
@@ -81,3 +129,9 @@ NATIVE_TENSOR_KWARGS = dict(
 COREG_TENSOR_KWARGS = dict(
     datatype="dwi", suffix="epiref", space="anat", compress=True
 )
+STD_TENSOR_KWARGS = dict(
+    datatype="dwi", suffix="epiref", space=STD_SPACE, compress=True
+)
+COREG_PARCELLATION_STATS_KWARGS = dict(
+    datatype="dwi", suffix="stats", space="anat", compress=None
+)
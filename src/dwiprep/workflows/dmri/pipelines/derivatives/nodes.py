@@ -1,17 +1,22 @@
 import nipype.pipeline.engine as pe
 from nipype.interfaces import utility as niu
 
-from dwiprep.interfaces.dds import DerivativesDataSink
+from dwiprep.interfaces.dds import BatchDerivativesDataSink
 from dwiprep.workflows.dmri.pipelines.derivatives.configurations import (
     COREG_DWI_PREPROC_KWARGS,
+    COREG_PARCELLATION_STATS_KWARGS,
     COREG_SBREF_PREPROC_KWARGS,
     COREG_TENSOR_KWARGS,
+    DS_BATCH_KWARGS,
     EPI_TO_T1_AFF_KWARGS,
     INPUT_NODE_FIELDS,
+    NATIVE_BRAIN_MASK_KWARGS,
     NATIVE_DWI_PREPROC_KWARGS,
     NATIVE_SBREF_PREPROC_KWARGS,
     NATIVE_TENSOR_KWARGS,
     PHASEDIFF_KWARGS,
+    STD_DWI_PREPROC_KWARGS,
+    STD_TENSOR_KWARGS,
     T1_to_EPI_AFF_KWARGS,
 )
 
@@ -39,111 +44,67 @@ def infer_metric(in_file: str) -> str:
     return suffix, in_file
 
 
-INPUT_NODE = pe.Node(
-    niu.IdentityInterface(fields=INPUT_NODE_FIELDS), name="inputnode"
-)
-
-#: phasediff
-PHASEDIFF_LIST_NODE = pe.Node(
-    niu.Merge(numinputs=2), name="list_phasediff_inputs"
-)
-PHASEDIFF_DDS_NODE = pe.MapNode(
-    DerivativesDataSink(**PHASEDIFF_KWARGS),
-    name="ds_phasediff",
-    iterfield=["in_file"],
-)
-
-#: DWI
-NATIVE_DWI_LIST_NODE = pe.Node(
-    niu.Merge(numinputs=4), name="list_native_dwi_inputs"
-)
-NATIVE_DWI_DDS_NODE = pe.MapNode(
-    DerivativesDataSink(**NATIVE_DWI_PREPROC_KWARGS),
-    name="ds_native_dwi",
-    iterfield=["in_file"],
-)
+def infer_desc(in_file: str) -> str:
+    """
+    Infers the ``desc`` entity of a tensor-derived metric from its name.
 
-COREG_DWI_LIST_NODE = pe.Node(
-    niu.Merge(numinputs=4), name="list_coreg_dwi_inputs"
-)
-COREG_DWI_DDS_NODE = pe.MapNode(
-    DerivativesDataSink(**COREG_DWI_PREPROC_KWARGS),
-    name="ds_coreg_dwi",
-    iterfield=["in_file"],
-)
+    Parameters
+    ----------
+    in_file : str
+        A string representing an existing file.
 
-#: EPI reference
-NATIVE_SBREF_LIST_NODE = pe.Node(
-    niu.Merge(numinputs=2), name="list_native_sbref_inputs"
-)
-NATIVE_SBREF_DDS_NODE = pe.MapNode(
-    DerivativesDataSink(**NATIVE_SBREF_PREPROC_KWARGS),
-    name="ds_native_sbref",
-    iterfield=["in_file"],
-)
+    Returns
+    -------
+    str
+        A metric identifier/label (i.e, fa, adc, rd etc.)
+    """
+    return infer_metric(in_file)[0]
 
-COREG_SBREF_DDS_NODE = pe.MapNode(
-    DerivativesDataSink(**COREG_SBREF_PREPROC_KWARGS),
-    name="ds_coreg_sbref",
-    iterfield=["in_file"],
-)
 
-#: transformations
-EPI_TO_T1_NODE = pe.Node(
-    DerivativesDataSink(**EPI_TO_T1_AFF_KWARGS),
-    name="ds_epi_to_t1_aff",
-)
-T1_TO_EPI_NODE = pe.Node(
-    DerivativesDataSink(**T1_to_EPI_AFF_KWARGS),
-    name="ds_t1_to_epi_aff",
+INPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=INPUT_NODE_FIELDS), name="inputnode"
 )
 
-#: tensor-derived
-NATIVE_INFER_METRIC_NODE = pe.MapNode(
-    niu.Function(
-        input_names=["in_file"],
-        output_names=["metric", "in_file"],
-        function=infer_metric,
-    ),
-    name="native_infer_metric",
-    iterfield=["in_file"],
-)
-NATIVE_TENSOR_NODE = pe.MapNode(
-    DerivativesDataSink(**NATIVE_TENSOR_KWARGS),
-    name="ds_native_tensor",
-    iterfield=["in_file", "desc"],
-)
-NATIVE_TENSOR_WF = pe.Workflow(name="ds_native_tensor_wf")
-NATIVE_TENSOR_WF.connect(
-    [
-        (
-            NATIVE_INFER_METRIC_NODE,
-            NATIVE_TENSOR_NODE,
-            [("metric", "desc"), ("in_file", "in_file")],
-        ),
-    ]
-)
-COREG_INFER_METRIC_NODE = pe.MapNode(
-    niu.Function(
-        input_names=["in_file"],
-        output_names=["metric", "in_file"],
-        function=infer_metric,
+#: Entities of each derivative, keyed by the input node's fields
+DS_BATCH_OUTPUTS = {
+    #: phasediff
+    "phasediff_file": PHASEDIFF_KWARGS,
+    "phasediff_json": PHASEDIFF_KWARGS,
+    #: DWI
+    "native_dwi_preproc_file": NATIVE_DWI_PREPROC_KWARGS,
+    "native_dwi_preproc_json": NATIVE_DWI_PREPROC_KWARGS,
+    "native_dwi_preproc_bvec": NATIVE_DWI_PREPROC_KWARGS,
+    "native_dwi_preproc_bval": NATIVE_DWI_PREPROC_KWARGS,
+    "coreg_dwi_preproc_file": COREG_DWI_PREPROC_KWARGS,
+    "coreg_dwi_preproc_json": COREG_DWI_PREPROC_KWARGS,
+    "coreg_dwi_preproc_bvec": COREG_DWI_PREPROC_KWARGS,
+    "coreg_dwi_preproc_bval": COREG_DWI_PREPROC_KWARGS,
+    "std_dwi_preproc_file": STD_DWI_PREPROC_KWARGS,
+    "std_dwi_preproc_json": STD_DWI_PREPROC_KWARGS,
+    "std_dwi_preproc_bvec": STD_DWI_PREPROC_KWARGS,
+    "std_dwi_preproc_bval": STD_DWI_PREPROC_KWARGS,
+    #: EPI reference
+    "native_epi_ref_file": NATIVE_SBREF_PREPROC_KWARGS,
+    "native_epi_ref_json": NATIVE_SBREF_PREPROC_KWARGS,
+    "coreg_epi_ref_file": COREG_SBREF_PREPROC_KWARGS,
+    #: brain mask
+    "native_brain_mask": NATIVE_BRAIN_MASK_KWARGS,
+    #: transformations
+    "epi_to_t1w_aff": EPI_TO_T1_AFF_KWARGS,
+    "t1w_to_epi_aff": T1_to_EPI_AFF_KWARGS,
+    #: tensor-derived
+    "native_tensor_metrics": dict(NATIVE_TENSOR_KWARGS, desc=infer_desc),
+    "coreg_tensor_metrics": dict(COREG_TENSOR_KWARGS, desc=infer_desc),
+    "std_tensor_metrics": dict(STD_TENSOR_KWARGS, desc=infer_desc),
+    #: region-wise statistics (desc is the parcellation's name)
+    "coreg_parcellation_stats": dict(
+        COREG_PARCELLATION_STATS_KWARGS, desc=infer_desc
     ),
-    name="coreg_infer_metric",
-    iterfield=["in_file"],
-)
-COREG_TENSOR_NODE = pe.MapNode(
-    DerivativesDataSink(**COREG_TENSOR_KWARGS),
-    name="ds_coreg_tensor",
-    iterfield=["in_file", "desc"],
-)
-COREG_TENSOR_WF = pe.Workflow(name="ds_coreg_tensor_wf")
-COREG_TENSOR_WF.connect(
-    [
-        (
-            COREG_INFER_METRIC_NODE,
-            COREG_TENSOR_NODE,
-            [("metric", "desc"), ("in_file", "in_file")],
-        ),
-    ]
+}
+
+#: All of a run's derivatives, stored by a single job
+DS_BATCH_NODE = pe.Node(
+    BatchDerivativesDataSink(outputs=DS_BATCH_OUTPUTS, **DS_BATCH_KWARGS),
+    name="ds_batch",
+    n_procs=DS_BATCH_KWARGS["num_threads"],
 )
@@ -2,9 +2,11 @@
 Configurations for *epi_ref* pipeline.
 """
 #: i/o
-INPUT_NODE_FIELDS = ["dwi_file"]
+INPUT_NODE_FIELDS = ["dwi_file", "in_bval", "in_bvec"]
 OUTPUT_NODE_FIELDS = ["epi_ref_file"]
 
 #: Keyword arguments
-DWIEXTRACT_KWARGS = dict(bzero=True, out_file="b0.mif")
+SELECT_B0_KWARGS = dict(b0_only=True)
+COORD_ARGS_KWARGS = dict(input_names=["coord"], output_names=["args"])
+EXTRACT_B0_KWARGS = dict(out_file="b0.mif")
 MRMATH_KWARGS = dict(operation="mean", axis=3, out_file="mean_b0.mif")
@@ -2,9 +2,12 @@
 Connections configurations for *epi_ref* pipelines.
 """
 
-INPUT_TO_DWIEXTRACT_EDGES = [
+INPUT_TO_SELECT_B0_EDGES = [("in_bval", "in_bval"), ("in_bvec", "in_bvec")]
+SELECT_B0_TO_COORD_ARGS_EDGES = [("coord", "coord")]
+INPUT_TO_EXTRACT_B0_EDGES = [
     ("dwi_file", "in_file"),
 ]
-DWIEXTRACT_TO_MRMATH_EDGES = [("out_file", "in_file")]
+COORD_ARGS_TO_EXTRACT_B0_EDGES = [("args", "args")]
+EXTRACT_B0_TO_MRMATH_EDGES = [("out_file", "in_file")]
 
 MRMATH_TO_OUTPUT_EDGES = [("out_file", "epi_ref_file")]
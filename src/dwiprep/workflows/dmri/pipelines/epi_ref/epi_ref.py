@@ -2,18 +2,29 @@ import nipype.pipeline.engine as pe
 from dwiprep.workflows.dmri.pipelines.epi_ref.nodes import (
     INPUT_NODE,
     OUTPUT_NODE,
-    DWIEXTRACT_NODE,
+    SELECT_B0_NODE,
+    COORD_ARGS_NODE,
+    EXTRACT_B0_NODE,
     MRMATH_NODE,
 )
 from dwiprep.workflows.dmri.pipelines.epi_ref.edges import (
-    INPUT_TO_DWIEXTRACT_EDGES,
-    DWIEXTRACT_TO_MRMATH_EDGES,
+    INPUT_TO_SELECT_B0_EDGES,
+    SELECT_B0_TO_COORD_ARGS_EDGES,
+    INPUT_TO_EXTRACT_B0_EDGES,
+    COORD_ARGS_TO_EXTRACT_B0_EDGES,
+    EXTRACT_B0_TO_MRMATH_EDGES,
     MRMATH_TO_OUTPUT_EDGES,
 )
+from dwiprep.workflows.dmri.utils.utils import copy_connections
 
+#: b=0 volumes are located by the (cached) gradient table service and
+#: extracted by index
 EPI_REF = [
-    (INPUT_NODE, DWIEXTRACT_NODE, INPUT_TO_DWIEXTRACT_EDGES),
-    (DWIEXTRACT_NODE, MRMATH_NODE, DWIEXTRACT_TO_MRMATH_EDGES),
+    (INPUT_NODE, SELECT_B0_NODE, INPUT_TO_SELECT_B0_EDGES),
+    (SELECT_B0_NODE, COORD_ARGS_NODE, SELECT_B0_TO_COORD_ARGS_EDGES),
+    (INPUT_NODE, EXTRACT_B0_NODE, INPUT_TO_EXTRACT_B0_EDGES),
+    (COORD_ARGS_NODE, EXTRACT_B0_NODE, COORD_ARGS_TO_EXTRACT_B0_EDGES),
+    (EXTRACT_B0_NODE, MRMATH_NODE, EXTRACT_B0_TO_MRMATH_EDGES),
     (MRMATH_NODE, OUTPUT_NODE, MRMATH_TO_OUTPUT_EDGES),
 ]
 
@@ -33,5 +44,5 @@ def init_epi_ref_wf(name: str = "epi_reference_wf") -> pe.Workflow:
         Initiated workflow
     """
     wf = pe.Workflow(name=name)
-    wf.connect(EPI_REF)
+    wf.connect(copy_connections(EPI_REF))
     return wf
@@ -5,13 +5,34 @@ import nipype.pipeline.engine as pe
 from nipype.interfaces import utility as niu
 from nipype.interfaces import mrtrix3 as mrt
 
+from dwiprep.interfaces.gradients import SelectVolumes
 from dwiprep.workflows.dmri.pipelines.epi_ref.configurations import (
     INPUT_NODE_FIELDS,
     OUTPUT_NODE_FIELDS,
-    DWIEXTRACT_KWARGS,
+    SELECT_B0_KWARGS,
+    COORD_ARGS_KWARGS,
+    EXTRACT_B0_KWARGS,
     MRMATH_KWARGS,
 )
 
+
+def volumes_coord_args(coord: str) -> str:
+    """
+    Formats *mrconvert*'s arguments for extracting a subset of volumes.
+
+    Parameters
+    ----------
+    coord : str
+        Comma-separated volume indices (see *SelectVolumes*)
+
+    Returns
+    -------
+    str
+        Additional *mrconvert* arguments
+    """
+    return f"-coord 3 {coord}"
+
+
 #: i/o
 INPUT_NODE = pe.Node(
     niu.IdentityInterface(fields=INPUT_NODE_FIELDS),
@@ -23,8 +44,15 @@ OUTPUT_NODE = pe.Node(
 )
 
 #: Building blocks
-DWIEXTRACT_NODE = pe.Node(
-    mrt.DWIExtract(**DWIEXTRACT_KWARGS), name="dwiextract"
+SELECT_B0_NODE = pe.Node(SelectVolumes(**SELECT_B0_KWARGS), name="select_b0")
+
+COORD_ARGS_NODE = pe.Node(
+    niu.Function(**COORD_ARGS_KWARGS, function=volumes_coord_args),
+    name="coord_args",
+)
+
+EXTRACT_B0_NODE = pe.Node(
+    mrt.MRConvert(**EXTRACT_B0_KWARGS), name="extract_b0"
 )
 
 MRMATH_NODE = pe.Node(
@@ -0,0 +1,4 @@
+from dwiprep.workflows.dmri.pipelines.fieldmaps.fieldmaps import (
+    get_fieldmap_wf_name,
+    init_fieldmap_wf,
+)
@@ -0,0 +1,40 @@
+"""
+Configurations for *fieldmaps* pipeline.
+"""
+#: i/o
+INPUT_NODE_FIELDS = [
+    "fmap_ap",
+    "fmap_ap_json",
+    "fmap_pa",
+    "fmap_pa_json",
+    "base_directory",
+]
+OUTPUT_NODE_FIELDS = ["merged_phasediff", "topup_prefix"]
+
+#: Keyword arguments
+PHASEDIFF_CONVERSION_KWARGS = dict(
+    out_file="phasediff.nii.gz", json_export="phasediff.json"
+)
+ACQPARAMS_KWARGS = dict(input_names=["in_file"], output_names=["out_file"])
+TOPUP_KWARGS = dict(config="b02b0.cnf", out_base="topup")
+TOPUP_PREFIX_KWARGS = dict(
+    input_names=["fieldcoef"], output_names=["prefix"]
+)
+
+#: Derivatives of the shared *topup* estimation
+TOPUP_FIELD_KWARGS = dict(
+    datatype="fmap",
+    space="orig",
+    desc="topup",
+    suffix="fieldmap",
+    compress=True,
+    dismiss_entities=["direction"],
+)
+TOPUP_COEFF_KWARGS = dict(
+    datatype="fmap",
+    space="orig",
+    desc="topupcoeff",
+    suffix="fieldmap",
+    compress=True,
+    dismiss_entities=["direction"],
+)
@@ -0,0 +1,49 @@
+"""
+Connections configurations for *fieldmaps* pipelines.
+"""
+
+#: Conversion to mif
+INPUT_TO_FMAP_AP_CONVERSION_EDGES = [
+    ("fmap_ap", "in_file"),
+    ("fmap_ap_json", "json_import"),
+]
+INPUT_TO_FMAP_PA_CONVERSION_EDGES = [
+    ("fmap_pa", "in_file"),
+    ("fmap_pa_json", "json_import"),
+]
+
+#: fieldmap preperation
+FMAP_AP_CONVERSION_TO_MERGE_EDGES = [("out_file", "in1")]
+FMAP_PA_CONVERSION_TO_MERGE_EDGES = [("out_file", "in2")]
+MERGE_TO_MRCAT_EDGES = [("out", "in_files")]
+MRCAT_TO_OUTPUT_EDGES = [("out_file", "merged_phasediff")]
+
+#: phasediff derivative (named after the AP fieldmap)
+MRCAT_TO_PHASEDIFF_CONVERSION_EDGES = [("out_file", "in_file")]
+PHASEDIFF_CONVERSION_TO_LIST_EDGES = [
+    ("out_file", "in1"),
+    ("json_export", "in2"),
+]
+INPUT_TO_PHASEDIFF_DDS_EDGES = [
+    ("fmap_ap", "source_file"),
+    ("base_directory", "base_directory"),
+]
+PHASEDIFF_LIST_TO_DDS_EDGES = [("out", "in_file")]
+
+#: susceptibility field estimation (shared *topup* mode)
+MRCAT_TO_ACQPARAMS_EDGES = [("out_file", "in_file")]
+PHASEDIFF_CONVERSION_TO_TOPUP_EDGES = [("out_file", "in_file")]
+ACQPARAMS_TO_TOPUP_EDGES = [("out_file", "encoding_file")]
+TOPUP_TO_PREFIX_EDGES = [("out_fieldcoef", "fieldcoef")]
+PREFIX_TO_OUTPUT_EDGES = [("prefix", "topup_prefix")]
+TOPUP_TO_FIELD_DDS_EDGES = [("out_field", "in_file")]
+TOPUP_TO_COEFF_DDS_EDGES = [("out_fieldcoef", "in_file")]
+INPUT_TO_TOPUP_DDS_EDGES = INPUT_TO_PHASEDIFF_DDS_EDGES
+
+#: Shared fieldmap to each DWI run's preprocessing workflow
+OUTPUT_TO_DWI_PREPROC_EDGES = [
+    ("outputnode.merged_phasediff", "inputnode.merged_phasediff")
+]
+OUTPUT_TO_DWI_PREPROC_TOPUP_EDGES = [
+    ("outputnode.topup_prefix", "inputnode.topup_prefix")
+]
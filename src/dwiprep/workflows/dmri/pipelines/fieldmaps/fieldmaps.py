@@ -0,0 +1,126 @@
+from pathlib import Path
+
+import nipype.pipeline.engine as pe
+
+from dwiprep.workflows.dmri.pipelines.fieldmaps.edges import (
+    ACQPARAMS_TO_TOPUP_EDGES,
+    FMAP_AP_CONVERSION_TO_MERGE_EDGES,
+    FMAP_PA_CONVERSION_TO_MERGE_EDGES,
+    INPUT_TO_FMAP_AP_CONVERSION_EDGES,
+    INPUT_TO_FMAP_PA_CONVERSION_EDGES,
+    INPUT_TO_PHASEDIFF_DDS_EDGES,
+    INPUT_TO_TOPUP_DDS_EDGES,
+    MERGE_TO_MRCAT_EDGES,
+    MRCAT_TO_ACQPARAMS_EDGES,
+    MRCAT_TO_OUTPUT_EDGES,
+    MRCAT_TO_PHASEDIFF_CONVERSION_EDGES,
+    PHASEDIFF_CONVERSION_TO_LIST_EDGES,
+    PHASEDIFF_CONVERSION_TO_TOPUP_EDGES,
+    PHASEDIFF_LIST_TO_DDS_EDGES,
+    PREFIX_TO_OUTPUT_EDGES,
+    TOPUP_TO_COEFF_DDS_EDGES,
+    TOPUP_TO_FIELD_DDS_EDGES,
+    TOPUP_TO_PREFIX_EDGES,
+)
+from dwiprep.workflows.dmri.pipelines.fieldmaps.nodes import (
+    ACQPARAMS_NODE,
+    FMAP_AP_CONVERSION_NODE,
+    FMAP_PA_CONVERSION_NODE,
+    INPUT_NODE,
+    MERGE_NODE,
+    MRCAT_NODE,
+    OUTPUT_NODE,
+    PHASEDIFF_CONVERSION_NODE,
+    PHASEDIFF_DDS_NODE,
+    PHASEDIFF_LIST_NODE,
+    TOPUP_COEFF_DDS_NODE,
+    TOPUP_FIELD_DDS_NODE,
+    TOPUP_NODE,
+    TOPUP_PREFIX_NODE,
+)
+from dwiprep.workflows.dmri.utils.utils import copy_connections
+
+FIELDMAP_PREP = [
+    (INPUT_NODE, FMAP_AP_CONVERSION_NODE, INPUT_TO_FMAP_AP_CONVERSION_EDGES),
+    (INPUT_NODE, FMAP_PA_CONVERSION_NODE, INPUT_TO_FMAP_PA_CONVERSION_EDGES),
+    (FMAP_AP_CONVERSION_NODE, MERGE_NODE, FMAP_AP_CONVERSION_TO_MERGE_EDGES),
+    (FMAP_PA_CONVERSION_NODE, MERGE_NODE, FMAP_PA_CONVERSION_TO_MERGE_EDGES),
+    (MERGE_NODE, MRCAT_NODE, MERGE_TO_MRCAT_EDGES),
+    (MRCAT_NODE, OUTPUT_NODE, MRCAT_TO_OUTPUT_EDGES),
+    #: phasediff derivative
+    (
+        MRCAT_NODE,
+        PHASEDIFF_CONVERSION_NODE,
+        MRCAT_TO_PHASEDIFF_CONVERSION_EDGES,
+    ),
+    (
+        PHASEDIFF_CONVERSION_NODE,
+        PHASEDIFF_LIST_NODE,
+        PHASEDIFF_CONVERSION_TO_LIST_EDGES,
+    ),
+    (INPUT_NODE, PHASEDIFF_DDS_NODE, INPUT_TO_PHASEDIFF_DDS_EDGES),
+    (PHASEDIFF_LIST_NODE, PHASEDIFF_DDS_NODE, PHASEDIFF_LIST_TO_DDS_EDGES),
+]
+
+#: Susceptibility field estimated once, for *eddy* to use in each run
+TOPUP = [
+    (MRCAT_NODE, ACQPARAMS_NODE, MRCAT_TO_ACQPARAMS_EDGES),
+    (
+        PHASEDIFF_CONVERSION_NODE,
+        TOPUP_NODE,
+        PHASEDIFF_CONVERSION_TO_TOPUP_EDGES,
+    ),
+    (ACQPARAMS_NODE, TOPUP_NODE, ACQPARAMS_TO_TOPUP_EDGES),
+    (TOPUP_NODE, TOPUP_PREFIX_NODE, TOPUP_TO_PREFIX_EDGES),
+    (TOPUP_PREFIX_NODE, OUTPUT_NODE, PREFIX_TO_OUTPUT_EDGES),
+    #: topup derivatives
+    (TOPUP_NODE, TOPUP_FIELD_DDS_NODE, TOPUP_TO_FIELD_DDS_EDGES),
+    (INPUT_NODE, TOPUP_FIELD_DDS_NODE, INPUT_TO_TOPUP_DDS_EDGES),
+    (TOPUP_NODE, TOPUP_COEFF_DDS_NODE, TOPUP_TO_COEFF_DDS_EDGES),
+    (INPUT_NODE, TOPUP_COEFF_DDS_NODE, INPUT_TO_TOPUP_DDS_EDGES),
+]
+
+
+def init_fieldmap_wf(
+    name: str = "fieldmap_prep_wf", topup: bool = False
+) -> pe.Workflow:
+    """
+    Initiates a session-level workflow preparing an AP/PA fieldmap pair
+    once for all of the DWI runs it is *IntendedFor*: both fieldmaps are
+    converted to mif format, merged into a single phasediff image and
+    stored as a derivative.
+
+    Parameters
+    ----------
+    name : str, optional
+        Workflow's name, by default "fieldmap_prep_wf"
+    topup : bool, optional
+        Whether to also estimate the susceptibility field (*topup*) once,
+        so that only *eddy* runs per DWI run, by default False
+
+    Returns
+    -------
+    pe.Workflow
+        Initiated workflow for shared fieldmap preperation.
+    """
+    connections = FIELDMAP_PREP + TOPUP if topup else FIELDMAP_PREP
+    wf = pe.Workflow(name=name)
+    # nodes of each session's workflow are fed their own fieldmaps
+    wf.connect(copy_connections(connections))
+    return wf
+
+
+def get_fieldmap_wf_name(fmap_file: str) -> str:
+    """
+    Derive the shared fieldmap workflow's name for supplied fieldmap.
+
+    Examples
+    --------
+    >>> get_fieldmap_wf_name("/made/up/sub-01_ses-1_acq-dwi_dir-AP_epi.nii.gz")
+    'fieldmap_prep_ses_1_acq_dwi_wf'
+
+    """
+    entities = Path(fmap_file).name.split(".")[0].split("_")[1:-1]
+    entities = [e for e in entities if not e.startswith("dir-")]
+    fname = "_".join(entities).replace("-", "_").replace(" ", "")
+    return f"fieldmap_prep_{fname}_wf" if fname else "fieldmap_prep_wf"
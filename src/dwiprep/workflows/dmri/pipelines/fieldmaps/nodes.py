@@ -0,0 +1,93 @@
+"""
+Nodes' configurations for *fieldmaps* pipelines.
+"""
+import nipype.pipeline.engine as pe
+from nipype.interfaces import fsl
+from nipype.interfaces import mrtrix3 as mrt
+from nipype.interfaces import utility as niu
+
+from dwiprep.interfaces.dds import DerivativesDataSink
+from dwiprep.utils.metadata import write_acqparams
+from dwiprep.workflows.dmri.pipelines.derivatives.configurations import (
+    PHASEDIFF_KWARGS,
+)
+from dwiprep.workflows.dmri.pipelines.fieldmaps.configurations import (
+    ACQPARAMS_KWARGS,
+    INPUT_NODE_FIELDS,
+    OUTPUT_NODE_FIELDS,
+    PHASEDIFF_CONVERSION_KWARGS,
+    TOPUP_COEFF_KWARGS,
+    TOPUP_FIELD_KWARGS,
+    TOPUP_KWARGS,
+    TOPUP_PREFIX_KWARGS,
+)
+from dwiprep.workflows.dmri.pipelines.fmap_prep.configurations import (
+    MERGE_KWARGS,
+    MRCAT_KWARGS,
+)
+
+
+def topup_prefix(fieldcoef: str) -> str:
+    """
+    Derives the prefix shared by *topup*'s outputs (as expected by
+    *dwifslpreproc*'s ``-topup_files``) from its coefficients file.
+
+    Parameters
+    ----------
+    fieldcoef : str
+        *topup*'s field coefficients (i.e, ``topup_fieldcoef.nii.gz``)
+
+    Returns
+    -------
+    str
+        *topup*'s output prefix (i.e, ``topup``)
+    """
+    return fieldcoef.rsplit("_fieldcoef", 1)[0]
+
+
+#: i/o
+INPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=INPUT_NODE_FIELDS),
+    name="inputnode",
+)
+OUTPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=OUTPUT_NODE_FIELDS),
+    name="outputnode",
+)
+
+#: Building blocks
+FMAP_AP_CONVERSION_NODE = pe.Node(mrt.MRConvert(), name="fmap_ap_conversion")
+FMAP_PA_CONVERSION_NODE = pe.Node(mrt.MRConvert(), name="fmap_pa_conversion")
+MERGE_NODE = pe.Node(niu.Merge(**MERGE_KWARGS), name="merge_files")
+MRCAT_NODE = pe.Node(mrt.MRCat(**MRCAT_KWARGS), name="mrcat")
+
+#: phasediff derivative
+PHASEDIFF_CONVERSION_NODE = pe.Node(
+    mrt.MRConvert(**PHASEDIFF_CONVERSION_KWARGS),
+    name="phasediff_conversion",
+)
+PHASEDIFF_LIST_NODE = pe.Node(
+    niu.Merge(numinputs=2), name="list_phasediff_inputs"
+)
+PHASEDIFF_DDS_NODE = pe.MapNode(
+    DerivativesDataSink(**PHASEDIFF_KWARGS),
+    name="ds_phasediff",
+    iterfield=["in_file"],
+)
+
+#: susceptibility field estimation (shared *topup* mode)
+ACQPARAMS_NODE = pe.Node(
+    niu.Function(**ACQPARAMS_KWARGS, function=write_acqparams),
+    name="acqparams",
+)
+TOPUP_NODE = pe.Node(fsl.TOPUP(**TOPUP_KWARGS), name="topup")
+TOPUP_PREFIX_NODE = pe.Node(
+    niu.Function(**TOPUP_PREFIX_KWARGS, function=topup_prefix),
+    name="topup_prefix",
+)
+TOPUP_FIELD_DDS_NODE = pe.Node(
+    DerivativesDataSink(**TOPUP_FIELD_KWARGS), name="ds_topup_field"
+)
+TOPUP_COEFF_DDS_NODE = pe.Node(
+    DerivativesDataSink(**TOPUP_COEFF_KWARGS), name="ds_topup_coeff"
+)
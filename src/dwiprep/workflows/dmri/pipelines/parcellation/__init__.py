@@ -0,0 +1,6 @@
+from dwiprep.workflows.dmri.pipelines.parcellation.configurations import (
+    PARCELLATIONS,
+)
+from dwiprep.workflows.dmri.pipelines.parcellation.parcellation import (
+    init_parcellation_wf,
+)
@@ -0,0 +1,19 @@
+"""
+Configurations for *parcellation* pipeline.
+"""
+#: i/o
+INPUT_NODE_FIELDS = ["tensor_metrics", "parcellation"]
+OUTPUT_NODE_FIELDS = ["stats"]
+
+#: Anatomical parcellations, by the DWI workflow's input fields
+PARCELLATIONS = {
+    "dseg": "t1w_dseg",
+    "aseg": "t1w_aseg",
+    "aparc": "t1w_aparc",
+}
+
+#: Parcellations that are only output by FreeSurfer's reconstruction
+FREESURFER_PARCELLATIONS = ["aseg", "aparc"]
+
+#: Keyword arguments
+PARCELLATION_STATS_KWARGS = dict(exclude_labels=[0])
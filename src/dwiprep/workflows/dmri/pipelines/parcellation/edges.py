@@ -0,0 +1,9 @@
+"""
+Connections configurations for *parcellation* pipelines.
+"""
+#: i/o
+INPUT_TO_PARCELLATION_STATS_EDGES = [
+    ("tensor_metrics", "in_files"),
+    ("parcellation", "parcellation"),
+]
+PARCELLATION_STATS_TO_OUTPUT_EDGES = [("out_file", "stats")]
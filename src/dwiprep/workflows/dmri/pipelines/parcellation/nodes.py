@@ -0,0 +1,28 @@
+"""
+Nodes' configurations for *parcellation* pipelines.
+"""
+import nipype.pipeline.engine as pe
+from nipype.interfaces import utility as niu
+
+from dwiprep.interfaces.parcellation import ParcellationStats
+from dwiprep.workflows.dmri.pipelines.parcellation.configurations import (
+    INPUT_NODE_FIELDS,
+    OUTPUT_NODE_FIELDS,
+    PARCELLATION_STATS_KWARGS,
+)
+
+#: i/o
+INPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=INPUT_NODE_FIELDS),
+    name="inputnode",
+)
+OUTPUT_NODE = pe.Node(
+    niu.IdentityInterface(fields=OUTPUT_NODE_FIELDS),
+    name="outputnode",
+)
+
+#: Building blocks
+PARCELLATION_STATS_NODE = pe.Node(
+    ParcellationStats(**PARCELLATION_STATS_KWARGS),
+    name="parcellation_stats",
+)
@@ -0,0 +1,72 @@
+import nipype.pipeline.engine as pe
+
+from dwiprep.workflows.dmri.pipelines.parcellation.configurations import (
+    FREESURFER_PARCELLATIONS,
+    PARCELLATIONS,
+)
+from dwiprep.workflows.dmri.pipelines.parcellation.edges import (
+    INPUT_TO_PARCELLATION_STATS_EDGES,
+    PARCELLATION_STATS_TO_OUTPUT_EDGES,
+)
+from dwiprep.workflows.dmri.pipelines.parcellation.nodes import (
+    INPUT_NODE,
+    OUTPUT_NODE,
+    PARCELLATION_STATS_NODE,
+)
+from dwiprep.workflows.dmri.utils.utils import copy_connections
+
+PARCELLATION = [
+    (INPUT_NODE, PARCELLATION_STATS_NODE, INPUT_TO_PARCELLATION_STATS_EDGES),
+    (PARCELLATION_STATS_NODE, OUTPUT_NODE, PARCELLATION_STATS_TO_OUTPUT_EDGES),
+]
+
+
+def init_parcellation_wf(
+    name: str = "parcellation_wf",
+    parcellation: str = "dseg",
+    freesurfer: bool = True,
+) -> pe.Workflow:
+    """
+    Initiates a workflow computing region-wise statistics of all
+    (coregistered) tensor-derived metrics over an anatomical parcellation.
+
+    Parameters
+    ----------
+    name : str, optional
+        Workflow's name, by default "parcellation_wf"
+    parcellation : str, optional
+        One of *PARCELLATIONS* (names the output), by default "dseg"
+    freesurfer : bool, optional
+        Whether the anatomical workflow runs FreeSurfer's reconstruction
+        (and outputs the *FREESURFER_PARCELLATIONS*), by default True
+
+    Returns
+    -------
+    pe.Workflow
+        Initiated workflow
+
+    Raises
+    ------
+    ValueError
+        If *parcellation* is not one of *PARCELLATIONS*, or is not output
+        by the anatomical workflow.
+    """
+    if parcellation not in PARCELLATIONS:
+        raise ValueError(
+            f"Unknown parcellation: {parcellation}. "
+            f"Available parcellations are: {list(PARCELLATIONS)}"
+        )
+    if parcellation in FREESURFER_PARCELLATIONS and not freesurfer:
+        available = [
+            p for p in PARCELLATIONS if p not in FREESURFER_PARCELLATIONS
+        ]
+        raise ValueError(
+            f"The {parcellation} parcellation is only available with "
+            "FreeSurfer's reconstruction (smriprep's freesurfer option). "
+            f"Available parcellations are: {available}"
+        )
+    wf = pe.Workflow(name=name)
+    wf.connect(copy_connections(PARCELLATION))
+    stats_node = wf.get_node(PARCELLATION_STATS_NODE.name)
+    stats_node.inputs.parcellation_name = parcellation
+    return wf
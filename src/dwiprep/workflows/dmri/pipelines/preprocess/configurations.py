@@ -2,10 +2,11 @@
 Configurations for *preprocessing* pipeline.
 """
 #: i/o
-INPUT_NODE_FIELDS = ["dwi_file", "merged_phasediff"]
+INPUT_NODE_FIELDS = ["dwi_file", "merged_phasediff", "topup_prefix"]
 OUTPUT_NODE_FIELDS = ["dwi_preproc"]
 
 #: Keyword arguments
+DWI2MASK_KWARGS = dict(out_file="brainmask.mif")
 DWIDENOISE_KWARGS = dict()
 INFER_PE_KWARGS = dict(input_names=["in_file"], output_names=["pe_dir"])
 DWIFSLPREPROC_KWARGS = dict(
@@ -13,4 +14,10 @@ DWIFSLPREPROC_KWARGS = dict(
     align_seepi=True,
     eddy_options=" --slm=linear",
 )
+#: eddy only, with a susceptibility field estimated once per session
+TOPUP_DWIFSLPREPROC_KWARGS = dict(
+    rpe_options="none",
+    eddy_options=" --slm=linear",
+)
+TOPUP_ARGS_KWARGS = dict(input_names=["prefix"], output_names=["args"])
 BIASCORRECT_KWARGS = dict(use_ants=True)
@@ -5,39 +5,35 @@ import nipype.pipeline.engine as pe
 from nipype.interfaces import utility as niu
 from nipype.interfaces import mrtrix3 as mrt
 
+from dwiprep.utils.metadata import infer_phase_encoding_direction_mif
 from dwiprep.workflows.dmri.pipelines.preprocess.configurations import (
     INPUT_NODE_FIELDS,
     OUTPUT_NODE_FIELDS,
     INFER_PE_KWARGS,
+    DWI2MASK_KWARGS,
     DWIDENOISE_KWARGS,
     DWIFSLPREPROC_KWARGS,
+    TOPUP_DWIFSLPREPROC_KWARGS,
+    TOPUP_ARGS_KWARGS,
     BIASCORRECT_KWARGS,
 )
 
-# define function for phase direction inference
-def infer_phase_encoding_direction_mif(in_file: str) -> str:
+
+def topup_files_args(prefix: str) -> str:
     """
-    Utilizes *mrinfo* for a specific query of phase encoding direction.
+    Formats *dwifslpreproc*'s arguments for a precomputed *topup* field.
 
     Parameters
     ----------
-    in_file : str
-        File to query
+    prefix : str
+        *topup*'s output prefix
 
     Returns
     -------
     str
-        Phase Encoding Direction as denoted in *in_file*`s header.
+        Additional *dwifslpreproc* arguments
     """
-    import subprocess
-
-    return (
-        subprocess.check_output(
-            ["mrinfo", str(in_file), "-property", "PhaseEncodingDirection"]
-        )
-        .decode("utf-8")
-        .replace("\n", "")
-    )
+    return f"-topup_files {prefix}"
 
 
 #: i/o
@@ -58,6 +54,11 @@ INFER_PE_NODE = pe.Node(
     name="infer_pe",
 )
 
+DWI2MASK_NODE = pe.Node(
+    mrt.BrainMask(**DWI2MASK_KWARGS),
+    name="dwi2mask",
+)
+
 DENOISE_NODE = pe.Node(
     mrt.DWIDenoise(**DWIDENOISE_KWARGS),
     name="denoise",
@@ -67,6 +68,15 @@ DWIPREPROC_NODE = pe.Node(
     mrt.DWIPreproc(**DWIFSLPREPROC_KWARGS), name="dwipreproc"
 )
 
+#: eddy only, with a susceptibility field estimated once per session
+TOPUP_ARGS_NODE = pe.Node(
+    niu.Function(**TOPUP_ARGS_KWARGS, function=topup_files_args),
+    name="topup_args",
+)
+TOPUP_DWIPREPROC_NODE = pe.Node(
+    mrt.DWIPreproc(**TOPUP_DWIFSLPREPROC_KWARGS), name="dwipreproc"
+)
+
 BIASCORRECT_NODE = pe.Node(
     mrt.DWIBiasCorrect(**BIASCORRECT_KWARGS), name="biascorrect"
 )
@@ -4,23 +4,33 @@ from dwiprep.workflows.dmri.pipelines.preprocess.nodes import (
     INPUT_NODE,
     OUTPUT_NODE,
     DENOISE_NODE,
+    DWI2MASK_NODE,
     INFER_PE_NODE,
     DWIPREPROC_NODE,
+    TOPUP_ARGS_NODE,
+    TOPUP_DWIPREPROC_NODE,
     BIASCORRECT_NODE,
 )
 from dwiprep.workflows.dmri.pipelines.preprocess.edges import (
     INPUT_TO_DENOISE_EDGES,
+    INPUT_TO_DWI2MASK_EDGES,
+    DWI2MASK_TO_DENOISE_EDGES,
     INPUT_TO_DWIPREPROC_EDGES,
     DENOISE_TO_INFER_PE_EDGES,
     DENOISE_TO_DWIPREPROC_EDGES,
     INFER_PE_TO_DWIPREPROC_EDGES,
+    INPUT_TO_TOPUP_ARGS_EDGES,
+    TOPUP_ARGS_TO_DWIPREPROC_EDGES,
     DWIPREPROC_TO_BIASCORRECT_EDGES,
     BIASCORRECT_TO_OUTPUT_EDGES,
 )
+from dwiprep.workflows.dmri.utils.utils import copy_connections
 
 
 PREPROCESSING = [
     (INPUT_NODE, DENOISE_NODE, INPUT_TO_DENOISE_EDGES),
+    (INPUT_NODE, DWI2MASK_NODE, INPUT_TO_DWI2MASK_EDGES),
+    (DWI2MASK_NODE, DENOISE_NODE, DWI2MASK_TO_DENOISE_EDGES),
     (INPUT_NODE, DWIPREPROC_NODE, INPUT_TO_DWIPREPROC_EDGES),
     (DENOISE_NODE, INFER_PE_NODE, DENOISE_TO_INFER_PE_EDGES),
     (DENOISE_NODE, DWIPREPROC_NODE, DENOISE_TO_DWIPREPROC_EDGES),
@@ -29,8 +39,28 @@ PREPROCESSING = [
     (BIASCORRECT_NODE, OUTPUT_NODE, BIASCORRECT_TO_OUTPUT_EDGES),
 ]
 
+#: eddy only, using a susceptibility field estimated once per session
+PREPROCESSING_TOPUP = [
+    (INPUT_NODE, DENOISE_NODE, INPUT_TO_DENOISE_EDGES),
+    (INPUT_NODE, DWI2MASK_NODE, INPUT_TO_DWI2MASK_EDGES),
+    (DWI2MASK_NODE, DENOISE_NODE, DWI2MASK_TO_DENOISE_EDGES),
+    (INPUT_NODE, TOPUP_ARGS_NODE, INPUT_TO_TOPUP_ARGS_EDGES),
+    (TOPUP_ARGS_NODE, TOPUP_DWIPREPROC_NODE, TOPUP_ARGS_TO_DWIPREPROC_EDGES),
+    (DENOISE_NODE, INFER_PE_NODE, DENOISE_TO_INFER_PE_EDGES),
+    (DENOISE_NODE, TOPUP_DWIPREPROC_NODE, DENOISE_TO_DWIPREPROC_EDGES),
+    (INFER_PE_NODE, TOPUP_DWIPREPROC_NODE, INFER_PE_TO_DWIPREPROC_EDGES),
+    (
+        TOPUP_DWIPREPROC_NODE,
+        BIASCORRECT_NODE,
+        DWIPREPROC_TO_BIASCORRECT_EDGES,
+    ),
+    (BIASCORRECT_NODE, OUTPUT_NODE, BIASCORRECT_TO_OUTPUT_EDGES),
+]
+
 
-def init_preprocess_wf(name="preprocess_wf") -> pe.Workflow:
+def init_preprocess_wf(
+    name="preprocess_wf", pe_dir: str = None, topup: bool = False
+) -> pe.Workflow:
     """
     Initiates a preprocessing workflow.
 
@@ -38,6 +68,16 @@ def init_preprocess_wf(name="preprocess_wf") -> pe.Workflow:
     ----------
     name : str, optional
         Workflow's name, by default "preprocess_wf"
+    pe_dir : str, optional
+        The DWI series' phase encoding direction (i.e, "j-"). If known
+        while building the workflow, it is passed directly to *dwifslpreproc*;
+        otherwise it is read from the denoised series' header at runtime,
+        by default None
+    topup : bool, optional
+        Whether to use a precomputed susceptibility field (the
+        ``topup_prefix`` input) instead of estimating it from the merged
+        phasediff, so that *dwifslpreproc* only runs *eddy*,
+        by default False
 
     Returns
     -------
@@ -45,6 +85,15 @@ def init_preprocess_wf(name="preprocess_wf") -> pe.Workflow:
         Initiated workflow for preprocessing.
     """
 
+    connections = PREPROCESSING_TOPUP if topup else PREPROCESSING
+    if pe_dir:
+        connections = [
+            connection
+            for connection in connections
+            if INFER_PE_NODE not in connection[:2]
+        ]
     wf = pe.Workflow(name=name)
-    wf.connect(PREPROCESSING)
+    wf.connect(copy_connections(connections))
+    if pe_dir:
+        wf.get_node(DWIPREPROC_NODE.name).inputs.pe_dir = pe_dir
     return wf
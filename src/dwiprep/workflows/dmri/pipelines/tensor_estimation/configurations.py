@@ -13,8 +13,11 @@ METRICS = [
     "evec",
     "eval",
 ]
+#: Available tensor estimation engines
+TENSOR_ENGINES = ["mrtrix", "numpy"]
+
 #: i/o
-INPUT_NODE_FIELDS = ["dwi_file"]
+INPUT_NODE_FIELDS = ["dwi_file", "in_bvec", "in_bval", "brain_mask"]
 OUTPUT_NODE_FIELDS = ["metrics"]
 
 #: Keyword arguments
@@ -22,4 +25,7 @@ DWI2TENSOR_KWARGS = dict()
 TENSOR2METRIC_KWARGS = {
     f"out_{metric}": f"{metric}.nii.gz" for metric in METRICS
 }
+#: Shell selection (i.e, max_bvalue=1200); all volumes are used by default
+EXTRACT_SHELLS_KWARGS = dict(include_b0=True)
+NUMPY_TENSOR_KWARGS = dict(chunk_size=20000, max_memory_mb=1024, n_procs=1)
 LISTIFY_KWARGS = dict(numinputs=len(METRICS))
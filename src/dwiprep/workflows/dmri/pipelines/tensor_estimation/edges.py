@@ -6,10 +6,36 @@ from dwiprep.workflows.dmri.pipelines.tensor_estimation.configurations import (
 )
 
 #: i/o
-INPUT_TO_DWI2TENSOR_EDGES = [("dwi_file", "in_file")]
+INPUT_TO_DWI2TENSOR_EDGES = [
+    ("dwi_file", "in_file"),
+    ("in_bvec", "in_bvec"),
+    ("in_bval", "in_bval"),
+    ("brain_mask", "in_mask"),
+]
+INPUT_TO_TENSOR2METRIC_EDGES = [("brain_mask", "in_mask")]
 DWI2TENSOR_TO_TENSOR2METRIC_EDGES = [("out_file", "in_file")]
 TENSOR2METRIC_TO_LISTIFY_EDGES = []
 #: all metrics measured
 for input_num, key in enumerate(TENSOR2METRIC_KWARGS):
     TENSOR2METRIC_TO_LISTIFY_EDGES.append((key, f"in{input_num+1}"))
+#: in-process (numpy) engine, with the same outputs as *tensor2metric*
+INPUT_TO_NUMPY_TENSOR_EDGES = [
+    ("dwi_file", "in_file"),
+    ("in_bvec", "in_bvec"),
+    ("in_bval", "in_bval"),
+    ("brain_mask", "in_mask"),
+]
+NUMPY_TENSOR_TO_LISTIFY_EDGES = TENSOR2METRIC_TO_LISTIFY_EDGES
+#: shell selection, shared by both engines
+INPUT_TO_EXTRACT_SHELLS_EDGES = [
+    ("dwi_file", "in_file"),
+    ("in_bvec", "in_bvec"),
+    ("in_bval", "in_bval"),
+]
+INPUT_TO_FIT_MASK_EDGES = [("brain_mask", "in_mask")]
+EXTRACT_SHELLS_TO_FIT_EDGES = [
+    ("out_file", "in_file"),
+    ("out_bvec", "in_bvec"),
+    ("out_bval", "in_bval"),
+]
 LISTIFY_TO_OUTPUT_EDGES = [("out", "metrics")]
@@ -5,11 +5,15 @@ import nipype.pipeline.engine as pe
 from nipype.interfaces import utility as niu
 from nipype.interfaces import mrtrix3 as mrt
 
+from dwiprep.interfaces.gradients import ExtractShells
+from dwiprep.interfaces.tensor import FitTensorMetrics
 from dwiprep.workflows.dmri.pipelines.tensor_estimation.configurations import (
     INPUT_NODE_FIELDS,
     OUTPUT_NODE_FIELDS,
     DWI2TENSOR_KWARGS,
+    EXTRACT_SHELLS_KWARGS,
     TENSOR2METRIC_KWARGS,
+    NUMPY_TENSOR_KWARGS,
     LISTIFY_KWARGS,
 )
 
@@ -24,10 +28,16 @@ OUTPUT_NODE = pe.Node(
 )
 
 #: Building blocks
+EXTRACT_SHELLS_NODE = pe.Node(
+    ExtractShells(**EXTRACT_SHELLS_KWARGS), name="extract_shells"
+)
 DWI2TENSOR_NODE = pe.Node(
     mrt.FitTensor(**DWI2TENSOR_KWARGS), name="fit_tensor"
 )
 TENSOR2METRIC_NODE = pe.Node(
     mrt.TensorMetrics(**TENSOR2METRIC_KWARGS), name="tensor2metric"
 )
+NUMPY_TENSOR_NODE = pe.Node(
+    FitTensorMetrics(**NUMPY_TENSOR_KWARGS), name="fit_tensor_metrics"
+)
 LISTIFY_NODE = pe.Node(niu.Merge(**LISTIFY_KWARGS), name="listify_metrics")
@@ -3,30 +3,80 @@ from nipype.interfaces import mrtrix3 as mrt
 import nipype.interfaces.utility as niu
 from dwiprep.workflows.dmri.pipelines.tensor_estimation.configurations import (
     OUTPUT_NODE_FIELDS,
+    TENSOR_ENGINES,
 )
 from dwiprep.workflows.dmri.pipelines.tensor_estimation.nodes import (
     INPUT_NODE,
     OUTPUT_NODE,
     DWI2TENSOR_NODE,
+    EXTRACT_SHELLS_NODE,
     TENSOR2METRIC_NODE,
+    NUMPY_TENSOR_NODE,
     LISTIFY_NODE,
 )
 from dwiprep.workflows.dmri.pipelines.tensor_estimation.edges import (
     INPUT_TO_DWI2TENSOR_EDGES,
+    INPUT_TO_TENSOR2METRIC_EDGES,
     DWI2TENSOR_TO_TENSOR2METRIC_EDGES,
     TENSOR2METRIC_TO_LISTIFY_EDGES,
+    INPUT_TO_NUMPY_TENSOR_EDGES,
+    NUMPY_TENSOR_TO_LISTIFY_EDGES,
+    INPUT_TO_EXTRACT_SHELLS_EDGES,
+    INPUT_TO_FIT_MASK_EDGES,
+    EXTRACT_SHELLS_TO_FIT_EDGES,
     LISTIFY_TO_OUTPUT_EDGES,
 )
+from dwiprep.workflows.dmri.utils.utils import copy_connections
 
 TENSOR_ESTIMATION = [
     (INPUT_NODE, DWI2TENSOR_NODE, INPUT_TO_DWI2TENSOR_EDGES),
+    (INPUT_NODE, TENSOR2METRIC_NODE, INPUT_TO_TENSOR2METRIC_EDGES),
     (DWI2TENSOR_NODE, TENSOR2METRIC_NODE, DWI2TENSOR_TO_TENSOR2METRIC_EDGES),
     (TENSOR2METRIC_NODE, LISTIFY_NODE, TENSOR2METRIC_TO_LISTIFY_EDGES),
     (LISTIFY_NODE, OUTPUT_NODE, LISTIFY_TO_OUTPUT_EDGES),
 ]
 
+#: Single-process tensor fit and metrics estimation
+NUMPY_TENSOR_ESTIMATION = [
+    (INPUT_NODE, NUMPY_TENSOR_NODE, INPUT_TO_NUMPY_TENSOR_EDGES),
+    (NUMPY_TENSOR_NODE, LISTIFY_NODE, NUMPY_TENSOR_TO_LISTIFY_EDGES),
+    (LISTIFY_NODE, OUTPUT_NODE, LISTIFY_TO_OUTPUT_EDGES),
+]
 
-def init_tensor_wf(name="tensor_estimation_wf") -> pe.Workflow:
+
+def add_shell_selection(connections: list, fit_node: pe.Node) -> list:
+    """
+    Re-routes the DWI series through a shell-extraction node before fitting.
+
+    Parameters
+    ----------
+    connections : list
+        Tensor estimation connections (i.e, *TENSOR_ESTIMATION*)
+    fit_node : pe.Node
+        The node fitting the tensor model within *connections*
+
+    Returns
+    -------
+    list
+        Connections with the DWI series fed through *EXTRACT_SHELLS_NODE*
+    """
+    connections = [
+        connection
+        for connection in connections
+        if not (connection[0] is INPUT_NODE and connection[1] is fit_node)
+    ]
+    return [
+        (INPUT_NODE, EXTRACT_SHELLS_NODE, INPUT_TO_EXTRACT_SHELLS_EDGES),
+        (INPUT_NODE, fit_node, INPUT_TO_FIT_MASK_EDGES),
+        (EXTRACT_SHELLS_NODE, fit_node, EXTRACT_SHELLS_TO_FIT_EDGES),
+    ] + connections
+
+
+def init_tensor_wf(
+    name="tensor_estimation_wf",
+    engine: str = "mrtrix",
+    max_bvalue: float = None,
+) -> pe.Workflow:
     """
     Initiates a tensor estimation workflow
 
@@ -34,13 +84,37 @@ def init_tensor_wf(name="tensor_estimation_wf") -> pe.Workflow:
     ----------
     name : str, optional
         Workflow's name, by default "tensor_estimation_wf"
+    engine : str, optional
+        Either "mrtrix" (*dwi2tensor* and *tensor2metric*) or "numpy"
+        (in-process weighted least-squares fit), by default "mrtrix"
+    max_bvalue : float, optional
+        If given, only shells with b-values up to *max_bvalue* (and b=0)
+        are extracted and used for fitting, by default None (all volumes)
 
     Returns
     -------
     pe.Workflow
         Initiated workflow for tensor and tensor-derived metrics estimation.
-    """
 
+    Raises
+    ------
+    ValueError
+        If *engine* is not one of *TENSOR_ENGINES*.
+    """
+    if engine not in TENSOR_ENGINES:
+        raise ValueError(
+            f"Unknown tensor estimation engine: {engine}. "
+            f"Available engines are: {TENSOR_ENGINES}"
+        )
+    if engine == "numpy":
+        fit_node, connections = NUMPY_TENSOR_NODE, NUMPY_TENSOR_ESTIMATION
+    else:
+        fit_node, connections = DWI2TENSOR_NODE, TENSOR_ESTIMATION
+    if max_bvalue is not None:
+        connections = add_shell_selection(connections, fit_node)
     wf = pe.Workflow(name=name)
-    wf.connect(TENSOR_ESTIMATION)
+    wf.connect(copy_connections(connections))
+    if max_bvalue is not None:
+        extract_shells = wf.get_node(EXTRACT_SHELLS_NODE.name)
+        extract_shells.inputs.max_bvalue = max_bvalue
     return wf
@@ -1,3 +1,4 @@
+from copy import deepcopy
 from pathlib import Path
 from typing import Union
 
@@ -5,6 +6,7 @@ import nipype.pipeline.engine as pe
 from bids import BIDSLayout
 from nipype import Function, Workflow
 
+
 MANDATORY_ENTITIES = ["dwi"]
 
 RECOMMENDED_ENTITIES = ["fmap"]
@@ -115,6 +117,11 @@ OUTPUTS = {
         "dwi",
         "*space-orig_desc-preproc_epiref.json",
     ],
+    "native_dwi_brain_mask": [
+        "dmriprep",
+        "dwi",
+        "*space-orig_desc-brain_mask.nii.gz",
+    ],
     "coreg_preproc_dwi_nii": [
         "dmriprep",
         "dwi",
@@ -135,6 +142,26 @@ OUTPUTS = {
         "dwi",
         "*space-anat_desc-preproc_dwi.json",
     ],
+    "std_preproc_dwi_nii": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-preproc_dwi.nii.gz",
+    ],
+    "std_preproc_dwi_bvec": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-preproc_dwi.bvec",
+    ],
+    "std_preproc_dwi_bval": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-preproc_dwi.bval",
+    ],
+    "std_preproc_dwi_json": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-preproc_dwi.json",
+    ],
     "coreg_preproc_epiref_nii": [
         "dmriprep",
         "dwi",
@@ -160,6 +187,16 @@ OUTPUTS = {
         "fmap",
         "desc-phasediff_fieldmap.json",
     ],
+    "topup_fmap_nii": [
+        "dmriprep",
+        "fmap",
+        "*desc-topup_fieldmap.nii.gz",
+    ],
+    "topup_coeff_nii": [
+        "dmriprep",
+        "fmap",
+        "*desc-topupcoeff_fieldmap.nii.gz",
+    ],
     "native_fa": [
         "dmriprep",
         "dwi",
@@ -250,6 +287,56 @@ OUTPUTS = {
         "dwi",
         "*space-anat_desc-eval_epiref.nii.gz",
     ],
+    "coreg_parcellation_stats": [
+        "dmriprep",
+        "dwi",
+        "*space-anat_desc-*_stats.tsv",
+    ],
+    "std_fa": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-fa_epiref.nii.gz",
+    ],
+    "std_adc": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-adc_epiref.nii.gz",
+    ],
+    "std_ad": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-ad_epiref.nii.gz",
+    ],
+    "std_rd": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-rd_epiref.nii.gz",
+    ],
+    "std_cl": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-cl_epiref.nii.gz",
+    ],
+    "std_cp": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-cp_epiref.nii.gz",
+    ],
+    "std_cs": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-cs_epiref.nii.gz",
+    ],
+    "std_evec": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-evec_epiref.nii.gz",
+    ],
+    "std_eval": [
+        "dmriprep",
+        "dwi",
+        "*space-MNI152NLin2009cAsym_desc-eval_epiref.nii.gz",
+    ],
     # Freesurfer
     "freesurfer_T1": ["freesurfer", "mri", "T1.mgz"],
     "freesurfer_rawavg": ["freesurfer", "mri", "rawavg.mgz"],
@@ -268,6 +355,25 @@ OUTPUTS = {
 }
 
 
+def copy_connections(connections: list) -> list:
+    """
+    Copies a pipeline's connections along with their (module-level) nodes,
+    so that each initiated workflow has nodes (and inputs) of its own.
+
+    Parameters
+    ----------
+    connections : list
+        (source node, destination node, edges) connections
+
+    Returns
+    -------
+    list
+        The same connections, between new nodes
+    """
+    # a single deep copy keeps nodes shared between connections shared
+    return deepcopy(connections)
+
+
 def infer_phase_encoding_direction(
     layout: BIDSLayout, file_name: Union[Path, str]
 ) -> str:
@@ -354,31 +460,6 @@ def build_output_path(
     return str(output)
 
 
-def infer_phase_encoding_direction_mif(in_file: str) -> str:
-    """
-    Utilizes *mrinfo* for a specific query of phase encoding direction.
-
-    Parameters
-    ----------
-    in_file : str
-        File to query
-
-    Returns
-    -------
-    str
-        Phase Encoding Direction as denoted in *in_file*`s header.
-    """
-    import subprocess
-
-    return (
-        subprocess.check_output(
-            ["mrinfo", str(in_file), "-property", "PhaseEncodingDirection"]
-        )
-        .decode("utf-8")
-        .replace("\n", "")
-    )
-
-
 def check_opposite_phase_encoding(layout: BIDSLayout, fmap: list, dwi: list):
     """
     Checks whether to extract mean B0 image from DWI series and use it for SDC.
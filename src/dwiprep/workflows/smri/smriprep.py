@@ -1,8 +1,10 @@
 import json
-import os
-from typing import Union, Any, Iterable
+from typing import Union, Any, Iterable, List
 from pathlib import Path
 from bids import BIDSLayout
+from dwiprep.utils.manifest import index_subject, match_manifest
+from dwiprep.utils.output_index import OutputIndex
+from dwiprep.workflows.smri.utils.runner import RunResult, run_commands
 from dwiprep.workflows.smri.utils.utils import (
     PATH_LIKE_KWARGS,
     DEFAULT_KWARGS,
@@ -55,6 +57,8 @@ class SmriPrep(object):
         image_path: str = None,
         run_kwargs: dict = DEFAULT_KWARGS,
         work_dir: Path = None,
+        max_concurrent: int = 1,
+        log_dir: Path = None,
     ):
         """
         Initiates an SmriPreo instance.
@@ -67,6 +71,12 @@ class SmriPrep(object):
             Path to smriprep's outputs
         queries : dict
             Dictionary describing specific localization of different entities in a BIDS-compatible directory
+        max_concurrent : int, optional
+            Maximal number of participants' containers run at once,
+            by default 1
+        log_dir : Path, optional
+            Directory of participants' stdout and stderr logs, by default
+            ``logs`` under *work_dir*
         """
         self.bids_dir = bids_dir
         self.destination = destination
@@ -77,6 +87,10 @@ class SmriPrep(object):
             if work_dir is not None
             else Path(destination).parent / "work"
         )
+        self.max_concurrent = max_concurrent
+        self.log_dir = (
+            Path(log_dir) if log_dir is not None else self.work_dir / "logs"
+        )
         self.image_path = self.build_image_location(image_path)
         self.run_kwargs = self.arange_kwargs(run_kwargs)
         self.locate_freesurfer_license()
@@ -96,15 +110,22 @@ class SmriPrep(object):
         else:
             return Path(image_path)
 
-    def write_bids_filter_file(self):
+    def write_bids_filter_file(self, work_dir: Path = None):
         """
         Writes user and automatically defined BIDS filters to a json.
+
+        Parameters
+        ----------
+        work_dir : Path, optional
+            Directory to write the filters to, by default *self.work_dir*
+            (a participant's work directory for concurrent runs)
         """
-        bids_filter_path = self.work_dir / "bids_filter.json"
+        bids_filter_path = (
+            Path(work_dir) if work_dir is not None else self.work_dir
+        ) / "bids_filter.json"
         with open(str(bids_filter_path), "w") as fp:
             json.dump(self.queries, fp, indent=4)
             fp.close()
-        self.run_kwargs["bids-filter-file"] = str(bids_filter_path)
         return bids_filter_path
 
     def locate_freesurfer_license(self):
@@ -167,23 +188,31 @@ class SmriPrep(object):
                 run_kwargs[key] = value
         return run_kwargs
 
-    def build_user_defined_command(self):
+    def build_user_defined_command(self, run_kwargs: dict = None):
         """
         Builds the smriprep command via singularity
+
+        Parameters
+        ----------
+        run_kwargs : dict, optional
+            Keyword arguments of the command, by default *self.run_kwargs*
         """
-        mounted_command, updated_kwargs = self.add_mounts_to_command()
+        mounted_command, updated_kwargs = self.add_mounts_to_command(
+            run_kwargs
+        )
         smriprep_command = self.COMMMAND_TEMPLATE.format(
             mounted_command=mounted_command, image_path=self.image_path
         )
         return smriprep_command + self.add_kwargs_to_command(updated_kwargs)
 
-    def add_mounts_to_command(self):
+    def add_mounts_to_command(self, run_kwargs: dict = None):
+        run_kwargs = self.run_kwargs if run_kwargs is None else run_kwargs
         mounted_command = self.COMMAND_MOUNT_TEMPLATE.format(
             bids_dir=self.bids_dir,
             destination=self.destination,
         )
-        updated_kwargs = self.run_kwargs.copy()
-        for kwarg, value in self.run_kwargs.items():
+        updated_kwargs = run_kwargs.copy()
+        for kwarg, value in run_kwargs.items():
             if kwarg in PATH_LIKE_KWARGS:
                 target_value = kwarg.replace("-", "_")
                 mounted_command += f" -B {value}:/{target_value}"
@@ -206,13 +235,134 @@ class SmriPrep(object):
 
     def build_command(self):
         bids_filter_path = self.write_bids_filter_file()
+        self.run_kwargs["bids-filter-file"] = str(bids_filter_path)
         command = self.build_user_defined_command()
         return command, bids_filter_path
 
-    def run(self):
-        command, bids_filter_path = self.build_command()
-        os.system(command)
-        bids_filter_path.unlink()
+    @property
+    def participant_labels(self) -> List[str]:
+        """
+        Participants to process: *participant_label* if given, otherwise
+        all of the dataset's subjects.
+
+        Returns
+        -------
+        List[str]
+            Participants' labels
+        """
+        subject_ids = self.run_kwargs.get("participant_label")
+        if not subject_ids:
+            layout = (
+                self.bids_dir
+                if isinstance(self.bids_dir, BIDSLayout)
+                else BIDSLayout(self.bids_dir, validate=False)
+            )
+            return layout.get_subjects()
+        return subject_ids if isinstance(subject_ids, list) else [subject_ids]
+
+    def build_participant_command(self, subject_id: str) -> str:
+        """
+        Builds a single participant's command, with its own work directory
+        and BIDS filter file (under ``sub-<label>`` of *self.work_dir*), so
+        that participants' containers can run concurrently.
+
+        Parameters
+        ----------
+        subject_id : str
+            Participant's label
+
+        Returns
+        -------
+        str
+            The participant's smriprep command
+        """
+        work_dir = self.work_dir / f"sub-{subject_id}"
+        work_dir.mkdir(exist_ok=True)
+        run_kwargs = self.run_kwargs.copy()
+        run_kwargs["participant_label"] = subject_id
+        run_kwargs["work-dir"] = str(work_dir)
+        run_kwargs["bids-filter-file"] = str(
+            self.write_bids_filter_file(work_dir)
+        )
+        return self.build_user_defined_command(run_kwargs)
+
+    def run(
+        self,
+        participant_labels: Iterable[str] = None,
+        max_concurrent: int = None,
+    ) -> List[RunResult]:
+        """
+        Runs participants' smriprep containers, at most *max_concurrent* at
+        a time, each logging its stdout and stderr to *self.log_dir*.
+
+        Parameters
+        ----------
+        participant_labels : Iterable[str], optional
+            Participants to process, by default *self.participant_labels*
+        max_concurrent : int, optional
+            Maximal number of concurrent containers, by default
+            *self.max_concurrent*
+
+        Returns
+        -------
+        List[RunResult]
+            Participants' exit codes, durations and logs
+        """
+        participant_labels = (
+            self.participant_labels
+            if participant_labels is None
+            else list(participant_labels)
+        )
+        commands = {
+            subject_id: self.build_participant_command(subject_id)
+            for subject_id in participant_labels
+        }
+        return run_commands(
+            commands,
+            self.log_dir,
+            max_concurrent or self.max_concurrent,
+            callback=self.record_run,
+        )
+
+    def record_run(self, result: RunResult):
+        """
+        Cleans up after a participant's container exits and records its
+        outputs (including those a failed run left behind) in the
+        participant's manifest.
+
+        Parameters
+        ----------
+        result : RunResult
+            The participant's result
+        """
+        subject_id = result.participant_label
+        bids_filter_path = (
+            self.work_dir / f"sub-{subject_id}" / "bids_filter.json"
+        )
+        if bids_filter_path.exists():
+            bids_filter_path.unlink()
+        # smriprep writes its own outputs; record them in a single walk
+        index_subject(self.destination, subject_id)
+        self.output_index.invalidate(subject_id)
+
+    @property
+    def output_index(self) -> OutputIndex:
+        """
+        Cached index of the outputs under *self.destination*.
+
+        Returns
+        -------
+        OutputIndex
+            Locates *self.OUTPUTS* without walking the tree for each lookup
+        """
+        if getattr(self, "_output_index", None) is None:
+            self._output_index = OutputIndex(
+                self.destination,
+                self.OUTPUTS,
+                self.SMRIPREP_OUTPUT_PATTERN,
+                self.FS_OUTPUT_PATTERN,
+            )
+        return self._output_index
 
     def generate_fs_outputs(
         self, main_dir: str, subject_id: str, output_id: str
@@ -235,7 +385,11 @@ class SmriPrep(object):
         pattern = self.FS_OUTPUT_PATTERN.format(
             main_dir=main_dir, subject_id=subject_id, output_id=output_id
         )
-        return Path(self.destination).absolute().rglob(pattern)
+        return match_manifest(
+            self.output_index.get_files(subject_id),
+            pattern,
+            self.output_index.destination,
+        )
 
     def generate_smriprep_outputs(
         self,
@@ -273,8 +427,11 @@ class SmriPrep(object):
             session_id=session_id,
             output_id=output_id,
         )
-
-        return Path(self.destination).absolute().rglob(pattern)
+        return match_manifest(
+            self.output_index.get_files(subject_id),
+            pattern,
+            self.output_index.destination,
+        )
 
     def find_output(
         self, partial_output: str, subject_id: str, session_id: str
@@ -292,25 +449,7 @@ class SmriPrep(object):
         session_id : str
             Session string ID
         """
-        main_dir, sub_dir, output_id = self.OUTPUTS.get(partial_output)
-        if main_dir == "freesurfer":
-            outputs = list(
-                self.generate_fs_outputs(main_dir, subject_id, output_id)
-            )
-        elif main_dir == "smriprep":
-            outputs = list(
-                self.generate_smriprep_outputs(
-                    main_dir, sub_dir, subject_id, session_id, output_id
-                )
-            )
-        # if len(outputs) == 1:
-        #     return str(outputs[0])
-        # elif len(outputs) > 1:
-        if ("native" in partial_output) and (
-            "transform" not in partial_output
-        ):
-            return [str(f) for f in outputs if ("MNI" not in f.name)]
-        return [str(f) for f in outputs]
+        return self.output_index.find(partial_output, subject_id, session_id)
 
     def generate_output_dict(self) -> dict:
         """
@@ -327,14 +466,9 @@ class SmriPrep(object):
             subject_ids if isinstance(subject_ids, list) else [subject_ids]
         )
         for subject_id in subject_ids:
-            output_dict[subject_id] = {}
-            # session_pattern = self.SESSION_PATTERN.format(
-            #     subject_id=subject_id
-            # )
-            for key in self.OUTPUTS:
-                output_dict[subject_id][key] = self.find_output(
-                    key, subject_id, "*"
-                )
+            output_dict[subject_id] = self.output_index.get_outputs(
+                subject_id
+            )
         if len(output_dict) == 1:
             return output_dict.get(subject_id)
         return output_dict
@@ -0,0 +1,160 @@
+"""
+Concurrent launches of (containerized) participant-level commands, each
+logging its stdout and stderr to its own files.
+"""
+import shlex
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Union
+
+from nipype import logging
+
+LOGGER = logging.getLogger("nipype.workflow")
+
+#: Per-participant logs' file name template
+LOG_TEMPLATE = "sub-{participant_label}_{stream}.log"
+
+
+class RunResult(NamedTuple):
+    """
+    Outcome of a participant's command.
+    """
+
+    participant_label: str
+    command: str
+    returncode: int
+    duration: float
+    stdout: Path
+    stderr: Path
+
+    @property
+    def succeeded(self) -> bool:
+        return self.returncode == 0
+
+
+def run_command(
+    participant_label: str,
+    command: Union[str, List[str]],
+    log_dir: Union[Path, str],
+) -> RunResult:
+    """
+    Runs a participant's command, redirecting its stdout and stderr to
+    the participant's logs (see *LOG_TEMPLATE*).
+
+    Parameters
+    ----------
+    participant_label : str
+        Participant's label
+    command : Union[str, List[str]]
+        Command to run (strings are split as a shell would)
+    log_dir : Union[Path, str]
+        Directory of the logs
+
+    Returns
+    -------
+    RunResult
+        The command's exit code, duration (seconds) and logs
+    """
+    log_dir = Path(log_dir)
+    log_dir.mkdir(exist_ok=True, parents=True)
+    logs = {
+        stream: log_dir
+        / LOG_TEMPLATE.format(
+            participant_label=participant_label, stream=stream
+        )
+        for stream in ("stdout", "stderr")
+    }
+    args = shlex.split(command) if isinstance(command, str) else command
+    command = " ".join(shlex.quote(str(arg)) for arg in args)
+    LOGGER.info(f"Launching sub-{participant_label}: {command}")
+    start = time.monotonic()
+    with open(logs["stdout"], "w") as stdout, open(
+        logs["stderr"], "w"
+    ) as stderr:
+        try:
+            returncode = subprocess.run(
+                args, stdout=stdout, stderr=stderr
+            ).returncode
+        except OSError as e:
+            # i.e, a missing executable
+            stderr.write(f"{e}\n")
+            returncode = 127
+    result = RunResult(
+        participant_label,
+        command,
+        returncode,
+        time.monotonic() - start,
+        logs["stdout"],
+        logs["stderr"],
+    )
+    LOGGER.info(
+        f"sub-{participant_label} exited with code {returncode} after "
+        f"{result.duration:.1f} seconds."
+    )
+    return result
+
+
+def run_commands(
+    commands: Dict[str, Union[str, List[str]]],
+    log_dir: Union[Path, str],
+    max_concurrent: int = 1,
+    callback: Callable[[RunResult], None] = None,
+) -> List[RunResult]:
+    """
+    Runs participants' commands, at most *max_concurrent* at a time.
+
+    Parameters
+    ----------
+    commands : Dict[str, Union[str, List[str]]]
+        Commands by participant's label
+    log_dir : Union[Path, str]
+        Directory of the participants' logs
+    max_concurrent : int, optional
+        Maximal number of concurrent commands, by default 1
+    callback : Callable[[RunResult], None], optional
+        Called with each result as soon as its command exits
+
+    Returns
+    -------
+    List[RunResult]
+        Results, ordered as *commands*
+    """
+    results = {}
+    with ThreadPoolExecutor(max(1, max_concurrent)) as executor:
+        futures = {
+            executor.submit(
+                run_command, participant_label, command, log_dir
+            ): participant_label
+            for participant_label, command in commands.items()
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if callback is not None:
+                callback(result)
+    return [results[participant_label] for participant_label in commands]
+
+
+def summarize_results(results: List[RunResult]) -> str:
+    """
+    A table of participants' exit codes and durations.
+
+    Parameters
+    ----------
+    results : List[RunResult]
+        Participants' results
+
+    Returns
+    -------
+    str
+        A line per participant
+    """
+    lines = [f"{'participant':<16}{'exit code':>10}{'duration (s)':>14}"]
+    for result in results:
+        lines.append(
+            f"{'sub-' + result.participant_label:<16}"
+            f"{result.returncode:>10}{result.duration:>14.1f}"
+        )
+    return "\n".join(lines)
@@ -2,6 +2,8 @@
 
 """Tests for `dwiprep` package."""
 
+from pathlib import Path
+
 import pytest
 
 from click.testing import CliRunner
@@ -30,8 +32,226 @@ def test_command_line_interface():
     """Test the CLI."""
     runner = CliRunner()
     result = runner.invoke(cli.main)
-    assert result.exit_code == 0
-    assert "dwiprep.cli.main" in result.output
+    assert result.exit_code == 2
+    assert "Missing argument" in result.output
     help_result = runner.invoke(cli.main, ["--help"])
     assert help_result.exit_code == 0
-    assert "--help  Show this message and exit." in help_result.output
+    assert "--plan-only" in help_result.output
+    assert "-h, --help" in help_result.output
+
+
+def test_cli_options():
+    """Test the CLI's option parsing."""
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        Path("bids").mkdir()
+        result = runner.invoke(
+            cli.main, ["bids", "out", "participant", "--shard", "3/2"]
+        )
+        assert result.exit_code == 2
+        result = runner.invoke(
+            cli.main,
+            ["bids", "out", "participant", "--dwi-identifier", "{acq"],
+        )
+        assert result.exit_code == 2
+    assert cli.parse_json_option(None, None, '{"acquisition": "AP"}') == {
+        "acquisition": "AP"
+    }
+
+
+def test_select_shard():
+    """Test the selection of participants' shards."""
+    labels = ["03", "01", "04", "02", "05"]
+    shards = [cli.select_shard(labels, (index, 2)) for index in (1, 2)]
+    assert shards == [["01", "03", "05"], ["02", "04"]]
+    assert cli.select_shard(labels) == sorted(labels)
+
+
+def test_cli_anatomical_wf(tmp_path, monkeypatch):
+    """Test the CLI's anatomical options reach smriprep's workflow."""
+    import nibabel as nb
+    import numpy as np
+    import smriprep.utils.bids
+    from nipype.interfaces import utility as niu
+    from nipype.pipeline import engine as pe
+    from niworkflows.engine.workflows import LiterateWorkflow
+
+    from dwiprep import dwiprep as manager_module
+
+    bids_dir = tmp_path / "bids"
+    (bids_dir / "sub-01" / "anat").mkdir(parents=True)
+    (bids_dir / "dataset_description.json").write_text(
+        '{"Name": "test", "BIDSVersion": "1.6.0"}'
+    )
+    nb.save(
+        nb.Nifti1Image(np.zeros((2, 2, 2), np.float32), np.eye(4)),
+        bids_dir / "sub-01" / "anat" / "sub-01_T1w.nii.gz",
+    )
+    (bids_dir / "sub-01" / "anat" / "sub-01_T1w.json").write_text("{}")
+    anat_derivatives = tmp_path / "smriprep"
+    anat_derivatives.mkdir()
+    calls = {}
+
+    def init_anat_preproc_wf(**kwargs):
+        calls["anat_preproc_wf"] = kwargs
+        workflow = LiterateWorkflow(name="anat_preproc_wf")
+        inputnode = pe.Node(
+            niu.IdentityInterface(
+                fields=["subject_id", "t1w", "t2w", "subjects_dir"]
+            ),
+            name="inputnode",
+        )
+        workflow.add_nodes([inputnode])
+        return workflow
+
+    def collect_derivatives(derivatives_dir, subject_id, std_spaces, fs):
+        calls["derivatives"] = (derivatives_dir, subject_id, std_spaces)
+        return {}
+
+    def estimate(self, participant_labels, calibration):
+        # the dry run builds the anatomical workflows only
+        for participant_label in participant_labels:
+            self.init_anatomical_wf(participant_label)
+        return []
+
+    monkeypatch.setattr(
+        manager_module, "init_anat_preproc_wf", init_anat_preproc_wf
+    )
+    monkeypatch.setattr(
+        smriprep.utils.bids, "collect_derivatives", collect_derivatives
+    )
+    monkeypatch.setattr(manager_module.DmriPrepManager, "estimate", estimate)
+    result = CliRunner().invoke(
+        cli.main,
+        [
+            str(bids_dir),
+            str(tmp_path / "out"),
+            "participant",
+            "--skip-bids-validation",
+            "--output-spaces",
+            "MNI152NLin6Asym:res-2 T1w",
+            "--anat-derivatives",
+            str(anat_derivatives),
+            "--dry-run",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    kwargs = calls["anat_preproc_wf"]
+    assert "anat_derivatives" not in kwargs
+    assert kwargs["spaces"].get_spaces(nonstandard=False, dim=(3,)) == [
+        "MNI152NLin6Asym"
+    ]
+    assert calls["derivatives"] == (
+        anat_derivatives.absolute(),
+        "01",
+        ["MNI152NLin6Asym"],
+    )
+    spaces = cli.parse_smriprep_kwargs(None, None, '{"spaces": ["T1w"]}')
+    assert spaces["spaces"].get_spaces() == ["T1w"]
+
+
+def test_preprocess_wf_nodes():
+    """Test preprocessing workflows do not share their nodes."""
+    from nipype.interfaces.base import isdefined
+
+    from dwiprep.workflows.dmri.pipelines.preprocess import nodes
+    from dwiprep.workflows.dmri.pipelines.preprocess.preprocess import (
+        init_preprocess_wf,
+    )
+
+    known = init_preprocess_wf(pe_dir="j-")
+    inferred = init_preprocess_wf(topup=True)
+    assert known.get_node("dwipreproc").inputs.pe_dir == "j-"
+    assert known.get_node("infer_pe") is None
+    assert not isdefined(inferred.get_node("dwipreproc").inputs.pe_dir)
+    assert inferred.get_node("infer_pe") is not None
+    for node in (nodes.DWIPREPROC_NODE, nodes.TOPUP_DWIPREPROC_NODE):
+        assert not isdefined(node.inputs.pe_dir)
+    assert known.get_node("inputnode") is not nodes.INPUT_NODE
+
+
+def test_topup_preprocess_wf():
+    """Test each topup preprocessing workflow is fed its own field."""
+    from dwiprep.workflows.dmri.pipelines.preprocess.preprocess import (
+        init_preprocess_wf,
+    )
+
+    workflows = [init_preprocess_wf(name=name, topup=True) for name in "ab"]
+    args_nodes = [wf.get_node("topup_args") for wf in workflows]
+    assert args_nodes[0] is not args_nodes[1]
+    for wf, args_node in zip(workflows, args_nodes):
+        edges = wf._graph.get_edge_data(args_node, wf.get_node("dwipreproc"))
+        assert edges["connect"] == [("args", "args")]
+
+
+def test_parcellation_wf():
+    """Test parcellation workflows' names and FreeSurfer validation."""
+    from dwiprep.workflows.dmri.pipelines.parcellation import nodes
+    from dwiprep.workflows.dmri.pipelines.parcellation.parcellation import (
+        init_parcellation_wf,
+    )
+
+    aparc_wf = init_parcellation_wf(parcellation="aparc")
+    dseg_wf = init_parcellation_wf(parcellation="dseg", freesurfer=False)
+    for wf, parcellation in ((aparc_wf, "aparc"), (dseg_wf, "dseg")):
+        stats_node = wf.get_node("parcellation_stats")
+        assert stats_node.inputs.parcellation_name == parcellation
+        assert stats_node is not nodes.PARCELLATION_STATS_NODE
+    with pytest.raises(ValueError, match="FreeSurfer"):
+        init_parcellation_wf(parcellation="aseg", freesurfer=False)
+
+
+def test_epi_ref_wf(tmp_path):
+    """Test b=0 volumes are extracted by their gradient table's indices."""
+    from dwiprep.workflows.dmri.pipelines.epi_ref.epi_ref import (
+        init_epi_ref_wf,
+    )
+
+    bval, bvec = tmp_path / "dwi.bval", tmp_path / "dwi.bvec"
+    bval.write_text("0 1000 5 2000 0\n")
+    bvec.write_text("0 1 0 1 0\n0 0 0 0 0\n0 0 0 0 0\n")
+    wf = init_epi_ref_wf()
+    select_b0 = wf.get_node("select_b0")
+    select_b0.inputs.in_bval = str(bval)
+    select_b0.inputs.in_bvec = str(bvec)
+    coord = select_b0.interface.run().outputs.coord
+    assert coord == "0,2,4"
+    coord_args = wf.get_node("coord_args")
+    coord_args.inputs.coord = coord
+    assert coord_args.interface.run().outputs.args == "-coord 3 0,2,4"
+    assert wf.get_node("extract_b0") is not None
+
+
+def test_dwi_preproc_wf_twice(tmp_path):
+    """Test several runs' workflows are built in a single process."""
+    import json
+
+    import nibabel as nb
+    import numpy as np
+
+    from dwiprep.utils.inputs import INPUTNODE
+    from dwiprep.workflows.dmri.base import init_dwi_preproc_wf
+    from dwiprep.workflows.dmri.pipelines.derivatives import edges
+
+    n_edges = len(edges.INPUT_TO_DS_BATCH_EDGES)
+    ds_batches = []
+    for run in (1, 2):
+        dwi_file = tmp_path / f"sub-01_dir-AP_run-{run}_dwi.nii.gz"
+        nb.save(
+            nb.Nifti1Image(np.zeros((2, 2, 2, 3), np.float32), np.eye(4)),
+            dwi_file,
+        )
+        json_file = tmp_path / f"sub-01_dir-AP_run-{run}_dwi.json"
+        json_file.write_text(json.dumps({"PhaseEncodingDirection": "j-"}))
+        wf = init_dwi_preproc_wf(
+            str(dwi_file),
+            INPUTNODE,
+            str(tmp_path),
+            str(tmp_path),
+            regrid_dwi=run == 2,
+        )
+        ds_batches.append(wf.get_node("dmri_derivatives_wf.ds_batch"))
+        resample_dwi = wf.get_node("apply_transform_wf.resample_dwi")
+        assert resample_dwi.inputs.regrid is (run == 2)
+    assert ds_batches[0] is not ds_batches[1]
+    assert len(edges.INPUT_TO_DS_BATCH_EDGES) == n_edges
@@ -0,0 +1,85 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import nibabel as nb
+import numpy as np
+
+from dwiprep.interfaces.dds import BatchDerivativesDataSink
+
+
+def infer_desc(in_file: str) -> str:
+    return Path(in_file).name.split(".")[0]
+
+
+class BatchDerivativesDataSinkTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.source_file = (
+            self.tmp_path / "bids" / "sub-01" / "dwi" / "sub-01_dwi.nii.gz"
+        )
+        self.in_dir = self.tmp_path / "inputs"
+        self.in_dir.mkdir()
+        img = nb.Nifti1Image(np.ones((2, 2, 2), np.float32), np.eye(4))
+        self.metrics = []
+        for metric in ["fa", "adc"]:
+            nb.save(img, self.in_dir / f"{metric}.nii.gz")
+            self.metrics.append(str(self.in_dir / f"{metric}.nii.gz"))
+        self.bvec = self.in_dir / "dwi.bvec"
+        self.bvec.write_text("1 0\n0 1\n0 0\n")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def sink(self, **outputs) -> BatchDerivativesDataSink:
+        dsink = BatchDerivativesDataSink(
+            outputs=outputs, base_directory=str(self.tmp_path)
+        )
+        dsink.inputs.source_file = str(self.source_file)
+        return dsink
+
+    def test_batch_paths(self):
+        dsink = self.sink(
+            bvec=dict(datatype="dwi", desc="preproc", suffix="dwi"),
+            metrics=dict(datatype="dwi", suffix="epiref", desc=infer_desc),
+            std_metrics=dict(datatype="dwi", suffix="epiref", space="MNI"),
+        )
+        dsink.inputs.bvec = str(self.bvec)
+        dsink.inputs.metrics = self.metrics
+        out_files = dsink.run().outputs.out_file
+        names = [Path(out_file).name for out_file in out_files]
+        self.assertEqual(
+            names,
+            [
+                "sub-01_desc-preproc_dwi.bvec",
+                "sub-01_desc-fa_epiref.nii.gz",
+                "sub-01_desc-adc_epiref.nii.gz",
+            ],
+        )
+        self.assertEqual(
+            Path(out_files[0]).read_text(), self.bvec.read_text()
+        )
+
+    def test_duplicate_paths(self):
+        dsink = self.sink(metrics=dict(datatype="dwi", suffix="epiref"))
+        dsink.inputs.metrics = self.metrics
+        with self.assertRaises(ValueError):
+            dsink.run()
+
+    def test_skip_unchanged(self):
+        def run():
+            dsink = self.sink(metrics=dict(datatype="dwi", desc=infer_desc))
+            dsink.inputs.metrics = self.metrics
+            dsink.inputs.check_hdr = False
+            return dsink.run().outputs.status
+
+        self.assertEqual(run(), ["wrote", "wrote"])
+        self.assertEqual(run(), ["skipped", "skipped"])
+        # a modified source is written again
+        stat = os.stat(self.metrics[0])
+        os.utime(self.metrics[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertEqual(run(), ["wrote", "skipped"])
@@ -0,0 +1,69 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import nibabel as nb
+import numpy as np
+
+from dwiprep.interfaces.gradients import ExtractShells
+
+#: a b=5 volume is within the b=0 threshold
+BVALS = [0, 1000, 5, 2000, 995, 2005, 0]
+
+
+class ExtractShellsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        tmp_path = Path(self.tmp_dir.name)
+        shape = (3, 2, 2, len(BVALS))
+        self.data = np.arange(np.prod(shape), dtype=np.int16).reshape(shape)
+        self.dwi = tmp_path / "dwi.nii"
+        nb.save(nb.Nifti1Image(self.data, np.eye(4)), self.dwi)
+        self.bval = tmp_path / "dwi.bval"
+        np.savetxt(self.bval, [BVALS], fmt="%g")
+        self.bvec = tmp_path / "dwi.bvec"
+        bvecs = np.tile([[1.0], [0.0], [0.0]], len(BVALS))
+        bvecs[:, np.array(BVALS) < 50] = 0
+        np.savetxt(self.bvec, bvecs)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def extract(self, **inputs):
+        return ExtractShells(
+            in_file=str(self.dwi),
+            in_bval=str(self.bval),
+            in_bvec=str(self.bvec),
+            **inputs,
+        ).run()
+
+    def test_max_bvalue(self):
+        outputs = self.extract(max_bvalue=1100).outputs
+        # the b=5 volume is kept with the b=0 volumes
+        self.assertEqual(outputs.indices, [0, 1, 2, 4, 6])
+        img = nb.load(outputs.out_file)
+        self.assertEqual(img.get_data_dtype(), np.int16)
+        np.testing.assert_array_equal(
+            img.get_fdata(), self.data[..., outputs.indices]
+        )
+        np.testing.assert_array_equal(
+            np.loadtxt(outputs.out_bval), [0, 1000, 5, 995, 0]
+        )
+        self.assertEqual(np.loadtxt(outputs.out_bvec).shape, (3, 5))
+
+    def test_exclude_b0(self):
+        outputs = self.extract(min_bvalue=1500, include_b0=False).outputs
+        self.assertEqual(outputs.indices, [3, 5])
+        # the b=5 volume is not a low non-zero shell
+        outputs = self.extract(max_bvalue=1100, include_b0=False).outputs
+        self.assertEqual(outputs.indices, [1, 4])
+
+    def test_no_volumes(self):
+        with self.assertRaises(ValueError):
+            self.extract(max_bvalue=500, include_b0=False)
@@ -0,0 +1,98 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import nibabel as nb
+import numpy as np
+
+from dwiprep.interfaces.resample import ResampleDWI
+from dwiprep.utils.images import compress
+from dwiprep.utils.resampling import fsl_to_voxel_mapping
+
+
+class ResampleDWITestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        tmp_path = Path(self.tmp_dir.name)
+        rng = np.random.default_rng(0)
+        self.data = rng.random((6, 5, 4, 3)).astype(np.float32)
+        affine = np.diag([2.0, 2.0, 2.0, 1.0])
+        self.dwi = tmp_path / "dwi.nii.gz"
+        nb.save(nb.Nifti1Image(self.data, affine), self.dwi)
+        self.reference = tmp_path / "t1w.nii.gz"
+        nb.save(
+            nb.Nifti1Image(np.zeros((12, 10, 8), np.float32), affine / 2),
+            self.reference,
+        )
+        # one voxel (2mm) shift along the second axis
+        self.matrix = np.eye(4)
+        self.matrix[1, 3] = 2.0
+        self.matrix_file = tmp_path / "epi_to_t1w.mat"
+        np.savetxt(self.matrix_file, self.matrix)
+        self.bvec = tmp_path / "dwi.bvec"
+        self.bvec.write_text("1 0 0\n0 1 0\n0 0 1\n")
+        self.bval = tmp_path / "dwi.bval"
+        self.bval.write_text("0 1000 1000\n")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def resample(self, **inputs):
+        return ResampleDWI(
+            in_file=str(self.dwi),
+            in_bvec=str(self.bvec),
+            in_bval=str(self.bval),
+            in_matrix_file=str(self.matrix_file),
+            reference=str(self.reference),
+            **inputs,
+        ).run()
+
+    def test_native_grid(self):
+        outputs = self.resample().outputs
+        self.assertTrue(outputs.out_file.endswith("dwi_resampled.nii.gz"))
+        img = nb.load(outputs.out_file)
+        np.testing.assert_array_equal(img.get_fdata(), self.data)
+        mapping = fsl_to_voxel_mapping(
+            self.matrix, nb.load(self.dwi), nb.load(self.reference)
+        )
+        np.testing.assert_allclose(
+            img.affine, nb.load(self.reference).affine @ np.linalg.inv(mapping)
+        )
+        np.testing.assert_allclose(
+            np.loadtxt(outputs.out_bvec), np.loadtxt(self.bvec)
+        )
+        self.assertTrue(Path(outputs.out_rotated_bvec).exists())
+        self.assertFalse(Path("dwi_resampled.nii").exists())
+        self.assertFalse(Path("dwi.nii").exists())
+
+    def test_placed_input(self):
+        # header and data as separate gzip members
+        uncompressed = Path(self.tmp_dir.name) / "dwi_members.nii"
+        nb.save(nb.load(self.dwi), uncompressed)
+        self.dwi = compress(uncompressed, f"{uncompressed}.gz")
+        original = self.dwi.read_bytes()
+        outputs = self.resample().outputs
+        img = nb.load(outputs.out_file)
+        np.testing.assert_array_equal(img.get_fdata(), self.data)
+        self.assertFalse(np.allclose(img.affine, nb.load(self.dwi).affine))
+        # the input is left untouched
+        self.assertEqual(self.dwi.read_bytes(), original)
+        self.dwi = uncompressed
+        img = nb.load(self.resample().outputs.out_file)
+        np.testing.assert_array_equal(img.get_fdata(), self.data)
+
+    def test_regrid(self):
+        out_file = self.resample(regrid=True).outputs.out_file
+        resampled = nb.load(out_file).get_fdata()
+        self.assertEqual(resampled.shape, (12, 10, 8, 3))
+        # a budget of a few voxels' values yields the same series
+        outputs = self.resample(regrid=True, max_memory_mb=0.001).outputs
+        np.testing.assert_allclose(
+            nb.load(outputs.out_file).get_fdata(), resampled, rtol=1e-6
+        )
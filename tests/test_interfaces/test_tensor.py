@@ -0,0 +1,62 @@
+import resource
+import subprocess
+import sys
+from unittest import TestCase
+
+import numpy as np
+
+from dwiprep.interfaces.tensor import (
+    design_matrix,
+    fit_wls,
+    peak_memory_mb,
+    tensor_metrics,
+)
+
+
+class TensorFitTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        rng = np.random.default_rng(42)
+        bvecs = rng.normal(size=(3, 30))
+        cls.bvecs = bvecs / np.linalg.norm(bvecs, axis=0)
+        cls.bvals = np.r_[np.zeros(3), np.full(27, 1000.0)]
+        cls.bvecs[:, :3] = 0
+        cls.design = design_matrix(cls.bvals, cls.bvecs)
+        # prolate tensor aligned with the x axis
+        cls.evals = np.array([1.7e-3, 0.3e-3, 0.3e-3])
+        return super().setUpClass()
+
+    def simulate(self, n_voxels: int = 5) -> np.ndarray:
+        tensor = np.diag(self.evals)
+        adc = np.einsum("in,ij,jn->n", self.bvecs, tensor, self.bvecs)
+        signal = 1000 * np.exp(-self.bvals * adc)
+        return np.tile(signal, (n_voxels, 1))
+
+    def test_fit_recovers_metrics(self):
+        metrics = tensor_metrics(fit_wls(self.simulate(), self.design))
+        l1, l2, l3 = self.evals
+        md = self.evals.mean()
+        fa = np.sqrt(
+            1.5 * ((self.evals - md) ** 2).sum() / (self.evals ** 2).sum()
+        )
+        np.testing.assert_allclose(metrics["adc"], md, rtol=1e-6)
+        np.testing.assert_allclose(metrics["fa"], fa, rtol=1e-6)
+        np.testing.assert_allclose(metrics["ad"], l1, rtol=1e-6)
+        np.testing.assert_allclose(metrics["rd"], (l2 + l3) / 2, rtol=1e-6)
+        np.testing.assert_allclose(np.abs(metrics["evec"][:, 0]), 1, rtol=1e-6)
+
+    def test_metrics_shapes(self):
+        metrics = tensor_metrics(fit_wls(self.simulate(7), self.design))
+        self.assertEqual(metrics["fa"].shape, (7,))
+        self.assertEqual(metrics["evec"].shape, (7, 3))
+        self.assertEqual(metrics["eval"].shape, (7, 3))
+
+    def test_peak_memory(self):
+        # a child's peak is not added to this process' own peak
+        subprocess.run(
+            [sys.executable, "-c", "x = bytearray(200 * 2 ** 20)"],
+            check=True,
+        )
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.assertEqual(peak_memory_mb(), own)
+        self.assertGreaterEqual(peak_memory_mb(children=True), 200)
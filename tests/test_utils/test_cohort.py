@@ -0,0 +1,104 @@
+import importlib.util
+import tempfile
+from pathlib import Path
+from unittest import TestCase, skipUnless
+
+import nibabel as nb
+import numpy as np
+
+from dwiprep.utils.cohort import (
+    ROWS_PER_CHUNK,
+    CohortStore,
+    export_cohort,
+    grid_key,
+)
+from dwiprep.utils.output_index import OutputIndex
+from dwiprep.workflows.dmri.pipelines.derivatives.configurations import (
+    STD_SPACE,
+)
+from dwiprep.workflows.dmri.utils.utils import OUTPUTS
+
+NAME = "sub-{subject}_ses-1_space-anat_desc-{metric}_epiref.nii.gz"
+
+
+@skipUnless(importlib.util.find_spec("h5py"), "requires h5py")
+class CohortStoreTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.destination = Path(self.tmp_dir.name) / "derivatives"
+        self.data = {}
+        for i, subject in enumerate(["01", "02", "03"]):
+            shape = (4, 3, 2) if subject != "03" else (5, 3, 2)
+            out_dir = self.destination / "dmriprep" / f"sub-{subject}"
+            out_dir = out_dir / "ses-1" / "dwi"
+            out_dir.mkdir(parents=True)
+            for metric in ["fa", "evec"]:
+                data = np.full(shape, i, np.float32)
+                if metric == "evec":
+                    data = np.stack([data] * 3, axis=-1)
+                nb.save(
+                    nb.Nifti1Image(data, np.eye(4)),
+                    out_dir / NAME.format(subject=subject, metric=metric),
+                )
+                self.data[subject, metric] = data
+        self.store = Path(self.tmp_dir.name) / "cohort.h5"
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def export(self, subjects):
+        index = OutputIndex(self.destination, OUTPUTS)
+        export_cohort(
+            self.store, index, subjects, "coreg", metrics=["fa", "evec"]
+        )
+
+    def test_export_and_append(self):
+        self.export(["01"])
+        self.export(["01", "02", "03"])
+        with CohortStore(self.store, mode="r") as store:
+            grids = store.grids("coreg")
+            self.assertEqual(len(grids), 2)
+            grid = "/coreg/" + grid_key(
+                nb.Nifti1Image(self.data["01", "fa"], np.eye(4))
+            )
+            fa, subjects = store.read("fa", grid)
+            # "01" was not exported twice
+            self.assertEqual(subjects, ["01", "02"])
+            np.testing.assert_array_equal(fa[1], self.data["02", "fa"])
+            evec, _ = store.read("evec", grid)
+            self.assertEqual(evec.shape, (2, 4, 3, 2, 3))
+            self.assertEqual(len(store.index("coreg")), 3)
+
+    def test_read_across_subjects(self):
+        self.export(["01", "02"])
+        with CohortStore(self.store, mode="r") as store:
+            fa, subjects = store.read("fa", store.grids("coreg")[0])
+            self.assertEqual(fa.chunks, (ROWS_PER_CHUNK, 4, 3, 2))
+            evec, _ = store.read("evec", store.grids("coreg")[0])
+            self.assertEqual(evec.chunks, (ROWS_PER_CHUNK, 4, 3, 2, 3))
+            # a voxel (and a region) across all subjects
+            np.testing.assert_array_equal(fa[:, 1, 2, 0], [0, 1])
+            np.testing.assert_array_equal(
+                fa[:, :2, 1:], [self.data[s, "fa"][:2, 1:] for s in subjects]
+            )
+
+    def test_default_space(self):
+        out_dir = self.destination / "dmriprep" / "sub-01" / "ses-1" / "dwi"
+        std_name = NAME.replace("space-anat", f"space-{STD_SPACE}")
+        nb.save(
+            nb.Nifti1Image(self.data["01", "fa"], np.eye(4)),
+            out_dir / std_name.format(subject="01", metric="fa"),
+        )
+        index = OutputIndex(self.destination, OUTPUTS)
+        export_cohort(self.store, index, ["01"], metrics=["fa"])
+        with CohortStore(self.store, mode="r") as store:
+            self.assertEqual(len(store.grids("std")), 1)
+            self.assertEqual(store.grids("coreg"), [])
+
+    def test_no_metrics(self):
+        index = OutputIndex(self.destination, OUTPUTS)
+        with self.assertRaises(FileNotFoundError):
+            export_cohort(self.store, index, ["01", "02"])
+        self.assertFalse(Path(self.store).exists())
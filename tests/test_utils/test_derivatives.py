@@ -0,0 +1,99 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from dwiprep.utils.derivatives import (
+    FS_DONE,
+    collect_anat_derivatives,
+    find_anat_derivative,
+)
+
+ANAT_DIR = "dmriprep/sub-01/anat"
+
+FILES = [
+    f"{ANAT_DIR}/sub-01_desc-preproc_T1w.nii.gz",
+    f"{ANAT_DIR}/sub-01_desc-brain_mask.nii.gz",
+    f"{ANAT_DIR}/sub-01_dseg.nii.gz",
+    f"{ANAT_DIR}/sub-01_space-MNI152NLin2009cAsym_dseg.nii.gz",
+    f"{ANAT_DIR}/sub-01_label-GM_probseg.nii.gz",
+    f"{ANAT_DIR}/sub-01_label-WM_probseg.nii.gz",
+    f"{ANAT_DIR}/sub-01_label-CSF_probseg.nii.gz",
+    f"{ANAT_DIR}/sub-01_from-T1w_to-MNI152NLin2009cAsym_mode-image_xfm.h5",
+    f"{ANAT_DIR}/sub-01_from-MNI152NLin2009cAsym_to-T1w_mode-image_xfm.h5",
+]
+
+FS_FILES = [
+    f"{ANAT_DIR}/sub-01_desc-aseg_dseg.nii.gz",
+    f"{ANAT_DIR}/sub-01_desc-aparcaseg_dseg.nii.gz",
+    f"{ANAT_DIR}/sub-01_from-T1w_to-fsnative_mode-image_xfm.txt",
+    f"{ANAT_DIR}/sub-01_from-fsnative_to-T1w_mode-image_xfm.txt",
+]
+
+TEMPLATES = ["MNI152NLin2009cAsym"]
+
+
+class AnatDerivativesTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.destination = Path(self.tmp_dir.name)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_find(self):
+        files = FILES + ["dmriprep/sub-01/ses-1/anat/sub-01_ses-1_dseg.nii.gz"]
+        self.assertEqual(
+            find_anat_derivative(files, "01", "dseg.nii.gz", "dmriprep"),
+            FILES[2],
+        )
+        self.assertIsNone(
+            find_anat_derivative(files, "02", "dseg.nii.gz", "dmriprep")
+        )
+
+    def test_collect(self):
+        derivatives = collect_anat_derivatives(
+            FILES, self.destination, "01", TEMPLATES
+        )
+        self.assertEqual(
+            derivatives["t1w_dseg"], str(self.destination / FILES[2])
+        )
+        self.assertEqual(len(derivatives["t1w_tpms"]), 3)
+        self.assertEqual(derivatives["template"], TEMPLATES)
+        self.assertNotIn("subjects_dir", derivatives)
+        # incomplete derivatives are not reused
+        self.assertIsNone(
+            collect_anat_derivatives(
+                FILES[:-1], self.destination, "01", TEMPLATES
+            )
+        )
+        self.assertIsNone(
+            collect_anat_derivatives(
+                FILES, self.destination, "01", TEMPLATES + ["MNI152NLin6Asym"]
+            )
+        )
+
+    def test_collect_freesurfer(self):
+        files = FILES + FS_FILES
+        kwargs = dict(freesurfer=True)
+        self.assertIsNone(
+            collect_anat_derivatives(
+                files, self.destination, "01", TEMPLATES, **kwargs
+            )
+        )
+        for relative_path in FS_DONE:
+            path = self.destination / "freesurfer" / "sub-01" / relative_path
+            path.parent.mkdir(exist_ok=True, parents=True)
+            path.touch()
+        derivatives = collect_anat_derivatives(
+            files, self.destination, "01", TEMPLATES, **kwargs
+        )
+        self.assertEqual(
+            derivatives["subjects_dir"], str(self.destination / "freesurfer")
+        )
+        self.assertIsNone(
+            collect_anat_derivatives(
+                FILES, self.destination, "01", TEMPLATES, **kwargs
+            )
+        )
@@ -0,0 +1,100 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import nibabel as nb
+import numpy as np
+
+from dwiprep.utils.estimation import (
+    calibrate,
+    estimate_node,
+    estimate_nodes,
+    fit_cost,
+    image_mvox,
+    load_calibration,
+    match_cost,
+    summarize_estimates,
+)
+
+CALIBRATION = {
+    "default": {
+        "seconds": 1,
+        "seconds_per_mvox": 0,
+        "mem_gb": 0.1,
+        "mem_gb_per_mvox": 0,
+    },
+    "nodes": {
+        "denoise": {
+            "seconds": 10,
+            "seconds_per_mvox": 2,
+            "mem_gb": 1,
+            "mem_gb_per_mvox": 0.5,
+        },
+        "anat_preproc_wf.*": {"seconds": 100},
+        "anat_preproc_wf.*autorecon*": {"seconds": 1000},
+    },
+}
+
+NODES = [
+    "dwi_preproc_dir_AP_wf.preprocess_wf.denoise",
+    "dwi_preproc_dir_AP_wf.preprocess_wf.dwipreproc",
+    "anat_preproc_wf.surface_recon_wf.autorecon1",
+    "anat_preproc_wf.brain_extraction_wf.n4",
+]
+
+
+class EstimationTestCase(TestCase):
+    def test_package_calibration(self):
+        calibration = load_calibration()
+        self.assertIn("dwipreproc", calibration["nodes"])
+        self.assertEqual(
+            match_cost(NODES[1], calibration),
+            calibration["nodes"]["dwipreproc"],
+        )
+
+    def test_match_cost(self):
+        self.assertEqual(match_cost(NODES[0], CALIBRATION)["seconds"], 10)
+        self.assertEqual(match_cost(NODES[1], CALIBRATION)["seconds"], 1)
+        # the most specific (longest) pattern wins
+        self.assertEqual(match_cost(NODES[2], CALIBRATION)["seconds"], 1000)
+        self.assertEqual(match_cost(NODES[3], CALIBRATION)["seconds"], 100)
+
+    def test_estimate(self):
+        self.assertEqual(estimate_node(NODES[0], 4, CALIBRATION), (18, 3))
+        # missing cost fields are free
+        self.assertEqual(estimate_node(NODES[3], 4, CALIBRATION), (100, 0))
+        rows = estimate_nodes(
+            NODES, {"anat_preproc_wf": 16}, 4, CALIBRATION
+        )
+        self.assertEqual([row["mvox"] for row in rows], [4, 4, 16, 16])
+        summary = summarize_estimates(rows, "run")
+        self.assertEqual(
+            summary["dwi_preproc_dir_AP_wf"],
+            dict(nodes=2, seconds=19, mem_gb=3),
+        )
+        self.assertEqual(summarize_estimates(rows)["total"]["seconds"], 1119)
+
+    def test_calibrate(self):
+        fixed, per_mvox = fit_cost([2, 4, 6], [14, 18, 22])
+        self.assertAlmostEqual(fixed, 10)
+        self.assertAlmostEqual(per_mvox, 2)
+        self.assertEqual(fit_cost([2, 2], [3, 5]), (4, 0))
+        profiles = [
+            dict(node=NODES[1], mvox=mvox, seconds=60 * mvox, mem_gb=None)
+            for mvox in (10, 20, 30)
+        ]
+        calibration = calibrate(profiles, CALIBRATION)
+        cost = calibration["nodes"]["dwipreproc"]
+        self.assertAlmostEqual(cost["seconds"], 0)
+        self.assertAlmostEqual(cost["seconds_per_mvox"], 60)
+        self.assertEqual(cost["mem_gb"], 0.1)
+        self.assertNotIn("dwipreproc", CALIBRATION["nodes"])
+
+    def test_image_mvox(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            in_file = Path(tmp_dir) / "dwi.nii.gz"
+            nb.save(
+                nb.Nifti1Image(np.zeros((10, 10, 10, 5), np.int16), np.eye(4)),
+                in_file,
+            )
+            self.assertAlmostEqual(image_mvox(in_file), 0.005)
@@ -0,0 +1,75 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from dwiprep.utils.files import (
+    COPY_MODES,
+    fingerprint,
+    place_file,
+    read_record,
+    same_fingerprint,
+    write_record,
+)
+
+
+class PlaceFileTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.src = Path(self.tmp_dir.name) / "src.bvec"
+        self.src.write_text("1 0 0\n")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_modes(self):
+        for mode in COPY_MODES:
+            dst = Path(self.tmp_dir.name) / mode / "dst.bvec"
+            method = place_file(self.src, dst, mode)
+            self.assertIn(method, COPY_MODES[COPY_MODES.index(mode) :])
+            self.assertEqual(dst.read_text(), self.src.read_text())
+        # hardlinks share the inode, copies do not
+        self.assertEqual(
+            os.stat(Path(self.tmp_dir.name) / "hardlink" / "dst.bvec").st_ino,
+            os.stat(self.src).st_ino,
+        )
+        self.assertNotEqual(
+            os.stat(Path(self.tmp_dir.name) / "copy" / "dst.bvec").st_ino,
+            os.stat(self.src).st_ino,
+        )
+
+    def test_overwrite(self):
+        dst = Path(self.tmp_dir.name) / "dst.bvec"
+        dst.write_text("old")
+        place_file(self.src, dst, "hardlink")
+        self.assertEqual(dst.read_text(), self.src.read_text())
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            place_file(self.src, Path(self.tmp_dir.name) / "dst", "symlink")
+
+    def test_writable(self):
+        dst = Path(self.tmp_dir.name) / "dst.bvec"
+        self.assertNotEqual(
+            place_file(self.src, dst, "hardlink", writable=True), "hardlink"
+        )
+
+    def test_fingerprint(self):
+        first = fingerprint(self.src, fast_hash=True)
+        stat = os.stat(self.src)
+        os.utime(self.src, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        # a touched file keeps its hash, but not its modification time
+        self.assertTrue(
+            same_fingerprint(first, fingerprint(self.src, fast_hash=True))
+        )
+        self.assertFalse(same_fingerprint(first, fingerprint(self.src)))
+
+    def test_record(self):
+        self.assertIsNone(read_record(self.src))
+        write_record(self.src, dict(options={}))
+        record = read_record(self.src)
+        self.assertTrue(
+            same_fingerprint(record["target"], fingerprint(self.src))
+        )
@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+import numpy as np
+
+from dwiprep.utils.gradients import GradientTable
+
+
+class GradientTableTestCase(TestCase):
+    def setUp(self) -> None:
+        self.bvals = np.array([0, 5, 995, 1000, 1010, 1990, 2000, 3005, 0])
+        bvecs = np.ones((3, self.bvals.size)) / np.sqrt(3)
+        self.table = GradientTable(self.bvals, bvecs)
+        return super().setUp()
+
+    def test_shells(self):
+        np.testing.assert_array_equal(
+            self.table.shells, [0, 1002, 1995, 3005]
+        )
+        self.assertTrue(self.table.is_multishell)
+
+    def test_b0_indices(self):
+        np.testing.assert_array_equal(self.table.b0_indices, [0, 1, 8])
+
+    def test_select(self):
+        np.testing.assert_array_equal(
+            self.table.select(max_bvalue=1200), [0, 1, 2, 3, 4, 8]
+        )
+        np.testing.assert_array_equal(
+            self.table.select(min_bvalue=1500, include_b0=False), [5, 6, 7]
+        )
+        self.assertEqual(self.table.to_coord([0, 2, 3]), "0,2,3")
+
+    def test_mismatched_lengths(self):
+        with self.assertRaises(ValueError):
+            GradientTable(self.bvals, np.ones((3, 2)))
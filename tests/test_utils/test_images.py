@@ -0,0 +1,102 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import nibabel as nb
+import numpy as np
+
+from dwiprep.utils.images import (
+    compress,
+    iter_slabs,
+    patch_nifti_header,
+    read_first_gzip_member,
+    write_coerced_nifti,
+)
+
+
+class PatchHeaderTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.data = rng.random((6, 5, 4, 3)).astype(np.float32)
+        img = nb.Nifti1Image(self.data, np.diag([2.0, 2.0, 2.0, 1.0]))
+        img.header.set_qform(img.affine, 0)
+        img.header.set_sform(img.affine, 0)
+        self.nii = Path(self.tmp_dir.name) / "dwi.nii"
+        nb.save(img, self.nii)
+        self.header = nb.load(self.nii).header.copy()
+        self.header.set_qform(img.affine, 2)
+        self.header.set_sform(img.affine, 2)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def assert_patched(self, in_file: Path):
+        img = nb.load(in_file)
+        self.assertEqual(int(img.header["qform_code"]), 2)
+        self.assertEqual(int(img.header["sform_code"]), 2)
+        np.testing.assert_array_equal(img.get_fdata(), self.data)
+
+    def test_uncompressed(self):
+        # the data offset is read from the file (loaded headers leave it 0)
+        offset = nb.load(self.nii).dataobj.offset
+        data_block = self.nii.read_bytes()[offset:]
+        self.assertTrue(patch_nifti_header(self.nii, self.header))
+        self.assertEqual(self.nii.read_bytes()[offset:], data_block)
+        self.assertEqual(nb.load(self.nii).dataobj.offset, offset)
+        self.assert_patched(self.nii)
+
+    def test_compressed(self):
+        out_file = compress(self.nii, self.nii.with_suffix(".nii.gz"))
+        header_member, member_size = read_first_gzip_member(out_file)
+        # the first member holds the header (and extensions) alone
+        self.assertEqual(len(header_member), nb.load(self.nii).dataobj.offset)
+        data_member = out_file.read_bytes()[member_size:]
+        self.assertTrue(patch_nifti_header(out_file, self.header))
+        _, patched_size = read_first_gzip_member(out_file)
+        # the (compressed) data member is left untouched
+        self.assertEqual(out_file.read_bytes()[patched_size:], data_member)
+        self.assert_patched(out_file)
+
+    def test_layout_mismatch(self):
+        self.header.set_data_dtype(np.int16)
+        self.assertFalse(patch_nifti_header(self.nii, self.header))
+
+    def test_offset_mismatch(self):
+        offset = nb.load(self.nii).dataobj.offset
+        self.header.set_data_offset(offset + 16)
+        self.assertFalse(patch_nifti_header(self.nii, self.header))
+
+
+class CoerceTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.data = rng.random((6, 5, 4, 3)) * 10
+        self.nii = Path(self.tmp_dir.name) / "dseg.nii.gz"
+        nb.save(nb.Nifti1Image(self.data, np.eye(4)), self.nii)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_iter_slabs(self):
+        # a single (6, 5, 4) float64 volume is ~1kB
+        slabs = list(iter_slabs((6, 5, 4, 3), 8, chunk_mb=1e-3))
+        self.assertEqual(slabs, [slice(0, 1), slice(1, 2), slice(2, 3)])
+        self.assertEqual(list(iter_slabs((6, 5, 4, 3), 8)), [slice(0, 3)])
+
+    def test_coerce(self):
+        header = nb.load(self.nii).header.copy()
+        header.set_data_dtype(np.int16)
+        for name in ("dseg.nii", "dseg_coerced.nii.gz"):
+            out_file = Path(self.tmp_dir.name) / name
+            write_coerced_nifti(self.nii, out_file, header, chunk_mb=1e-3)
+            img = nb.load(out_file)
+            self.assertEqual(img.get_data_dtype(), np.int16)
+            np.testing.assert_array_equal(
+                np.asanyarray(img.dataobj), np.rint(self.data)
+            )
@@ -0,0 +1,100 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from dwiprep.utils.manifest import (
+    append_manifest,
+    get_subject,
+    glob_to_regex,
+    index_tree,
+    load_manifest,
+    manifest_path,
+    match_manifest,
+    read_manifest,
+)
+
+FILES = [
+    "dmriprep/sub-01/ses-1/anat/sub-01_ses-1_desc-preproc_T1w.nii.gz",
+    "dmriprep/sub-01/ses-1/dwi/sub-01_ses-1_desc-preproc_dwi.nii.gz",
+    "dmriprep/sub-01.html",
+    "dmriprep/sub-02/ses-1/anat/sub-02_ses-1_desc-preproc_T1w.nii.gz",
+    "dmriprep/dataset_description.json",
+    "freesurfer/sub-01/surf/lh.pial",
+]
+
+
+class ManifestTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_directory = Path(self.tmp_dir.name)
+        for relative_path in FILES:
+            path = self.base_directory / relative_path
+            path.parent.mkdir(exist_ok=True, parents=True)
+            path.touch()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_get_subject(self):
+        self.assertEqual(get_subject(FILES[0]), "01")
+        self.assertEqual(get_subject(FILES[2]), "01")
+        self.assertIsNone(get_subject(FILES[4]))
+
+    def test_index_tree(self):
+        index = index_tree(self.base_directory)
+        self.assertEqual(
+            sorted(index["01"]), sorted(FILES[:3] + [FILES[-1]])
+        )
+        self.assertEqual(index["02"], [FILES[3]])
+        self.assertEqual(list(index_tree(self.base_directory, ["02"])), ["02"])
+
+    def test_append(self):
+        self.assertIsNone(read_manifest(self.base_directory, "01"))
+        append_manifest(self.base_directory, [FILES[1]])
+        append_manifest(
+            self.base_directory, [self.base_directory / FILES[1], FILES[4]]
+        )
+        # a new manifest is seeded with the subject's earlier outputs
+        self.assertEqual(
+            sorted(read_manifest(self.base_directory, "01")),
+            sorted(FILES[:3] + [FILES[-1]]),
+        )
+        self.assertIsNone(read_manifest(self.base_directory, "02"))
+
+    def test_prune(self):
+        append_manifest(self.base_directory, [FILES[3]])
+        (self.base_directory / FILES[3]).unlink()
+        path = manifest_path(self.base_directory, "02")
+        path.chmod(0o444)
+        # read-only manifests are read (without being rewritten)
+        self.assertEqual(read_manifest(self.base_directory, "02"), [])
+        self.assertIn(FILES[3], path.read_text())
+        path.chmod(0o644)
+        # the next append prunes the removed file's entry
+        new_file = FILES[3].replace("anat", "dwi").replace("T1w", "dwi")
+        (self.base_directory / new_file).parent.mkdir()
+        (self.base_directory / new_file).touch()
+        append_manifest(self.base_directory, [new_file])
+        self.assertEqual(
+            path.read_text(), json.dumps(dict(path=new_file)) + "\n"
+        )
+
+    def test_load_and_match(self):
+        manifest = load_manifest(self.base_directory, "01")
+        self.assertEqual(len(manifest), 4)
+        # later reads are answered by the (indexed) manifest
+        self.assertEqual(read_manifest(self.base_directory, "01"), manifest)
+        pattern = "dmriprep/**/anat/sub-01_*_desc-preproc_T1w.nii.gz"
+        self.assertEqual(
+            match_manifest(manifest, pattern, self.base_directory),
+            [self.base_directory / FILES[0]],
+        )
+        self.assertTrue(
+            glob_to_regex("freesurfer/sub-01/**/*pial").match(FILES[-1])
+        )
+        self.assertFalse(
+            glob_to_regex("dmriprep/*_T1w.nii.gz").match(FILES[0])
+        )
@@ -0,0 +1,76 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import nibabel as nb
+import numpy as np
+
+from dwiprep.utils.metadata import (
+    get_acqparams,
+    get_phase_encoding_direction,
+    get_total_readout_time,
+    load_metadata,
+    read_mif_header,
+)
+
+MIF_HEADER = """mrtrix image
+dim: 4,4,2,3
+vox: 2,2,2,1
+layout: +0,+1,+2,+3
+datatype: Float32LE
+transform: 1,0,0,0
+transform: 0,1,0,0
+transform: 0,0,1,0
+pe_scheme: 0,-1,0,0.05
+pe_scheme: 0,-1,0,0.05
+pe_scheme: 0,-1,0,0.05
+file: . 512
+END
+"""
+
+
+class MetadataTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.mif_file = Path(self.tmp_dir.name) / "sub-01_dwi.mif"
+        self.mif_file.write_text(MIF_HEADER)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_read_mif_header(self):
+        header = read_mif_header(self.mif_file)
+        self.assertEqual(header["dim"], [4, 4, 2, 3])
+        self.assertEqual(len(header["transform"]), 3)
+        self.assertEqual(header["datatype"], "Float32LE")
+
+    def test_phase_encoding_from_scheme(self):
+        self.assertEqual(get_phase_encoding_direction(self.mif_file), "j-")
+        self.assertAlmostEqual(get_total_readout_time(self.mif_file), 0.05)
+        self.assertEqual(load_metadata(self.mif_file)["n_volumes"], 3)
+
+    def test_sidecar_over_pe_scheme(self):
+        sidecar = self.mif_file.with_suffix(".json")
+        sidecar.write_text(json.dumps({"PhaseEncodingDirection": "j"}))
+        self.assertEqual(get_phase_encoding_direction(self.mif_file), "j")
+
+    def test_acqparams(self):
+        np.testing.assert_array_equal(
+            get_acqparams(self.mif_file), [[0, -1, 0, 0.05]] * 3
+        )
+        nifti = Path(self.tmp_dir.name) / "sub-01_dir-PA_epi.nii"
+        nifti.with_suffix(".json").write_text(
+            json.dumps(
+                {"PhaseEncodingDirection": "j", "TotalReadoutTime": 0.04}
+            )
+        )
+        nb.save(
+            nb.Nifti1Image(np.zeros((2, 2, 2, 2), np.float32), np.eye(4)),
+            nifti,
+        )
+        np.testing.assert_array_equal(
+            get_acqparams(nifti), [[0, 1, 0, 0.04]] * 2
+        )
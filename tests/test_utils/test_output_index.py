@@ -0,0 +1,89 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from dwiprep.utils.manifest import (
+    append_manifest,
+    manifest_path,
+    write_manifest,
+)
+from dwiprep.utils.output_index import OutputIndex
+
+OUTPUTS = {
+    "native_T1w": ["dmriprep", "anat", "desc-preproc_T1w.nii.gz"],
+    "standard_T1w": [
+        "dmriprep",
+        "anat",
+        "space-MNI152NLin2009cAsym_desc-preproc_T1w.nii.gz",
+    ],
+    "pial": ["freesurfer", "surf", "lh.pial"],
+}
+
+FILES = [
+    "dmriprep/sub-01/ses-1/anat/sub-01_ses-1_desc-preproc_T1w.nii.gz",
+    "dmriprep/sub-01/ses-1/anat/"
+    "sub-01_ses-1_space-MNI152NLin2009cAsym_desc-preproc_T1w.nii.gz",
+    "dmriprep/sub-02/ses-1/anat/sub-02_ses-1_desc-preproc_T1w.nii.gz",
+    "freesurfer/sub-01/surf/lh.pial",
+]
+
+
+class OutputIndexTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.destination = Path(self.tmp_dir.name)
+        for relative_path in FILES:
+            path = self.destination / relative_path
+            path.parent.mkdir(exist_ok=True, parents=True)
+            path.touch()
+        self.index = OutputIndex(self.destination, OUTPUTS)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_find(self):
+        self.assertEqual(self.index.subjects, ["01", "02"])
+        outputs = self.index.get_outputs("01")
+        self.assertEqual(
+            outputs["native_T1w"], [str(self.destination / FILES[0])]
+        )
+        self.assertEqual(
+            outputs["standard_T1w"], [str(self.destination / FILES[1])]
+        )
+        self.assertEqual(outputs["pial"], [str(self.destination / FILES[3])])
+        self.assertEqual(self.index.find("native_T1w", "01", "ses-2"), [])
+
+    def test_cache(self):
+        self.index.find("native_T1w", "02")
+        (self.destination / FILES[2]).unlink()
+        # cached until invalidated
+        self.assertEqual(len(self.index.find("native_T1w", "02")), 1)
+        self.index.invalidate("02")
+        self.assertEqual(self.index.find("native_T1w", "02"), [])
+
+    def test_manifest(self):
+        write_manifest(self.destination, "02", [])
+        self.assertEqual(self.index.find("native_T1w", "02"), [])
+        self.assertFalse(self.index._walked)
+
+    def test_new_manifest(self):
+        # a subject's first sink does not hide its earlier outputs
+        append_manifest(self.destination, [FILES[1]])
+        self.assertEqual(
+            self.index.find("native_T1w", "01"),
+            [str(self.destination / FILES[0])],
+        )
+        self.assertFalse(self.index._walked)
+        # subjects without a manifest are indexed by their own walk
+        self.assertEqual(len(self.index.find("native_T1w", "02")), 1)
+        self.assertTrue(manifest_path(self.destination, "02").exists())
+
+    def test_table(self):
+        table = self.index.table(keys=["native_T1w", "pial"])
+        self.assertEqual(list(table.index), ["01", "02"])
+        self.assertEqual(table.loc["02", "pial"], [])
+        long_table = self.index.table(long=True)
+        self.assertEqual(len(long_table), 4)
+        self.assertEqual(set(long_table["session"].dropna()), {"ses-1"})
@@ -0,0 +1,85 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from dwiprep.utils.parcellation import (
+    STATS_COLUMNS,
+    aggregate_statistics,
+    index_labels,
+    region_statistics,
+)
+
+
+class RegionStatisticsTestCase(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.labels = rng.integers(0, 6, size=(8, 9, 7))
+        self.values = rng.normal(size=self.labels.shape)
+        self.values[0, 0, :3] = np.nan
+        return super().setUp()
+
+    def test_index_labels(self):
+        regions, inverse, mask = index_labels(self.labels, exclude=(0, 5))
+        self.assertEqual(list(regions), [1, 2, 3, 4])
+        self.assertEqual(mask.sum(), np.isin(self.labels, [1, 2, 3, 4]).sum())
+        flat = self.labels.ravel(order="F")[mask]
+        self.assertTrue((regions[inverse] == flat).all())
+
+    def test_region_statistics(self):
+        regions, inverse, mask = index_labels(self.labels)
+        values = self.values.ravel(order="F")[mask]
+        stats = region_statistics(values, inverse, len(regions))
+        for i, label in enumerate(regions):
+            region = self.values[self.labels == label]
+            region = region[np.isfinite(region)]
+            self.assertEqual(stats["n_voxels"][i], region.size)
+            self.assertAlmostEqual(stats["mean"][i], region.mean())
+            self.assertAlmostEqual(stats["median"][i], np.median(region))
+            self.assertAlmostEqual(stats["std"][i], region.std())
+
+    def test_empty_region(self):
+        inverse = np.array([0, 0, 2])
+        stats = region_statistics(np.array([1.0, 3.0, 5.0]), inverse, 3)
+        self.assertEqual(list(stats["n_voxels"]), [2, 0, 1])
+        self.assertEqual(stats["median"][0], 2)
+        self.assertTrue(np.isnan(stats["mean"][1]))
+        self.assertTrue(np.isnan(stats["median"][1]))
+
+
+class AggregateStatisticsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_directory = Path(self.tmp_dir.name)
+        self.stats_files = {}
+        for subject_id in ["01", "02"]:
+            stats_file = (
+                self.base_directory
+                / f"sub-{subject_id}/ses-1/dwi"
+                / f"sub-{subject_id}_ses-1_space-anat_desc-dseg_stats.tsv"
+            )
+            stats_file.parent.mkdir(parents=True)
+            stats_file.write_text(
+                "\t".join(STATS_COLUMNS)
+                + "\n1\tfa\t10\t0.5\t0.5\t0.1\n2\tfa\t0\tn/a\tn/a\tn/a\n"
+            )
+            self.stats_files[subject_id] = [str(stats_file)]
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_aggregate(self):
+        table = aggregate_statistics(self.stats_files)
+        self.assertEqual(len(table), 4)
+        columns = ["subject", "session", "source"] + STATS_COLUMNS
+        self.assertEqual(list(table.columns), columns)
+        self.assertEqual(set(table["session"]), {"ses-1"})
+        self.assertTrue(table["mean"].isna().sum() == 2)
+
+    def test_aggregate_empty(self):
+        table = aggregate_statistics({})
+        self.assertTrue(table.empty)
+        self.assertIn("metric", table.columns)
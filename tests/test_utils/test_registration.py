@@ -0,0 +1,119 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import nibabel as nb
+import numpy as np
+
+from dwiprep.interfaces.registration import RigidRegistration
+from dwiprep.utils.registration import (
+    normalized_mutual_information,
+    register_rigid,
+    rigid_matrix,
+    rms_deviation,
+)
+from dwiprep.utils.resampling import fsl_to_voxel_mapping
+
+SHAPE = (32, 32, 32)
+AFFINE = np.diag([2.0, 2.0, 2.0, 1.0])
+
+
+def phantom(coords: np.ndarray) -> np.ndarray:
+    """An asymmetric, smooth phantom sampled at (3, n) voxel coordinates."""
+    x, y, z = (coords - 15.5) / 12.0
+    inside = x ** 2 + y ** 2 + z ** 2 < 1
+    blobs = (
+        np.exp(-((x - 0.3) ** 2 + y ** 2 + (z + 0.2) ** 2) / 0.05)
+        + 0.5 * np.exp(-((x + 0.4) ** 2 + (y - 0.3) ** 2 + z ** 2) / 0.1)
+        + 0.3 * (y + 1)
+    )
+    return np.where(inside, 0.2 + blobs, 0.0).astype(np.float32)
+
+
+class RegistrationTestCase(TestCase):
+    def setUp(self) -> None:
+        self.center = np.array([40.0, 50.0, 30.0])
+        return super().setUp()
+
+    def test_rigid_matrix(self):
+        matrix = rigid_matrix(np.zeros(6), self.center, self.center)
+        np.testing.assert_allclose(matrix, np.eye(4))
+        params = np.r_[0.1, -0.2, 0.3, 0, 0, 0]
+        matrix = rigid_matrix(params, self.center, self.center)
+        rotation = matrix[:3, :3]
+        np.testing.assert_allclose(
+            rotation.T @ rotation, np.eye(3), atol=1e-6
+        )
+        # rotations are about the moving image's center
+        np.testing.assert_allclose(
+            matrix @ np.r_[self.center, 1], np.r_[self.center, 1]
+        )
+
+    def test_rms_deviation(self):
+        params = np.r_[0.1, 0, 0, 1, 2, 3]
+        matrix = rigid_matrix(params, self.center, self.center)
+        self.assertAlmostEqual(rms_deviation(matrix, matrix, self.center), 0)
+        shifted = matrix.copy()
+        shifted[:3, 3] += [3, 0, 4]
+        self.assertAlmostEqual(
+            rms_deviation(shifted, matrix, self.center), 5.0
+        )
+
+    def test_normalized_mutual_information(self):
+        rng = np.random.default_rng(0)
+        bins = rng.integers(0, 32, 10000)
+        self.assertAlmostEqual(normalized_mutual_information(bins, bins), 2.0)
+        independent = normalized_mutual_information(
+            bins, rng.integers(0, 32, 10000)
+        )
+        self.assertLess(independent, 1.1)
+
+
+class RigidRegistrationTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        grid = np.indices(SHAPE).reshape(3, -1).astype(float)
+        cls.reference = nb.Nifti1Image(
+            phantom(grid).reshape(SHAPE), AFFINE
+        )
+        cls.center = np.array([32.0, 32.0, 32.0])
+        # ~3 degrees about each axis and a few mm along each
+        cls.truth = rigid_matrix(
+            np.r_[0.06, -0.04, 0.05, 3, -2, 2], cls.center, cls.center
+        )
+        # moving voxels sample the phantom where the truth maps them
+        mapping = fsl_to_voxel_mapping(cls.truth, cls.reference, cls.reference)
+        inverse = np.linalg.inv(mapping)
+        coords = inverse[:3, :3] @ grid + inverse[:3, 3:]
+        cls.moving = nb.Nifti1Image(phantom(coords).reshape(SHAPE), AFFINE)
+        return super().setUpClass()
+
+    def test_register_rigid(self):
+        self.assertGreater(
+            rms_deviation(np.eye(4), self.truth, self.center), 5
+        )
+        matrix = register_rigid(self.moving, self.reference)
+        self.assertLess(rms_deviation(matrix, self.truth, self.center), 1)
+
+    def test_interface(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                nb.save(self.moving, "epiref.nii.gz")
+                nb.save(self.reference, "t1w_brain.nii.gz")
+                outputs = RigidRegistration(
+                    in_file="epiref.nii.gz", reference="t1w_brain.nii.gz"
+                ).run().outputs
+                matrix = np.loadtxt(outputs.epi_to_t1w_aff)
+                np.testing.assert_allclose(
+                    np.loadtxt(outputs.t1w_to_epi_aff),
+                    np.linalg.inv(matrix),
+                    atol=1e-6,
+                )
+                self.assertEqual(nb.load(outputs.out_file).shape, SHAPE)
+                self.assertTrue(Path(outputs.out_file).exists())
+            finally:
+                os.chdir(cwd)
+        self.assertLess(rms_deviation(matrix, self.truth, self.center), 1)
@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+import nibabel as nb
+import numpy as np
+
+from dwiprep.utils.resampling import (
+    fsl_to_itk,
+    fsl_to_voxel_mapping,
+    grid_chunks,
+    interpolate,
+    rotate_bvecs,
+    trilinear_weights,
+)
+
+
+class ResamplingTestCase(TestCase):
+    def setUp(self) -> None:
+        self.shape = (6, 5, 4)
+        rng = np.random.default_rng(0)
+        self.data = rng.random(self.shape + (3,)).astype(np.float32)
+        self.img = nb.Nifti1Image(self.data, np.diag([2.0, 2.0, 2.0, 1.0]))
+        return super().setUp()
+
+    def resample(self, matrix: np.ndarray, chunk_size: int = 17):
+        mapping = fsl_to_voxel_mapping(matrix, self.img, self.img)
+        flat = self.data.reshape(-1, 3, order="F")
+        values = np.concatenate(
+            [
+                interpolate(
+                    flat,
+                    *trilinear_weights(mapping, self.shape, self.shape, chunk)
+                )
+                for chunk in grid_chunks(self.shape, chunk_size)
+            ]
+        )
+        return values.reshape(self.shape + (3,), order="F")
+
+    def test_identity(self):
+        np.testing.assert_allclose(
+            self.resample(np.eye(4)), self.data, rtol=1e-6
+        )
+
+    def test_translation(self):
+        # one voxel (2mm) shift along the second axis
+        matrix = np.eye(4)
+        matrix[1, 3] = 2.0
+        resampled = self.resample(matrix)
+        np.testing.assert_allclose(
+            resampled[:, 1:], self.data[:, :-1], rtol=1e-6
+        )
+        np.testing.assert_array_equal(resampled[:, 0], 0)
+
+    def test_rotate_bvecs(self):
+        # 90 degrees about the z axis, with an isotropic scaling
+        matrix = np.eye(4)
+        matrix[:2, :2] = [[0, -1.1], [1.1, 0]]
+        bvecs = np.array([[1.0, 0.0], [0.0, 0.0], [0.0, 0.0]])
+        np.testing.assert_allclose(
+            rotate_bvecs(bvecs, matrix), [[0, 0], [1, 0], [0, 0]], atol=1e-12
+        )
+
+    def test_fsl_to_itk(self):
+        np.testing.assert_allclose(
+            fsl_to_itk(np.eye(4), self.img, self.img), np.eye(4), atol=1e-12
+        )
+        # a FLIRT translation along y maps fixed points back by 2mm (LPS+)
+        matrix = np.eye(4)
+        matrix[1, 3] = 2.0
+        np.testing.assert_allclose(
+            fsl_to_itk(matrix, self.img, self.img)[:3, 3], [0, 2, 0]
+        )
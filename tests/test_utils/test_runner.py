@@ -0,0 +1,55 @@
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from dwiprep.workflows.smri.utils.runner import (
+    run_command,
+    run_commands,
+    summarize_results,
+)
+
+
+class RunnerTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_dir = Path(self.tmp_dir.name) / "logs"
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_run_command(self):
+        command = [
+            sys.executable,
+            "-c",
+            "import sys; print('out'); sys.stderr.write('err'); sys.exit(3)",
+        ]
+        result = run_command("01", command, self.log_dir)
+        self.assertEqual(result.returncode, 3)
+        self.assertFalse(result.succeeded)
+        self.assertEqual(result.stdout.read_text(), "out\n")
+        self.assertEqual(result.stderr.read_text(), "err")
+        self.assertEqual(result.stdout.name, "sub-01_stdout.log")
+
+    def test_missing_executable(self):
+        result = run_command("01", "no-such-executable", self.log_dir)
+        self.assertEqual(result.returncode, 127)
+        self.assertTrue(result.stderr.read_text())
+
+    def test_run_commands(self):
+        commands = {
+            label: [sys.executable, "-c", f"import time; time.sleep({delay})"]
+            for label, delay in (("01", 0.5), ("02", 0.5), ("03", 0))
+        }
+        finished = []
+        results = run_commands(
+            commands, self.log_dir, max_concurrent=3, callback=finished.append
+        )
+        labels = [result.participant_label for result in results]
+        self.assertEqual(labels, list(commands))
+        self.assertTrue(all(r.succeeded for r in results))
+        # the quickest participant is reported first
+        self.assertEqual(finished[0].participant_label, "03")
+        self.assertEqual(len(summarize_results(results).splitlines()), 4)